@@ -0,0 +1,130 @@
+# benchmarks/button_bench.py
+"""
+Micro-benchmark for RoundButton rendering: normal vs lite mode.
+
+Builds a column of buttons, presses a burst of them, then ticks the clock
+while the press effects play out. Reports canvas instruction counts (all,
+and the ripple instructions in canvas.after), live Animation objects and the
+average cost of a frame.
+
+    python benchmarks/button_bench.py [buttons] [presses] [frames]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
+from kivy.config import Config
+Config.set('graphics', 'maxfps', '0')  # Clock.tick 不等待帧间隔
+
+from kivy.animation import Animation
+from kivy.clock import Clock
+from kivy.uix.boxlayout import BoxLayout
+
+from ui_elements.buttons import RoundButton, set_lite_mode
+
+
+class BenchTouch:
+    """The parts of a MotionEvent that RoundButton / ButtonBehavior read."""
+
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+        self.pos = (x, y)
+        self.ud = {}
+        self.button = 'left'
+        self.is_mouse_scrolling = False
+        self.is_double_tap = False
+        self.is_triple_tap = False
+        self.grab_current = None
+        self.grab_list = []
+
+    def grab(self, widget, exclusive=False):
+        self.grab_list.append(widget)
+
+    def ungrab(self, widget):
+        if widget in self.grab_list:
+            self.grab_list.remove(widget)
+
+    def push(self, *args, **kwargs):
+        pass
+
+    def pop(self):
+        pass
+
+    def apply_transform_2d(self, transform):
+        pass
+
+
+def count_instructions(canvas):
+    total = 0
+    for group in (canvas.before, canvas, canvas.after):
+        total += len(group.children)
+    return total
+
+
+def count_ripple_instructions(widgets):
+    """Instructions in canvas.after: per-press ripples (normal) or the shared overlay (lite)."""
+    return sum(len(widget.canvas.after.children) for widget in widgets)
+
+
+def build(count):
+    container = BoxLayout(orientation='vertical', size=(400, count * 50))
+    buttons = [RoundButton(text=f'button {i}', size_hint=(None, None), size=(400, 48), pos=(0, i * 50),
+                           enable_ripple=True)
+               for i in range(count)]
+    for button in buttons:
+        container.add_widget(button)
+    return container, buttons
+
+
+def press(button):
+    touch = BenchTouch(button.center_x, button.center_y)
+    button.on_touch_down(touch)
+    touch.grab_current = button
+    button.on_touch_up(touch)
+
+
+def run(lite, count, presses, frames):
+    set_lite_mode(lite)
+    start = time.perf_counter()
+    container, buttons = build(count)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    Clock.tick()
+    for button in buttons[:presses]:
+        press(button)
+    in_flight = count_instructions(container.canvas) + sum(count_instructions(b.canvas) for b in buttons)
+    ripples = count_ripple_instructions([container] + buttons)
+    animations = len(Animation._instances)
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        Clock.tick()
+    frame_ms = (time.perf_counter() - start) * 1000 / frames
+
+    settled = count_instructions(container.canvas) + sum(count_instructions(b.canvas) for b in buttons)
+    Animation.cancel_all(container)
+    for button in buttons:
+        Animation.cancel_all(button)
+    return build_ms, in_flight, ripples, settled, animations, frame_ms
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    presses = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    frames = int(sys.argv[3]) if len(sys.argv) > 3 else 120
+    print(f'{count} buttons, {presses} presses, {frames} frames')
+    print(f"{'mode':<8}{'build ms':>10}{'instr (press)':>15}{'ripple instr':>14}{'instr (after)':>14}"
+          f"{'animations':>12}{'ms/frame':>10}")
+    for lite in (False, True):
+        build_ms, in_flight, ripples, settled, animations, frame_ms = run(lite, count, presses, frames)
+        mode = 'lite' if lite else 'normal'
+        print(f'{mode:<8}{build_ms:>10.1f}{in_flight:>15}{ripples:>14}{settled:>14}'
+              f'{animations:>12}{frame_ms:>10.3f}')
+    set_lite_mode(False)
+
+
+if __name__ == '__main__':
+    main()
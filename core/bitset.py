@@ -0,0 +1,144 @@
+# core/bitset.py
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+
+class PositionSet:
+    """
+    Set of defaults positions backed by a bitset, with insertion order kept
+    alongside it.
+
+    Membership, add and discard are O(1) bit operations; union, intersection
+    and difference combine whole bitsets through `int` arithmetic, which works
+    a machine word at a time. Iterating yields positions in insertion order
+    (the order of the lexicon file).
+    """
+    __slots__ = ('_bits', '_order', 'version')
+
+    def __init__(self, positions: Optional[Iterable[int]] = None):
+        self._bits = bytearray()
+        self._order: Dict[int, None] = {}
+        self.version = 0  # 每次增删成员加一，缓存可据此判断集合是否变过
+        if positions is not None:
+            for position in positions:
+                self.add(position)
+
+    @classmethod
+    def _from_bits(cls, bits: bytearray, order: Iterable[int]) -> 'PositionSet':
+        result = cls()
+        result._bits = bits
+        result._order = dict.fromkeys(order)
+        return result
+
+    def __contains__(self, position: object) -> bool:
+        if not isinstance(position, int) or position < 0:
+            return False
+        byte = position >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (position & 7)))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._order)
+
+    def __repr__(self) -> str:
+        return f'PositionSet({list(self._order)!r})'
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PositionSet):
+            return NotImplemented
+        return self._as_int() == other._as_int()
+
+    def add(self, position: int) -> bool:
+        """
+        Adds a position.
+
+        Returns:
+            True if it was added, False if it was already a member.
+
+        Raises:
+            ValueError: If `position` is negative.
+        """
+        if position < 0:
+            raise ValueError(f"Position must be non-negative, got {position}.")
+        byte, mask = position >> 3, 1 << (position & 7)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        elif self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        self._order[position] = None
+        self.version += 1
+        return True
+
+    def discard(self, position: int) -> bool:
+        """
+        Removes a position if present.
+
+        Returns:
+            True if it was removed, False if it was not a member.
+        """
+        if position not in self:
+            return False
+        self._bits[position >> 3] &= ~(1 << (position & 7)) & 0xFF
+        del self._order[position]
+        self.version += 1
+        return True
+
+    def upper_bound(self) -> int:
+        """One past the largest member (0 when empty)."""
+        bits = self._bits.rstrip(b'\x00')
+        if not bits:
+            return 0
+        return (len(bits) - 1) * 8 + bits[-1].bit_length()
+
+    def iter_sorted(self) -> Iterator[int]:
+        """Yields members in ascending position order by scanning the set bits."""
+        for match in _NONZERO_BYTE.finditer(self._bits):
+            byte = match.start()
+            value = self._bits[byte]
+            base = byte << 3
+            while value:
+                low = value & -value
+                yield base + low.bit_length() - 1
+                value ^= low
+
+    def to_list(self) -> List[int]:
+        """Members in insertion order, as stored in a lexicon file."""
+        return list(self._order)
+
+    def _as_int(self) -> int:
+        return int.from_bytes(self._bits, 'little')
+
+    @staticmethod
+    def _to_bits(value: int) -> bytearray:
+        return bytearray(value.to_bytes((value.bit_length() + 7) // 8, 'little'))
+
+    def union(self, other: 'PositionSet') -> 'PositionSet':
+        """Members of either set; this set's order first, then the new members of `other`."""
+        result = self._from_bits(self._to_bits(self._as_int() | other._as_int()), self._order)
+        for position in other._order:
+            if position not in self:
+                result._order[position] = None
+        return result
+
+    def intersection(self, other: 'PositionSet') -> 'PositionSet':
+        """Members of both sets, in this set's order."""
+        bits = self._to_bits(self._as_int() & other._as_int())
+        result = self._from_bits(bits, ())
+        result._order = dict.fromkeys(p for p in self._order if p in result)
+        return result
+
+    def difference(self, other: 'PositionSet') -> 'PositionSet':
+        """Members of this set that are not in `other`, in this set's order."""
+        bits = self._to_bits(self._as_int() & ~other._as_int())
+        result = self._from_bits(bits, ())
+        result._order = dict.fromkeys(p for p in self._order if p in result)
+        return result
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
@@ -0,0 +1,138 @@
+# core/catalog.py
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 不以 .json 结尾，避免被 get_lexicon_list 当作词库
+CATALOG_NAME = 'catalog.manifest'
+_VERSION = 1
+
+
+class Catalog:
+    """
+    Small manifest of the custom lexicons in a lexicon directory.
+
+    For every lexicon it records the (mtime_ns, size) of its file, its entry
+    count and, once computed, its per-scheme counts. The stats generation at
+    save time is stored too: scheme counts are only trusted if the counters
+    have not been written since. The lexicon screens render from it without
+    opening the lexicon files. Lexicon owns the validation: it compares the
+    recorded directory mtime and file fingerprints with the filesystem and
+    refreshes stale entries.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dir_mtime_ns: Optional[int] = None
+        self.defaults_count: Optional[int] = None
+        self.stats_generation: Optional[int] = None
+        self.lexicons: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'Catalog':
+        """Reads the manifest; a missing or unreadable one yields an empty catalog."""
+        catalog = cls(path)
+        if not os.path.exists(path):
+            return catalog
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError) as e:
+            print(f"Warning: Could not read lexicon catalog {path}: {e}. Rebuilding.")
+            return catalog
+        if not isinstance(data, dict) or data.get('version') != _VERSION or not isinstance(data.get('lexicons'), dict):
+            print(f"Warning: Lexicon catalog {path} has an unknown format. Rebuilding.")
+            return catalog
+        catalog.dir_mtime_ns = data.get('dir_mtime_ns')
+        catalog.defaults_count = data.get('defaults_count')
+        catalog.stats_generation = data.get('stats_generation')
+        catalog.lexicons = data['lexicons']
+        return catalog
+
+    def save(self) -> bool:
+        """
+        Writes the manifest if anything changed. It is rewritten in place rather
+        than renamed over, so saving does not change the directory's mtime.
+
+        Returns:
+            True if successful (or nothing to write), False otherwise.
+        """
+        if not self.dirty:
+            return True
+        data = {
+            'version': _VERSION,
+            'dir_mtime_ns': self.dir_mtime_ns,
+            'defaults_count': self.defaults_count,
+            'stats_generation': self.stats_generation,
+            'lexicons': self.lexicons,
+        }
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            self.dirty = False
+            return True
+        except (IOError, OSError) as e:
+            print(f"Error writing lexicon catalog {self.path}: {e}")
+            return False
+
+    def names(self) -> List[str]:
+        return sorted(self.lexicons)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.lexicons.get(name)
+
+    def set_lexicon(self, name: str, fingerprint: Tuple[int, int], count: int) -> None:
+        """Records a lexicon's file fingerprint and entry count; scheme counts are reset."""
+        self.lexicons[name] = {'mtime_ns': fingerprint[0], 'size': fingerprint[1], 'count': count}
+        self.dirty = True
+
+    def set_schemes(self, name: str, counts: Dict[str, int]) -> None:
+        """Records a lexicon's per-scheme counts."""
+        info = self.lexicons.get(name)
+        if info is None:
+            return
+        info['schemes'] = dict(counts)
+        self.dirty = True
+
+    def rename(self, old_name: str, new_name: str) -> None:
+        info = self.lexicons.pop(old_name, None)
+        if info is not None:
+            self.lexicons[new_name] = info
+        self.dirty = True
+
+    def remove(self, name: str) -> None:
+        if self.lexicons.pop(name, None) is not None:
+            self.dirty = True
+
+    def clear_schemes(self) -> None:
+        """Drops every recorded scheme count (e.g. when the counters changed behind our back)."""
+        for info in self.lexicons.values():
+            if info.pop('schemes', None) is not None:
+                self.dirty = True
+
+    def move_entry(self, position: int, old_scheme: str, new_scheme: str,
+                   contains: Callable[[str, int], Optional[bool]]) -> None:
+        """
+        Keeps scheme counts current after the entry at a defaults position
+        moved from `old_scheme` to `new_scheme`.
+
+        Args:
+            contains: contains(name, position) -> True/False if the lexicon's
+                membership is known without reading its file, None otherwise.
+                Counts of lexicons with unknown membership are dropped and get
+                recomputed the next time they are asked for.
+        """
+        for name, info in self.lexicons.items():
+            counts = info.get('schemes')
+            if counts is None:
+                continue
+            member = contains(name, position)
+            if member is None:
+                del info['schemes']
+            elif member:
+                counts[old_scheme] -= 1
+                counts[new_scheme] += 1
+            else:
+                continue
+            self.dirty = True
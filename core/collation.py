@@ -0,0 +1,83 @@
+# core/collation.py
+from array import array
+from typing import Any, Sequence
+
+# 汉字按拼音排序：GB2312 一级汉字 (3755 字) 本身按拼音排列，二级汉字按部首排列，
+# Python 自带的 gb2312 编码表就是离线的拼音序表，不需要额外的数据文件。
+# 排序键把每个字符换成一个可比较的字符：
+#   一级汉字 -> U+F0000 + 序号 (拼音序)
+#   二级汉字 -> U+F1000 + 序号 (部首序，排在一级汉字之后)
+#   其他汉字 -> U+F2000 后接原字符 (按码位，排在最后)
+#   其余字符 (字母、数字、标点) 不变，ASCII 先经 casefold
+_LEVEL1_BASE = 0xF0000
+_LEVEL2_BASE = 0xF1000
+_OTHER_HANZI = chr(0xF2000)
+_IDEOGRAPH_RANGES = (
+    (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0x20000, 0x323AF),
+)
+
+
+def _is_ideograph(codepoint: int) -> bool:
+    return any(lo <= codepoint <= hi for lo, hi in _IDEOGRAPH_RANGES)
+
+
+def _collation_char(codepoint: int) -> str:
+    char = chr(codepoint)
+    if not _is_ideograph(codepoint):
+        return char
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return _OTHER_HANZI + char
+    high, low = encoded[0], encoded[1]
+    index = (high - 0xB0) * 94 + (low - 0xA1)
+    if 0xB0 <= high <= 0xD7:
+        return chr(_LEVEL1_BASE + index)
+    if 0xD8 <= high <= 0xF7:
+        return chr(_LEVEL2_BASE + index - 40 * 94)
+    return _OTHER_HANZI + char
+
+
+class _CollationTable(dict):
+    """str.translate table filled on first sight of each character."""
+
+    def __missing__(self, codepoint: int) -> str:
+        value = self[codepoint] = _collation_char(codepoint)
+        return value
+
+
+_TABLE = _CollationTable()
+
+
+def chinese_key(text: Any) -> str:
+    """Sort key ordering Chinese text by pinyin (GB2312 order), then by code point."""
+    if not isinstance(text, str):
+        return ''
+    return text.casefold().translate(_TABLE)
+
+
+def english_key(text: Any) -> str:
+    """Case-insensitive sort key for English text."""
+    if not isinstance(text, str):
+        return ''
+    return text.casefold()
+
+
+# 可按排序键排序的文本字段：排序名 -> (字段, 排序键函数)
+COLLATIONS = {
+    'alphabetical': ('chinese', chinese_key),
+    'english': ('english', english_key),
+}
+
+
+def sort_permutation(keys: Sequence[str]) -> array:
+    """Positions 0..len(keys)-1 ordered by key (ties keep position order)."""
+    return array('I', sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def rank_of(permutation: Sequence[int]) -> array:
+    """Inverse of a permutation: rank[position] = index of position in the sorted order."""
+    rank = array('I', bytes(array('I').itemsize * len(permutation)))
+    for index, position in enumerate(permutation):
+        rank[position] = index
+    return rank
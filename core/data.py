@@ -2,9 +2,27 @@
 import json
 import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import compress
+
+from core import schemes
+from core.collation import COLLATIONS, rank_of, sort_permutation
+from core.sampling import AliasTable, SAMPLING_MODES, low_memory_weight, mistake_weight, recency_weight
+from core.entries import table_positions
+from core.schemes import SCHEMES
+from core.search_index import SearchIndex, is_chinese_query
+from core.stats import STATS_FIELDS
+from core.suggest import PrefixIndex
 # 不再需要从这里导入 Lexicon，因为它会被传递进来
 # from core.lexicon import Lexicon
 
+# 缓存的加权抽样表数量 (词库 x 方案 x 抽样方式)
+SAMPLER_CACHE_SIZE = 8
+SEARCH_CACHE_SIZE = 128  # 缓存的查询结果数量 (按查询词，最近最少使用的先淘汰)
+
 class Data:
     # 修改 __init__ 以接收 Lexicon 实例
     def __init__(self, lexicon_instance):
@@ -20,9 +38,93 @@ class Data:
         # --- 也不再需要 self.lexicon_dir, self.default_lexicon, self.lexicon_path ---
         # 因为这些路径管理现在由共享的 lexicon_instance 负责
 
+        # --- n-gram 倒排索引和输入联想的前缀索引 ---
+        # 都需要读取全部词条文本，所以在第一次使用时才建立 (二进制词典按需解码)，
+        # 之后随条目修改增量更新
+        self._search_index = None
+        self._prefix_index = None
+        # 查询词 -> 结果位置 (LRU)；词条文字变化 (Lexicon.text_version) 时整体失效，计数更新不影响
+        self._search_cache = OrderedDict()
+        self._search_cache_version = None
+        self.search_cache_hits = 0
+        self.search_cache_misses = 0
+        self.search_cache_evictions = 0
+        # 拼写纠错索引 (core.spelling)，由加载线程从文件加载或建立；建好之前纠错不返回结果
+        self._spelling_index = None
+        self._changed_while_spelling = None  # 后台加载拼写索引期间被修改的位置 (install_spelling_index 时补上)
+        self._spelling_lock = threading.Lock()
+        # 后台建立索引期间被修改的条目位置，安装索引时补上 (None 表示没有在建立)
+        self._changed_while_indexing = None
+        # (词库名, 方案, 抽样方式) -> (成员集合, 成员集合版本, AliasTable)，随统计变化增量更新
+        self._samplers = OrderedDict()
+        # 文本排序 (见 core.collation.COLLATIONS) -> (每个 defaults 位置的排序键, 全表排序后的位置, 名次)；
+        # 第一次按该方式排序时建立，条目文字改变时更新
+        self._sort_orders = {}
+        if self.lexicon:
+            self.lexicon.add_entry_listener(self._on_entry_changed)
+
+    def _defaults(self):
+        """defaults 列表；要为全部词条建索引，所以先一次性解码二进制词典"""
+        defaults = self.lexicon.defaults if self.lexicon else []
+        if getattr(defaults, 'is_lazy', False):
+            defaults.materialise()
+        return defaults
+
+    @property
+    def search_index(self):
+        """The n-gram inverted index over defaults, built on first use."""
+        if self._search_index is None:
+            self._search_index = SearchIndex(self._defaults())
+        return self._search_index
+
+    @property
+    def prefix_index(self):
+        """The prefix index used for suggestions (ranked by inquiry), built on first use."""
+        if self._prefix_index is None:
+            self._prefix_index = self._build_prefix_index(self._defaults())
+        return self._prefix_index
+
+    @staticmethod
+    def _build_prefix_index(defaults):
+        inquiry_column = defaults.column('inquiry') if hasattr(defaults, 'column') else None
+        return PrefixIndex(
+            defaults, rank=inquiry_column.__getitem__ if inquiry_column is not None else None
+        )
+
+    def prepare_indexes(self):
+        """
+        Builds the search and prefix indexes without installing them, so it
+        can run in a worker thread at startup. Text is decoded entry by entry
+        as it is read (the table is not materialised from the worker), and
+        entries changed meanwhile are recorded for install_indexes to replay.
+
+        Returns:
+            (SearchIndex, PrefixIndex), to be passed to install_indexes on the main thread.
+        """
+        self._changed_while_indexing = []
+        defaults = self.lexicon.defaults if self.lexicon else []
+        return SearchIndex(defaults), self._build_prefix_index(defaults)
+
+    def install_indexes(self, indexes):
+        """Installs indexes from prepare_indexes and applies the entry changes made while they were built."""
+        search_index, prefix_index = indexes
+        changed, self._changed_while_indexing = self._changed_while_indexing or [], None
+        defaults = self.lexicon.defaults
+        # 期间已经按需建立的索引一直在增量更新，不替换
+        if self._search_index is None:
+            self._search_index = search_index
+            for position in dict.fromkeys(changed):
+                search_index.update_entry(position, defaults[position])
+        if self._prefix_index is None:
+            self._prefix_index = prefix_index
+            for position in dict.fromkeys(changed):
+                prefix_index.update_entry(position)
+
     def search_word(self, word):
         """
         Searches for a word in the defaults list managed by the shared Lexicon instance.
+        Uses the n-gram inverted index (core.search_index), so a query only touches
+        the candidate entries that share its grams instead of scanning defaults.
         """
         # --- 直接使用共享实例的 defaults 列表 ---
         if not self.lexicon or not self.lexicon.defaults:
@@ -30,69 +132,228 @@ class Data:
              return None # 或者返回空列表 []
 
         lexicon_data = self.lexicon.defaults # 获取共享的列表
-        results = []
-
-        # 判断输入的是中文还是英文
-        is_chinese = bool(re.search(r'[\u4e00-\u9fff]', word)) # 使用 bool() 更明确
-
-        # 转换为小写 (仅对英文有效)
-        word_lower = word.lower()
-
-        for entry in lexicon_data:
-            # 确保条目是字典并且包含所需键
-            if isinstance(entry, dict) and 'chinese' in entry and 'english' in entry:
-                chinese = entry['chinese']
-                # 对比前也确保英文是字符串
-                english_val = entry.get('english', '')
-                english_lower = english_val.lower() if isinstance(english_val, str) else ''
-
-                match = False
-                if is_chinese:
-                    # 中文使用 'in' 进行部分匹配
-                    if isinstance(chinese, str) and word in chinese:
-                        match = True
-                else:
-                    # 英文也使用 'in' 进行部分匹配（如果需要部分匹配）
-                    # 如果只需要从头开始匹配，用 startswith: if english_lower.startswith(word_lower):
-                    if word_lower in english_lower:
-                        match = True
-
-                if match:
-                    results.append(entry)
-
-        # 如果需要区分精确和部分匹配（基于完整字符串相等）
-        exact_matches = []
-        partial_matches = []
-        for entry in results:
-             # 确保比较前类型正确
-             entry_chinese = entry.get('chinese', '')
-             entry_english_val = entry.get('english', '')
-             entry_english_lower = entry_english_val.lower() if isinstance(entry_english_val, str) else ''
-
-             is_exact = False
-             if is_chinese:
-                 if entry_chinese == word:
-                     is_exact = True
-             else:
-                 if entry_english_lower == word_lower:
-                     is_exact = True
-
-             if is_exact:
-                 exact_matches.append(entry)
-             else:
-                 partial_matches.append(entry)
 
+        # 精确匹配在前，部分匹配在后，各自保持 defaults 中的顺序
+        positions = self._cached_search(word)
 
         # 总是返回列表，即使是空列表
-        return exact_matches + partial_matches
+        return [lexicon_data[p] for p in positions]
+
+    def _cached_search(self, word):
+        """Positions matching `word`, from the result cache when the dictionary text has not changed since."""
+        positions = self._cache_lookup(word)
+        if positions is not None:
+            return positions
+        version = self._search_cache_version
+        positions = tuple(self.search_index.search(word))
+        self._cache_store(word, positions, version)
+        return positions
+
+    def _cache_key(self, word):
+        return word if is_chinese_query(word) else word.lower()  # 英文查询不区分大小写
+
+    def _cache_lookup(self, word):
+        version = getattr(self.lexicon, 'text_version', None)
+        if version != self._search_cache_version:
+            self._search_cache.clear()
+            self._search_cache_version = version
+        key = self._cache_key(word)
+        positions = self._search_cache.get(key)
+        if positions is not None:
+            self._search_cache.move_to_end(key)
+            self.search_cache_hits += 1
+            return positions
+        self.search_cache_misses += 1
+        return None
+
+    def _cache_store(self, word, positions, version):
+        if version != getattr(self.lexicon, 'text_version', None):
+            return  # 查询期间词条文字变了，结果可能已过期
+        self._search_cache[self._cache_key(word)] = positions
+        if len(self._search_cache) > SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+            self.search_cache_evictions += 1
+
+    def iter_search_positions(self, word):
+        """
+        Yields the positions matching `word` in search_word's order as they
+        are found (see SearchIndex.iter_search), so a caller can show the
+        first page before the rest is known. A search that runs to the end is
+        added to the result cache; cached queries replay from it.
+        """
+        if not self.lexicon or not self.lexicon.defaults:
+            return
+        cached = self._cache_lookup(word)
+        if cached is not None:
+            yield from cached
+            return
+        version = self._search_cache_version
+        found = []
+        for position in self.search_index.iter_search(word):
+            found.append(position)
+            yield position
+        self._cache_store(word, tuple(found), version)
+
+    def search_cache_info(self):
+        """Hit/miss/eviction counts and occupancy of the search result cache (for tuning SEARCH_CACHE_SIZE)."""
+        return {
+            'hits': self.search_cache_hits,
+            'misses': self.search_cache_misses,
+            'evictions': self.search_cache_evictions,
+            'size': len(self._search_cache),
+            'max_size': SEARCH_CACHE_SIZE,
+        }
+
+    @property
+    def spelling_index(self):
+        """The spelling-correction index, or None until load_spelling_index has finished (never blocks)."""
+        return self._spelling_index
+
+    def prepare_spelling_index(self):
+        """
+        Loads the spelling-correction index from disk (building and saving it
+        if the dictionary changed) without installing it. Building takes
+        seconds, so the app runs this in its loading thread; headwords changed
+        meanwhile are recorded for install_spelling_index to replay.
+
+        Returns:
+            The SpellingIndex (or None), to be passed to install_spelling_index on the main thread.
+        """
+        with self._spelling_lock:
+            self._changed_while_spelling = []
+            return self.lexicon.load_spelling_index() if self.lexicon else None
+
+    def install_spelling_index(self, index):
+        """Installs an index from prepare_spelling_index and indexes the headwords changed while it was loaded."""
+        changed, self._changed_while_spelling = self._changed_while_spelling or [], None
+        if index is None or self._spelling_index is not None:
+            return
+        defaults = self.lexicon.defaults
+        for position in dict.fromkeys(changed):
+            entry = defaults[position]
+            if isinstance(entry, Mapping):
+                index.add(position, entry.get('english'))
+        self._spelling_index = index
+
+    def load_spelling_index(self):
+        """Prepares and installs the spelling index in one call (blocks; for scripts and tools)."""
+        if self._spelling_index is None:
+            self.install_spelling_index(self.prepare_spelling_index())
+        return self._spelling_index
+
+    def did_you_mean(self, word, k=5):
+        """
+        Entries whose English headword is within a small edit distance of
+        `word` (typos, swapped letters), closest first, then by 'inquiry'.
+        Used when search_word finds nothing; empty until the index is installed.
+        """
+        if not self.lexicon or not self.lexicon.defaults or is_chinese_query(word):
+            return []
+        index = self.spelling_index
+        if index is None:
+            return []
+        defaults = self.lexicon.defaults
+        inquiry_column = defaults.column('inquiry') if hasattr(defaults, 'column') else None
+        words = defaults.text['english'] if hasattr(defaults, 'text') else [e.get('english') for e in defaults]
+        matches = index.lookup(word, words, k, rank=inquiry_column.__getitem__ if inquiry_column is not None else None)
+        return [defaults[position] for position, _ in matches]
+
+    def suggest(self, prefix, k=8):
+        """
+        Returns up to k entries whose English or Chinese headword starts with
+        `prefix`, ranked by their 'inquiry' counter. Used for live suggestions.
+        """
+        if not self.lexicon or not self.lexicon.defaults:
+            return []
+        lexicon_data = self.lexicon.defaults
+        return [lexicon_data[p] for p in self.prefix_index.suggest(prefix, k)]
+
+    def _on_entry_changed(self, position):
+        """Lexicon 条目被替换后增量更新搜索索引和前缀索引"""
+        if 0 <= position < len(self.lexicon.defaults):
+            if self._changed_while_indexing is not None:
+                self._changed_while_indexing.append(position)
+            if self._changed_while_spelling is not None:
+                self._changed_while_spelling.append(position)
+            # 尚未建立的索引以后会直接读到新内容
+            if self._search_index is not None:
+                self._search_index.update_entry(position, self.lexicon.defaults[position])
+            if self._prefix_index is not None:
+                self._prefix_index.update_entry(position)
+            self._update_sampler_weights(position)
+            self._update_sort_keys(position)
+            if self._spelling_index is not None:
+                entry = self.lexicon.defaults[position]
+                if isinstance(entry, Mapping):
+                    self._spelling_index.add(position, entry.get('english'))
+
+    # --- 加权抽样 ---
+    def _weight_function(self, mode):
+        """position -> sampling weight for a mode, read straight from the counter columns."""
+        defaults = self.lexicon.defaults
+        if mode == 'recency':
+            reviews = getattr(self.lexicon, 'reviews', None)
+            now = int(time.time())
+            if reviews is None:
+                return lambda position: recency_weight(0, now)
+            return lambda position: recency_weight(reviews.last_reviewed(position), now)
+        memory, mistake = defaults.column('memory'), defaults.column('mistake')
+        weight = mistake_weight if mode == 'mistake' else low_memory_weight
+        return lambda position: weight(memory[position], mistake[position])
+
+    def weighted_sampler(self, lexicon_name, scheme, mode):
+        """
+        The alias table for drawing a lexicon's entries of one scheme, weighted
+        by `mode` ('mistake', 'low_memory' or 'recency'). Built on first use and
+        cached; counter changes update its weights incrementally, and it is
+        rebuilt when the lexicon's membership changed.
+
+        Returns:
+            (AliasTable, members) or (None, None) if the mode or scheme is unknown.
+        """
+        if mode not in SAMPLING_MODES or mode == 'uniform' or not (scheme in SCHEMES or scheme == 'all'):
+            print(f"警告: 未知的抽样方式 '{mode}' 或方案 '{scheme}'")
+            return None, None
+        members = self.lexicon.get_lexicon_members(lexicon_name)
+        key = (lexicon_name, scheme, mode)
+        cached = self._samplers.get(key)
+        if cached is not None and cached[0] is members and cached[1] == members.version:
+            self._samplers.move_to_end(key)
+            return cached[2], members
+        positions = self.filter_positions(self.lexicon.defaults, self.lexicon.get_lexicon_positions(lexicon_name), scheme)
+        weight = self._weight_function(mode)
+        table = AliasTable(positions, [weight(p) for p in positions])
+        self._samplers[key] = (members, members.version, table)
+        self._samplers.move_to_end(key)
+        while len(self._samplers) > SAMPLER_CACHE_SIZE:
+            self._samplers.popitem(last=False)
+        return table, members
+
+    def _update_sampler_weights(self, position):
+        """Re-weights one position in every cached sampler (0 once it left the scheme)."""
+        if not self._samplers:
+            return
+        codes = self.lexicon.defaults.schemes
+        weights = {}
+        for (_, scheme, mode), (members, _, table) in self._samplers.items():
+            if position not in members:
+                continue
+            if not schemes.matches(codes, position, scheme):
+                table.update(position, 0)
+                continue
+            if mode not in weights:
+                weights[mode] = self._weight_function(mode)(position)
+            table.update(position, weights[mode])
 
 
     @staticmethod
     def get_sort_options():
         # 这个方法是静态的，不需要修改
         return [
-            ('按字母正序', 'alphabetical', False), # 修改：正序 reverse=False
-            ('按字母逆序', 'alphabetical', True), # 修改：逆序 reverse=True
+            ('按拼音正序', 'alphabetical', False), # 修改：正序 reverse=False
+            ('按拼音逆序', 'alphabetical', True), # 修改：逆序 reverse=True
+            ('按英文正序', 'english', False),
+            ('按英文逆序', 'english', True),
             ('按查询次数正序', 'inquiry', False),
             ('按查询次数逆序', 'inquiry', True),
             ('按记忆次数正序', 'memory', False),
@@ -103,12 +364,15 @@ class Data:
 
     @staticmethod
     def sort_entries(entries, sort_by, reverse=False):
-        # 这个方法是静态的，逻辑看起来没问题，但注意 alphabetical 可能需要区分中英文
-        # 目前按中文排序
-        if sort_by == 'alphabetical':
-            # 考虑对英文排序: key=lambda x: x.get('english', '').lower()
-            # 或者提供中/英文排序选项
-            return sorted(entries, key=lambda x: x.get('chinese', ''), reverse=reverse)
+        # 条目是同一 EntryTable 的视图时，直接按列排序，不逐条调用 .get
+        table, positions = table_positions(entries)
+        if table is not None and (sort_by in STATS_FIELDS or sort_by in COLLATIONS):
+            return table.views(Data.sort_positions(table, positions, sort_by, reverse))
+
+        # alphabetical 按中文拼音，english 按英文 (不区分大小写)
+        if sort_by in COLLATIONS:
+            field, key_function = COLLATIONS[sort_by]
+            return sorted(entries, key=lambda x: key_function(x.get(field, '')), reverse=reverse)
         elif sort_by == 'inquiry':
             # 使用 .get(key, default) 来处理可能不存在的键
             return sorted(entries, key=lambda x: x.get('inquiry', 0), reverse=reverse)
@@ -119,8 +383,100 @@ class Data:
         # 如果 sort_by 无效，返回原列表
         return entries
 
+    def sort_lexicon_entries(self, lexicon_name, sort_by, reverse=False):
+        """
+        A lexicon's entries in sort order, as a lazy sequence (views are only
+        created for the rows that are read, e.g. the visible page).
+
+        Text orders filter a cached defaults-wide permutation by membership,
+        which is O(n) with no key calls; counter orders, which change with
+        every recite answer, sort the member positions by column.
+        """
+        defaults = self.lexicon.defaults if self.lexicon else None
+        if not defaults or not hasattr(defaults, 'lazy_views'):
+            return Data.sort_entries(self.lexicon.get_lexicon_entries(lexicon_name), sort_by, reverse)
+        positions = self.lexicon.get_lexicon_positions(lexicon_name)
+        if sort_by in COLLATIONS:
+            _, permutation, rank = self._sort_order(sort_by)
+            if len(positions) * 8 < len(permutation):
+                # 小词库：按名次排序成员，比扫描整个排列更快
+                ordered = sorted(positions, key=rank.__getitem__, reverse=reverse)
+            else:
+                mask = bytearray(len(permutation))
+                for position in positions:
+                    mask[position] = 1
+                order = permutation[::-1] if reverse else permutation
+                ordered = list(compress(order, map(mask.__getitem__, order)))
+        else:
+            ordered = Data.sort_positions(defaults, positions, sort_by, reverse)
+        return defaults.lazy_views(ordered)
+
+    def _sort_order(self, sort_by):
+        """(keys, permutation, rank) of a text order over all defaults, built on first use."""
+        defaults = self.lexicon.defaults
+        cached = self._sort_orders.get(sort_by)
+        if cached is not None and len(cached[0]) == len(defaults):
+            if cached[1] is not None:
+                return cached
+            keys = cached[0]  # 排序键仍然有效，只是有条目改了文字，重新排序
+        else:
+            field, key_function = COLLATIONS[sort_by]
+            column = defaults.text[field]
+            keys = [key_function(column[p]) for p in range(len(defaults))]
+        permutation = sort_permutation(keys)
+        cached = self._sort_orders[sort_by] = (keys, permutation, rank_of(permutation))
+        return cached
+
+    def _update_sort_keys(self, position):
+        """条目被替换后更新它的排序键；键变了的排序下次使用时重新排列"""
+        for sort_by, (keys, permutation, rank) in list(self._sort_orders.items()):
+            if position >= len(keys):
+                continue
+            field, key_function = COLLATIONS[sort_by]
+            key = key_function(self.lexicon.defaults.text[field][position])
+            if key != keys[position]:
+                keys[position] = key
+                self._sort_orders[sort_by] = (keys, None, None)
+
+    @staticmethod
+    def sort_positions(table, positions, sort_by, reverse=False):
+        """
+        Sorts defaults positions by a counter column (or by a collation key
+        of 'chinese' / 'english' for 'alphabetical' / 'english') of an
+        EntryTable. The key is a C-level column lookup, so no entry dict or
+        view is touched.
+        """
+        if sort_by in COLLATIONS:
+            # 只读取要排序的位置 (二进制词典只解码这些条目)
+            field, key_function = COLLATIONS[sort_by]
+            column = table.text[field]
+            keys = [key_function(column[p]) for p in positions]
+            order = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+            return [positions[i] for i in order]
+        elif sort_by in STATS_FIELDS:
+            key = table.column(sort_by).__getitem__
+        else:
+            return list(positions)
+        return sorted(positions, key=key, reverse=reverse)
+
+    @staticmethod
+    def filter_positions(table, positions, scheme):
+        """
+        Filters defaults positions by scheme using the precomputed scheme-code
+        column of an EntryTable (same conditions as filter_entries).
+        """
+        if scheme in SCHEMES or scheme == 'all':
+            return schemes.select(table.schemes, positions, scheme)
+        print(f"警告: 未知的筛选方案 '{scheme}'")
+        return []
+
     @staticmethod
     def filter_entries(entries, scheme):
+        # 条目是同一 EntryTable 的视图时，直接读 memory/mistake 列，不经过字典
+        table, positions = table_positions(entries)
+        if table is not None and scheme in SCHEMES:
+            return table.views(Data.filter_positions(table, positions, scheme))
+
         # 这个方法是静态的，逻辑看起来没问题，注意 .get 的使用
         if scheme == 'new':
             return [
@@ -166,7 +522,7 @@ class Data:
         Increments the inquiry count for an entry and updates it using the shared Lexicon.
         """
         # 确保 entry 是字典
-        if not isinstance(entry, dict):
+        if not isinstance(entry, Mapping):
             print("错误: inquiry_entry 接收到的 entry 不是字典。")
             return
 
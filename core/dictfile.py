@@ -0,0 +1,363 @@
+# core/dictfile.py
+import argparse
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.entries import MISSING, TEXT_FIELDS
+from core.stats import COUNTER_TYPECODE, STATS_FIELDS, StatsStore, clamp_counter
+
+# 文件布局 (全部小端):
+#   header   magic, version, text field count, entry count
+#   counters 每个 STATS_FIELDS 一列 uint32，按 defaults 位置排列
+#   flags    每个条目 1 字节 (_FLAG_RAW / _FLAG_EXTRAS)，补齐到 4 字节
+#   offsets  count + 1 个 uint32，记录在 data 区中的起止偏移
+#   data     每个条目一条记录：TEXT_FIELDS 依次为 tag(u8) [+ len(u32) + UTF-8]，
+#            其余字段 (extras) 以 JSON 对象追加在记录末尾；非对象条目整条存 JSON
+_HEADER = struct.Struct('<4sHHI')
+_U32 = struct.Struct('<I')
+_MAGIC = b'WPDF'
+_VERSION = 1
+
+_TAG_MISSING, _TAG_STR, _TAG_JSON = 0, 1, 2
+_FLAG_RAW, _FLAG_EXTRAS = 1, 2
+
+DICTFILE_SUFFIX = '.bin'
+
+
+def _encode_entry(entry: Any) -> Tuple[int, bytes]:
+    """(flags, record bytes) of one JSON entry."""
+    if not isinstance(entry, Mapping):
+        return _FLAG_RAW, json.dumps(entry, ensure_ascii=False).encode('utf-8')
+    record = bytearray()
+    for field in TEXT_FIELDS:
+        if field not in entry:
+            record.append(_TAG_MISSING)
+            continue
+        value = entry[field]
+        if isinstance(value, str):
+            tag, data = _TAG_STR, value.encode('utf-8')
+        else:
+            tag, data = _TAG_JSON, json.dumps(value, ensure_ascii=False).encode('utf-8')
+        record.append(tag)
+        record += _U32.pack(len(data))
+        record += data
+    extras = {k: v for k, v in entry.items() if k not in TEXT_FIELDS and k not in STATS_FIELDS}
+    if not extras:
+        return 0, bytes(record)
+    record += json.dumps(extras, ensure_ascii=False).encode('utf-8')
+    return _FLAG_EXTRAS, bytes(record)
+
+
+def _column_bytes(values: Iterable[int]) -> bytes:
+    column = array(COUNTER_TYPECODE, values)
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column.tobytes()
+
+
+def write_dictfile(path: str, entries: List[Any]) -> None:
+    """
+    Writes `entries` (as loaded from 'defaults.json') to a binary dictionary
+    file. The file is written to a temporary path and renamed into place.
+
+    Raises:
+        OSError: If the file cannot be written.
+    """
+    count = len(entries)
+    flags = bytearray(count)
+    offsets = array(COUNTER_TYPECODE, [0])
+    records = []
+    size = 0
+    for position, entry in enumerate(entries):
+        flags[position], record = _encode_entry(entry)
+        records.append(record)
+        size += len(record)
+        if size > 0xFFFFFFFF:
+            raise OSError(f"Dictionary data exceeds 4 GiB at entry {position}.")
+        offsets.append(size)
+    flags += bytes(-count % 4)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(TEXT_FIELDS), count))
+        for field in STATS_FIELDS:
+            f.write(_column_bytes(
+                clamp_counter(entry.get(field, 0)) if isinstance(entry, Mapping) else 0
+                for entry in entries
+            ))
+        f.write(flags)
+        f.write(offsets.tobytes())
+        f.write(b''.join(records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class DictFile:
+    """
+    Read-only, memory-mapped binary dictionary (see the layout above).
+
+    Opening the file only reads its header; the counter columns are read in
+    one slice and each entry's text is decoded only when it is asked for, so
+    startup cost does not grow with the size of the dictionary.
+    """
+
+    def __init__(self, path: str, file_obj, mapping: mmap.mmap, count: int):
+        self.path = path
+        self.count = count
+        self._file = file_obj
+        self._map = mapping
+        self._counters_at = _HEADER.size
+        self._flags_at = self._counters_at + len(STATS_FIELDS) * 4 * count
+        self._offsets_at = self._flags_at + count + (-count % 4)
+        self._data_at = self._offsets_at + 4 * (count + 1)
+
+    @classmethod
+    def open(cls, path: str) -> Optional['DictFile']:
+        """
+        Opens a binary dictionary file.
+
+        Returns:
+            The DictFile, or None if the file is missing or malformed.
+        """
+        if not os.path.exists(path):
+            return None
+        f = None
+        try:
+            f = open(path, 'rb')
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                f.close()
+                return None
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            print(f"Error opening dictionary file {path}: {e}")
+            if f is not None:
+                f.close()
+            return None
+
+        magic, version, field_count, count = _HEADER.unpack_from(mapping, 0)
+        dictfile = cls(path, f, mapping, count)
+        valid = (
+            magic == _MAGIC and version == _VERSION and field_count == len(TEXT_FIELDS)
+            and size >= dictfile._data_at
+            and size == dictfile._data_at + dictfile._offset(count)
+        )
+        if not valid:
+            print(f"Warning: '{path}' is not a valid dictionary file.")
+            dictfile.close()
+            return None
+        return dictfile
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, index: int) -> int:
+        return _U32.unpack_from(self._map, self._offsets_at + 4 * index)[0]
+
+    def _record(self, position: int) -> Tuple[int, int]:
+        """(start, end) of an entry's record in the mapping."""
+        if not 0 <= position < self.count:
+            raise IndexError(f"Dictionary position {position} out of range (count={self.count}).")
+        return self._data_at + self._offset(position), self._data_at + self._offset(position + 1)
+
+    def read_counters(self) -> Dict[str, array]:
+        """Counter columns (one array per STATS_FIELDS entry) stored with the entries."""
+        columns = {}
+        width = 4 * self.count
+        for i, field in enumerate(STATS_FIELDS):
+            column = array(COUNTER_TYPECODE)
+            start = self._counters_at + i * width
+            column.frombytes(self._map[start:start + width])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            columns[field] = column
+        return columns
+
+    def _flagged(self, flag: int) -> Iterator[int]:
+        flags = self._map[self._flags_at:self._flags_at + self.count]
+        for match in re.finditer(rb'[^\x00]', flags):
+            if flags[match.start()] & flag:
+                yield match.start()
+
+    def read_text(self, position: int) -> Tuple[Any, ...]:
+        """Values of TEXT_FIELDS for an entry, MISSING where the entry has no such field."""
+        offset, end = self._record(position)
+        mapping = self._map
+        values = []
+        for _ in TEXT_FIELDS:
+            if offset >= end:
+                values.append(MISSING)
+                continue
+            tag = mapping[offset]
+            offset += 1
+            if tag == _TAG_MISSING:
+                values.append(MISSING)
+                continue
+            length = _U32.unpack_from(mapping, offset)[0]
+            offset += 4
+            data = mapping[offset:offset + length].decode('utf-8')
+            offset += length
+            values.append(data if tag == _TAG_STR else json.loads(data))
+        return tuple(values)
+
+    def _extras(self, position: int) -> Dict[str, Any]:
+        offset, end = self._record(position)
+        mapping = self._map
+        for _ in TEXT_FIELDS:
+            tag = mapping[offset]
+            offset += 1
+            if tag != _TAG_MISSING:
+                offset += 4 + _U32.unpack_from(mapping, offset)[0]
+        return json.loads(mapping[offset:end].decode('utf-8'))
+
+    def iter_raw(self) -> Iterator[Tuple[int, Any]]:
+        """(position, value) of entries that are not JSON objects."""
+        for position in self._flagged(_FLAG_RAW):
+            start, end = self._record(position)
+            yield position, json.loads(self._map[start:end].decode('utf-8'))
+
+    def iter_extras(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(position, fields) of entries carrying fields besides TEXT_FIELDS and counters."""
+        for position in self._flagged(_FLAG_EXTRAS):
+            yield position, self._extras(position)
+
+    def to_entries(self) -> List[Any]:
+        """Decodes every entry into a plain JSON-serialisable list, counters included."""
+        entries: List[Any] = []
+        raw = dict(self.iter_raw())
+        extras = dict(self.iter_extras())
+        counters = self.read_counters()
+        for position in range(self.count):
+            if position in raw:
+                entries.append(raw[position])
+                continue
+            entry = {
+                field: value
+                for field, value in zip(TEXT_FIELDS, self.read_text(position))
+                if value is not MISSING
+            }
+            entry.update(extras.get(position, ()))
+            for field in STATS_FIELDS:
+                entry[field] = counters[field][position]
+            entries.append(entry)
+        return entries
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _merge_live_counters(json_path: str, entries: List[Any]) -> None:
+    """
+    Copies the counters of the stats file next to `json_path` ('defaults.stats'
+    for 'defaults.json') into `entries`. The app keeps the live counters in that
+    file and only writes them back to the JSON on compaction, so packing the JSON
+    alone would lose every update since. The stats file is used only if it is in
+    sync with this JSON file (same source fingerprint and entry count).
+    """
+    stats_path = os.path.splitext(json_path)[0] + '.stats'
+    store = StatsStore.open(stats_path, expected_count=len(entries))
+    if store is None:
+        return
+    try:
+        st = os.stat(json_path)
+        if tuple(store.source) != (st.st_size, st.st_mtime_ns):
+            print(f"Info: {stats_path} does not belong to {json_path}; packing the counters in the JSON.")
+            return
+        columns = store.read_columns()
+    except OSError as e:
+        print(f"Error reading {stats_path}: {e}")
+        return
+    finally:
+        store.close()
+    for position, entry in enumerate(entries):
+        if isinstance(entry, dict):
+            for field in STATS_FIELDS:
+                entry[field] = columns[field][position]
+    print(f"Info: Merged the counters from {stats_path}.")
+
+
+def json_to_dictfile(json_path: str, dict_path: str) -> bool:
+    """
+    Converts a 'defaults.json' style list of entries into a binary dictionary,
+    taking the counters from the accompanying stats file when it is in sync.
+
+    Returns:
+        True if successful, False otherwise.
+    """
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (IOError, OSError, json.JSONDecodeError) as e:
+        print(f"Error reading {json_path}: {e}")
+        return False
+    if not isinstance(entries, list):
+        print(f"Error: {json_path} does not contain a JSON list.")
+        return False
+    _merge_live_counters(json_path, entries)
+    try:
+        write_dictfile(dict_path, entries)
+        return True
+    except (IOError, OSError) as e:
+        print(f"Error writing {dict_path}: {e}")
+        return False
+
+
+def dictfile_to_json(dict_path: str, json_path: str) -> bool:
+    """
+    Converts a binary dictionary back into a 'defaults.json' style JSON list.
+
+    Returns:
+        True if successful, False otherwise.
+    """
+    dictfile = DictFile.open(dict_path)
+    if dictfile is None:
+        print(f"Error: Could not open dictionary file {dict_path}.")
+        return False
+    try:
+        entries = dictfile.to_entries()
+    finally:
+        dictfile.close()
+    try:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        return True
+    except (IOError, OSError) as e:
+        print(f"Error writing {json_path}: {e}")
+        return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m core.dictfile {pack,unpack} SOURCE TARGET"""
+    parser = argparse.ArgumentParser(
+        prog='python -m core.dictfile',
+        description='Convert defaults.json to the binary dictionary format and back.',
+    )
+    parser.add_argument('command', choices=('pack', 'unpack'),
+                        help='pack: JSON -> binary, unpack: binary -> JSON')
+    parser.add_argument('source')
+    parser.add_argument('target')
+    args = parser.parse_args(argv)
+    if args.command == 'pack':
+        ok = json_to_dictfile(args.source, args.target)
+    else:
+        ok = dictfile_to_json(args.source, args.target)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,394 @@
+# core/entries.py
+from array import array
+from collections.abc import Mapping, MutableMapping, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.schemes import build_scheme_column, scheme_code
+from core.stats import STATS_FIELDS, COUNTER_TYPECODE, clamp_counter
+
+# 以列表列存储的文本字段；其他字段放入每个条目的 extras 字典
+TEXT_FIELDS = ('chinese', 'english', 'note')
+
+
+class _Missing:
+    """Marks a text field that the original JSON entry did not have."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<missing>'
+
+
+MISSING = _Missing()
+
+# 尚未从二进制词典解码的文本值
+_PENDING = object()
+
+
+class LazyTextColumn:
+    """
+    List-like text column of an EntryTable opened from a binary dictionary.
+
+    Values start out pending and are decoded record by record through
+    `load(position)` the first time any text field of that entry is read.
+    """
+    __slots__ = ('_values', '_load')
+
+    def __init__(self, size: int, load):
+        self._values: List[Any] = [_PENDING] * size
+        self._load = load
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, position: int) -> Any:
+        value = self._values[position]
+        if value is _PENDING:
+            self._load(position % len(self._values))
+            value = self._values[position]
+        return value
+
+    def __setitem__(self, position: int, value: Any) -> None:
+        self._values[position] = value
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(len(self._values)):
+            yield self[position]
+
+    def __contains__(self, value: object) -> bool:
+        return any(v is value or v == value for v in self)
+
+    def append(self, value: Any) -> None:
+        self._values.append(value)
+
+    def is_pending(self, position: int) -> bool:
+        return self._values[position] is _PENDING
+
+
+class EntryView(MutableMapping):
+    """
+    Thin dict-like view of one defaults position in an EntryTable.
+
+    Text fields are read from the table's text columns and the counters from
+    its array columns, so reading or bumping `entry['memory']` never touches a
+    per-entry dict. Two views are equal when they point at the same position.
+    """
+    __slots__ = ('_table', 'position')
+
+    def __init__(self, table: 'EntryTable', position: int):
+        self._table = table
+        self.position = position
+
+    @property
+    def table(self) -> 'EntryTable':
+        return self._table
+
+    def __getitem__(self, key: str) -> Any:
+        table = self._table
+        column = table.counters.get(key)
+        if column is not None:
+            return column[self.position]
+        text = table.text.get(key)
+        if text is not None:
+            value = text[self.position]
+            if value is MISSING:
+                raise KeyError(key)
+            return value
+        extras = table.extras.get(self.position)
+        if extras is None:
+            raise KeyError(key)
+        return extras[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._table.set_field(self.position, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        table = self._table
+        if key in table.counters:
+            table.set_field(self.position, key, 0)
+        elif key in table.text and table.text[key][self.position] is not MISSING:
+            table.text[key][self.position] = MISSING
+        else:
+            extras = table.extras.get(self.position)
+            if extras is None or key not in extras:
+                raise KeyError(key)
+            del extras[key]
+
+    def __contains__(self, key: object) -> bool:
+        table = self._table
+        if key in table.counters:
+            return True
+        text = table.text.get(key)
+        if text is not None:
+            return text[self.position] is not MISSING
+        extras = table.extras.get(self.position)
+        return extras is not None and key in extras
+
+    def __iter__(self) -> Iterator[str]:
+        table = self._table
+        for field in TEXT_FIELDS:
+            if table.text[field][self.position] is not MISSING:
+                yield field
+        yield from table.extras.get(self.position, ())
+        yield from STATS_FIELDS
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, EntryView):
+            return self._table is other._table and self.position == other.position
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash((id(self._table), self.position))
+
+    def __repr__(self) -> str:
+        return f'EntryView({self.position}, {dict(self)!r})'
+
+    def copy(self) -> Dict[str, Any]:
+        """Detached plain-dict snapshot of the entry."""
+        return dict(self)
+
+
+class EntryTable(Sequence):
+    """
+    Columnar storage for the 'defaults.json' entries.
+
+    Counters (STATS_FIELDS) live in contiguous `array` columns indexed by
+    defaults position, text fields in one list per field, and a derived
+    column of scheme codes (see core.schemes) is kept in step with the
+    memory/mistake counters. Indexing the table returns a lightweight
+    EntryView built on demand instead of a stored dict.
+    Entries that are not JSON objects are kept as-is and returned unchanged.
+    """
+
+    def __init__(self, size: int = 0):
+        self.counters: Dict[str, array] = {
+            field: array(COUNTER_TYPECODE, bytes(array(COUNTER_TYPECODE).itemsize * size))
+            for field in STATS_FIELDS
+        }
+        self.text: Dict[str, List[Any]] = {field: [MISSING] * size for field in TEXT_FIELDS}
+        self.schemes = array('B', bytes(size))      # 全为 0 计数对应 'new'
+        self.extras: Dict[int, Dict[str, Any]] = {}   # position -> non-column fields
+        self.raw: Dict[int, Any] = {}                 # position -> non-dict JSON value
+        self._size = size
+        self._source = None                           # DictFile backing lazy text columns
+        # Called as listener(position, old_code, new_code) when an entry changes scheme
+        self.scheme_listener: Optional[Callable[[int, int, int], Any]] = None
+
+    @classmethod
+    def from_entries(cls, entries: List[Any]) -> 'EntryTable':
+        """Builds a table from a list of JSON entries (as loaded from defaults.json)."""
+        table = cls(len(entries))
+        for position, entry in enumerate(entries):
+            table._assign(position, entry)
+        return table
+
+    @classmethod
+    def from_dictfile(cls, source) -> 'EntryTable':
+        """
+        Builds a table over an open core.dictfile.DictFile. Counters are read in
+        one go; text fields are decoded per entry on first access, and only the
+        rare non-object entries and extra fields are read up front.
+        """
+        table = cls(source.count)
+        table.load_counters(source.read_counters())
+        table.text = {field: LazyTextColumn(source.count, table._decode_record) for field in TEXT_FIELDS}
+        table._source = source
+        for position, value in source.iter_raw():
+            table.raw[position] = value
+            for column in table.text.values():
+                column[position] = MISSING
+        for position, extras in source.iter_extras():
+            table.extras[position] = extras
+        return table
+
+    def _decode_record(self, position: int) -> None:
+        """Fills the still-pending text values of one entry from the dictionary file."""
+        values = self._source.read_text(position)
+        for field, value in zip(TEXT_FIELDS, values):
+            column = self.text[field]
+            if column.is_pending(position):
+                column[position] = value
+
+    @property
+    def is_lazy(self) -> bool:
+        """True while text fields are still being decoded on demand."""
+        return self._source is not None
+
+    def materialise(self) -> None:
+        """
+        Decodes every pending entry and detaches the table from its dictionary
+        file, turning the text columns into plain lists. Needed before the file
+        is closed or replaced.
+        """
+        if self._source is None:
+            return
+        columns = [self.text[field] for field in TEXT_FIELDS]
+        for position in range(self._size):
+            if any(column.is_pending(position) for column in columns):
+                self._decode_record(position)
+        self.text = {field: list(column._values) for field, column in zip(TEXT_FIELDS, columns)}
+        self._source = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._size))]
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError('EntryTable index out of range')
+        if position in self.raw:
+            return self.raw[position]
+        return EntryView(self, position)
+
+    def __setitem__(self, position: int, entry: Any) -> None:
+        """Replaces the entry at `position` with the fields of `entry`."""
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError('EntryTable assignment index out of range')
+        if isinstance(entry, EntryView) and entry.table is self and entry.position == position:
+            return # 写回的是同一位置的视图，数据已经就位
+        if isinstance(entry, EntryView):
+            entry = dict(entry)
+        self._assign(position, entry)
+
+    def __iter__(self) -> Iterator[Any]:
+        for position in range(self._size):
+            yield self[position]
+
+    def append(self, entry: Any) -> None:
+        for column in self.counters.values():
+            column.append(0)
+        for column in self.text.values():
+            column.append(MISSING)
+        self.schemes.append(0)
+        self._size += 1
+        self._assign(self._size - 1, entry)
+
+    def _assign(self, position: int, entry: Any) -> None:
+        self.extras.pop(position, None)
+        self.raw.pop(position, None)
+        for column in self.text.values():
+            column[position] = MISSING
+        if not isinstance(entry, Mapping):
+            self.raw[position] = entry
+            for column in self.counters.values():
+                column[position] = 0
+            self.schemes[position] = 0
+            return
+        for field, column in self.counters.items():
+            column[position] = clamp_counter(entry.get(field, 0))
+        self._update_scheme(position)
+        for key, value in entry.items():
+            if key not in self.counters:
+                self.set_field(position, key, value)
+
+    def set_field(self, position: int, key: str, value: Any) -> None:
+        column = self.counters.get(key)
+        if column is not None:
+            column[position] = clamp_counter(value)
+            if key != 'inquiry':
+                self._update_scheme(position)
+            return
+        text = self.text.get(key)
+        if text is not None:
+            text[position] = value
+        else:
+            self.extras.setdefault(position, {})[key] = value
+
+    def views(self, positions: Iterable[int]) -> List['EntryView']:
+        """Entry views for a list of (non-raw) positions, in the given order."""
+        return [EntryView(self, p) for p in positions]
+
+    def lazy_views(self, positions: Sequence[int]) -> 'LazyEntryList':
+        """Like views(), but each entry is only looked up when it is read."""
+        return LazyEntryList(self, positions)
+
+    def column(self, field: str) -> array:
+        """The contiguous counter column for one of STATS_FIELDS."""
+        return self.counters[field]
+
+    def load_counters(self, columns: Dict[str, array]) -> None:
+        """
+        Overwrites the counter columns wholesale (e.g. from the stats file).
+        The column arrays are filled in place, so references obtained through
+        `column()` stay valid.
+        """
+        for field in STATS_FIELDS:
+            column = columns[field]
+            if len(column) != self._size:
+                raise ValueError(f"Counter column '{field}' has {len(column)} values, expected {self._size}.")
+            self.counters[field][:] = column
+        self.schemes[:] = build_scheme_column(self.counters['memory'], self.counters['mistake'])
+
+    def _update_scheme(self, position: int) -> None:
+        code = scheme_code(self.counters['memory'][position], self.counters['mistake'][position])
+        old_code = self.schemes[position]
+        if code != old_code:
+            self.schemes[position] = code
+            if self.scheme_listener is not None:
+                self.scheme_listener(position, old_code, code)
+
+    def to_list(self) -> List[Any]:
+        """Plain JSON-serialisable list of dicts, counters included."""
+        return [self.raw[p] if p in self.raw else dict(EntryView(self, p)) for p in range(self._size)]
+
+
+class LazyEntryList(Sequence):
+    """
+    Read-only list of the entries at `positions` of an EntryTable. Items are
+    looked up on access, so paging through a sorted lexicon only creates
+    views for the page that is shown.
+    """
+
+    def __init__(self, table: EntryTable, positions: Sequence[int]):
+        self.table = table
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            table = self.table
+            return [table[p] for p in self.positions[index]]
+        return self.table[self.positions[index]]
+
+    def __repr__(self) -> str:
+        return f'LazyEntryList({len(self.positions)} entries)'
+
+
+def table_positions(entries: List[Any]) -> Tuple[Optional[EntryTable], Optional[List[int]]]:
+    """
+    (table, positions) when `entries` are all views into one EntryTable, so
+    callers can work on its counter columns directly; (None, None) otherwise.
+    """
+    if not entries:
+        return None, None
+    if isinstance(entries, LazyEntryList):
+        raw = entries.table.raw
+        if raw and any(p in raw for p in entries.positions):
+            return None, None
+        return entries.table, list(entries.positions)
+    first = entries[0]
+    if type(first) is not EntryView:
+        return None, None
+    table = first.table
+    try:
+        positions = [e.position for e in entries if e._table is table]
+    except AttributeError:
+        return None, None
+    if len(positions) != len(entries):
+        return None, None
+    return table, positions
@@ -1,21 +1,64 @@
 # core/lexicon.py
 import json
 import os
-from typing import List, Dict, Optional, Any, Tuple # Added typing for clarity
+from typing import List, Dict, Optional, Any, Tuple, Callable, Iterable # Added typing for clarity
+
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from core import schemes
+from core.bitset import PositionSet
+from core.catalog import Catalog, CATALOG_NAME
+from core.dictfile import DictFile, DICTFILE_SUFFIX, write_dictfile
+from core.entries import EntryTable, EntryView, MISSING
+from core.scheduler import ReviewScheduler, ReviewStore
+from core.spelling import SpellingIndex
+from core.stats import StatsStore, STATS_FIELDS
+from core.writer import WriteScheduler
+
+# How many custom lexicons keep their membership cached (least recently used are dropped)
+MEMBER_CACHE_SIZE = 64
+
+
+def _file_fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, size) of a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def _without_stats(entry: Any) -> Any:
+    """Returns an entry's fields minus its counters, for change detection."""
+    if not isinstance(entry, Mapping):
+        return entry
+    return {k: v for k, v in entry.items() if k not in STATS_FIELDS}
+
 
 class Lexicon:
     """
     Manages lexicon files, including a main 'defaults.json' list
     and other lexicon files containing indices into 'defaults.json'.
+
+    If a binary 'defaults.bin' (see core.dictfile) is present and at least as
+    new as 'defaults.json', it is used instead: it is memory-mapped and its
+    entries are decoded only when they are touched.
     """
-    def __init__(self, lexicon_dir: str = 'lexicons'):
+    def __init__(self, lexicon_dir: str = 'lexicons', writer: Optional[WriteScheduler] = None):
         """
         Initializes the Lexicon manager.
 
         Args:
             lexicon_dir: The directory where lexicon JSON files are stored.
                          Defaults to 'lexicons'.
+            writer: Write scheduler for lexicon files. Defaults to one that
+                    writes atomically right away; the app passes one that
+                    coalesces edits on a Clock delay.
         """
+        # Lexicon files are written atomically through this scheduler
+        self.writer = writer if writer is not None else WriteScheduler()
+
         # Ensure the base directory for lexicons exists
         # Get the directory containing this lexicon.py file
         base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,12 +74,40 @@ class Lexicon:
                 # Handle error appropriately, maybe raise exception or exit
                 self.lexicon_dir = None # Indicate failure
 
-        # Load the main defaults list, handling potential errors
-        self.defaults: List[Dict[str, Any]] = self._load_lexicon_internal('defaults')
+        # Load the main defaults list, handling potential errors.
+        # Entries are stored column-wise; indexing yields lightweight dict-like views.
+        self._dictfile: Optional[DictFile] = None
+        self.defaults: EntryTable = self._load_defaults()
         if not self.defaults:
              print("Warning: 'defaults.json' could not be loaded or is empty.")
              # Consider loading a backup or handling this state in the app
 
+        # (chinese, english) -> position in self.defaults, for O(1) identity lookups.
+        # Built on first use, since it has to read the text of every entry.
+        self._entry_index: Optional[Dict[Tuple[Any, Any], int]] = None
+
+        # Custom lexicon name -> ((mtime_ns, size) of its file, members as a bitset
+        # over defaults positions). A bounded LRU, written through on every save
+        # and revalidated against the file on every access.
+        self._members: 'OrderedDict[str, Tuple[Tuple[int, int], PositionSet]]' = OrderedDict()
+
+        # Callbacks notified with a defaults position whenever that entry is replaced
+        self._entry_listeners: List[Callable[[int], Any]] = []
+
+        # Bumped whenever the text of a defaults entry changes (not for counter-only
+        # updates), so caches of search results can tell when they are stale
+        self.text_version = 0
+
+        # Counters live in a memory-mapped side file so a tap only rewrites one record
+        self.stats: Optional[StatsStore] = self._open_stats_store()
+
+        # Spaced-repetition schedule (due time, interval, ease per position) and its due queue
+        self.reviews: Optional[ReviewScheduler] = self._open_review_scheduler()
+
+        # Manifest of custom lexicons (entry and scheme counts) for the list screens
+        self.catalog: Optional[Catalog] = self._load_catalog()
+        self.defaults.scheme_listener = self._on_scheme_change
+
 
     def _get_lexicon_path(self, name: str) -> str:
         """Constructs the full path for a given lexicon name."""
@@ -45,20 +116,211 @@ class Lexicon:
              raise FileNotFoundError("Lexicon directory path is not set or invalid.")
         return os.path.join(self.lexicon_dir, f'{name}.json')
 
+    def _get_stats_path(self) -> str:
+        """Path of the binary counters file that accompanies 'defaults.json'."""
+        if not self.lexicon_dir:
+             raise FileNotFoundError("Lexicon directory path is not set or invalid.")
+        return os.path.join(self.lexicon_dir, 'defaults.stats')
+
+    def _get_spelling_path(self) -> str:
+        """Path of the saved spelling-correction index that accompanies 'defaults.json'."""
+        if not self.lexicon_dir:
+             raise FileNotFoundError("Lexicon directory path is not set or invalid.")
+        return os.path.join(self.lexicon_dir, 'defaults.spell')
+
+    def _get_dictfile_path(self) -> str:
+        """Path of the binary dictionary that can replace 'defaults.json'."""
+        if not self.lexicon_dir:
+             raise FileNotFoundError("Lexicon directory path is not set or invalid.")
+        return os.path.join(self.lexicon_dir, 'defaults' + DICTFILE_SUFFIX)
+
+    def _defaults_source_path(self) -> str:
+        """Path of the file the defaults were loaded from (binary or JSON)."""
+        if self.defaults_format == 'bin':
+            return self._get_dictfile_path()
+        return self._get_lexicon_path('defaults')
+
+    def _load_defaults(self) -> EntryTable:
+        """
+        Loads the defaults entries, preferring 'defaults.bin' unless
+        'defaults.json' was modified after it.
+        """
+        self.defaults_format = 'json'
+        if not self.lexicon_dir:
+            return EntryTable()
+        bin_path = self._get_dictfile_path()
+        json_path = self._get_lexicon_path('defaults')
+        if os.path.exists(bin_path):
+            if os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(bin_path):
+                print(f"Info: 'defaults.json' is newer than {bin_path}; loading the JSON file.")
+            else:
+                dictfile = DictFile.open(bin_path)
+                if dictfile is not None:
+                    self._dictfile = dictfile
+                    self.defaults_format = 'bin'
+                    return EntryTable.from_dictfile(dictfile)
+        return EntryTable.from_entries(self._load_lexicon_internal('defaults'))
+
+    def _defaults_fingerprint(self, path: Optional[str] = None) -> Tuple[int, int]:
+        """(size, mtime_ns) of the defaults file (or `path`), used to detect external edits."""
+        try:
+            st = os.stat(path if path is not None else self._defaults_source_path())
+            return st.st_size, st.st_mtime_ns
+        except OSError:
+            return 0, 0
+
+    def _open_stats_store(self) -> Optional[StatsStore]:
+        """
+        Opens the counters file for `self.defaults` and loads its records into
+        the table's counter columns. If the file is missing, belongs to a different
+        defaults list, or 'defaults.json' was replaced since it was written,
+        the counters are migrated from the JSON entries into a fresh file. A
+        store still in sync with 'defaults.json' is kept when 'defaults.bin'
+        takes over, since its counters are the live ones.
+
+        Returns:
+            The open StatsStore, or None if no store could be used (updates then
+            fall back to rewriting 'defaults.json').
+        """
+        if not self.defaults or not self.lexicon_dir:
+            return None
+        path = self._get_stats_path()
+        fingerprint = self._defaults_fingerprint()
+
+        store = StatsStore.open(path, expected_count=len(self.defaults))
+        if store is not None and tuple(store.source) == fingerprint:
+            self.defaults.load_counters(store.read_columns())
+            return store
+        if (store is not None and self.defaults_format == 'bin'
+                and tuple(store.source) == self._defaults_fingerprint(self._get_lexicon_path('defaults'))):
+            # 只是换成了 defaults.bin：计数文件仍与原来的 defaults.json 同步，比 .bin 里打包的计数新
+            self.defaults.load_counters(store.read_columns())
+            store.set_source(*fingerprint)
+            store.flush()
+            print(f"Info: Kept the entry statistics in {path} for {self._get_dictfile_path()}.")
+            return store
+        if store is not None:
+            store.close()
+
+        # 首次加载或 defaults.json 被替换：从 JSON 中的计数迁移
+        try:
+            rows = zip(*(self.defaults.column(field) for field in STATS_FIELDS))
+            store = StatsStore.create(path, rows, len(self.defaults), source=fingerprint)
+            print(f"Info: Migrated entry statistics to {path}.")
+            return store
+        except (IOError, OSError) as e:
+            print(f"Error creating stats file {path}: {e}. Falling back to JSON saves.")
+            return None
+
+    def _get_review_path(self) -> str:
+        """Path of the binary review schedule that accompanies 'defaults.json'."""
+        if not self.lexicon_dir:
+             raise FileNotFoundError("Lexicon directory path is not set or invalid.")
+        return os.path.join(self.lexicon_dir, 'defaults.review')
+
+    def _open_review_scheduler(self) -> Optional[ReviewScheduler]:
+        """
+        Opens the review schedule for `self.defaults`. A missing schedule, or one
+        written for a defaults list of a different length (positions no longer
+        line up), is replaced by an empty one.
+
+        Returns:
+            The scheduler, or None if no schedule file could be used.
+        """
+        if not self.defaults or not self.lexicon_dir:
+            return None
+        path = self._get_review_path()
+        store = ReviewStore.open(path, expected_count=len(self.defaults))
+        if store is None:
+            if os.path.exists(path):
+                print(f"Warning: Review schedule {path} does not match the defaults list. Starting a new one.")
+            try:
+                store = ReviewStore.create(path, len(self.defaults))
+            except (IOError, OSError) as e:
+                print(f"Error creating review file {path}: {e}. Reviews will not be scheduled.")
+                return None
+        return ReviewScheduler(store)
+
+    def load_spelling_index(self) -> Optional[SpellingIndex]:
+        """
+        Loads the spelling-correction index of the English headwords, or builds
+        and saves it if the saved one is missing or was built from a different
+        defaults file (a few seconds for ~100k headwords, so only on the first
+        launch after the dictionary changes).
+
+        Returns:
+            The index, or None if defaults is not loaded.
+        """
+        if not self.defaults or not self.lexicon_dir:
+            return None
+        path = self._get_spelling_path()
+        fingerprint = self._defaults_fingerprint()
+        index = SpellingIndex.load(path, len(self.defaults), fingerprint)
+        if index is None:
+            index = SpellingIndex.build(self.defaults.text['english'])
+            index.save(path, len(self.defaults), fingerprint)
+        return index
+
+    def record_review(self, entry: Any, update_type: str) -> Optional[int]:
+        """
+        Re-queues an entry in the review schedule after a recite result.
+
+        Args:
+            entry: The entry (dict or view) or its defaults position.
+            update_type: 'pass', 'view' or 'mistake'.
+
+        Returns:
+            The entry's new due time (unix seconds), or None if it was not scheduled.
+        """
+        if self.reviews is None:
+            return None
+        entry_index = self._resolve_entry_index(entry)
+        if entry_index is None:
+            print("Error: Cannot schedule review, entry not found in defaults.")
+            return None
+        return self.reviews.record(entry_index, update_type)
+
+    def get_due_positions(self, lexicon_name: str, limit: Optional[int] = None) -> List[int]:
+        """Defaults positions of a lexicon's entries that are due for review, most overdue first."""
+        if self.reviews is None:
+            return []
+        return self.reviews.due_positions(limit=limit, members=self.get_lexicon_members(lexicon_name))
+
+    def count_due(self, lexicon_name: str) -> int:
+        """Number of a lexicon's entries due for review now."""
+        if self.reviews is None:
+            return 0
+        return self.reviews.count_due(members=self.get_lexicon_members(lexicon_name))
+
+    def _write_entry_stats(self, entry_index: int, entry: Dict[str, Any]) -> bool:
+        """Writes the counters of one entry into its fixed-width stats record."""
+        try:
+            self.stats.write(entry_index, (entry.get(field, 0) for field in STATS_FIELDS))
+            return True
+        except (IndexError, ValueError) as e:
+            print(f"Error writing stats for entry {entry_index}: {e}")
+            return False
+
     def _load_lexicon_internal(self, name: str) -> List[Any]:
         """Internal helper to load any lexicon file (defaults or index list)."""
         path = self._get_lexicon_path(name)
+        # A deferred write must reach the disk before the file is read back
+        self.writer.flush(path)
         if os.path.exists(path):
             try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                    data = json.loads(raw.decode('utf-8'))
+                    # Lets the writer skip saving this content back unchanged
+                    if name != 'defaults':
+                        self.writer.remember(path, raw)
                     # Basic validation: ensure it's a list
                     if isinstance(data, list):
                         return data
                     else:
                         print(f"Warning: Lexicon file '{name}.json' does not contain a JSON list. Returning empty.")
                         return []
-            except json.JSONDecodeError:
+            except (json.JSONDecodeError, UnicodeDecodeError):
                 print(f"Error: Could not decode JSON from {path}. Returning empty.")
                 return []
             except IOError as e:
@@ -76,7 +338,8 @@ class Lexicon:
     def load_lexicon(self, name: str) -> List[int]:
         """
         Loads a lexicon file containing a list of integer indices.
-        Ensures returned values are integers.
+        Ensures returned values are integers. This always reads the file;
+        use get_lexicon_members for the cached membership.
         """
         data = self._load_lexicon_internal(name)
         # Ensure all items in the list are valid integers
@@ -91,22 +354,96 @@ class Lexicon:
     def save_lexicon(self, name: str, data: List[Any]) -> bool:
         """
         Saves data (either list of entries or list of indices) to a lexicon file.
+        Existing index lexicons are written through the write scheduler, so
+        saves in quick succession are coalesced; new files and 'defaults' are
+        written right away. Every write is atomic.
 
         Returns:
             True if successful, False otherwise.
         """
+        in_sync = self._catalog_in_sync()
+        existed = os.path.exists(self._get_lexicon_path(name))
+        snapshot = list(data)
+        indices_only = name != 'defaults' and all(isinstance(i, int) for i in snapshot)
+        if not self._write_lexicon_file(name, lambda: snapshot, defer=indices_only):
+            return False
+        if name != 'defaults':
+            if indices_only:
+                # Write-through: the saved indices become the cached membership
+                members = self._members_from_indices(name, snapshot)
+                self._cache_members(name, members)
+                self._catalog_set_count(name, len(members))
+            elif self.catalog is not None:
+                self._refresh_catalog_entry(name)
+            if not existed:
+                # A new file changed the directory listing
+                self._catalog_changed(in_sync)
+        return True
+
+    def _write_lexicon_file(self, name: str, serialize: Callable[[], Any], defer: bool = False) -> bool:
+        """
+        Writes `serialize()` as JSON to a lexicon file through `self.writer`.
+        The member cache entry is dropped first. With `defer`, an existing file
+        is only marked dirty and written at the scheduler's next flush, with
+        `serialize` called then.
+        """
         path = self._get_lexicon_path(name)
-        try:
-            with open(path, 'w', encoding='utf-8') as f:
+        self._members.pop(name, None)
+
+        def commit() -> bool:
+            in_sync = self._catalog_in_sync()
+            try:
                 # Use indent for readability, ensure_ascii=False for unicode
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                payload = json.dumps(serialize(), ensure_ascii=False, indent=2).encode('utf-8')
+            except (TypeError, ValueError) as e:
+                print(f"An unexpected error occurred saving '{name}.json': {e}")
+                return False
+            if not self.writer.write(path, payload):
+                return False
+            if name != 'defaults':
+                self._on_lexicon_written(name, in_sync)
             return True
-        except IOError as e:
-            print(f"Error writing to file {path}: {e}")
-            return False
-        except Exception as e:
-             print(f"An unexpected error occurred saving '{name}.json': {e}")
-             return False
+
+        if defer and os.path.exists(path):
+            self.writer.defer(path, commit)
+            return True
+        self.writer.cancel(path)
+        return commit()
+
+    def _on_lexicon_written(self, name: str, catalog_was_in_sync: bool) -> None:
+        """
+        Re-stamps the member cache and catalog entry of a lexicon with the
+        fingerprint of the file just written (the atomic rename also changes
+        the directory mtime, which would otherwise force a rescan).
+        """
+        fingerprint = _file_fingerprint(self._get_lexicon_path(name))
+        if fingerprint is None:
+            return
+        cached = self._members.get(name)
+        if cached is not None:
+            self._members[name] = (fingerprint, cached[1])
+        if self.catalog is not None:
+            info = self.catalog.get(name)
+            if info is not None:
+                info['mtime_ns'], info['size'] = fingerprint
+                self.catalog.dirty = True
+            if catalog_was_in_sync:
+                self.catalog.dir_mtime_ns = self._dir_mtime_ns()
+
+    def flush(self) -> bool:
+        """
+        Writes every pending lexicon change and the catalog now. Called when the
+        app is paused or stopped.
+
+        Returns:
+            True if everything was written, False otherwise.
+        """
+        ok = self.writer.flush()
+        if self.stats is not None:
+            self.stats.flush()
+        if self.reviews is not None:
+            self.reviews.flush()
+        return self._save_catalog() and ok
 
     def create_lexicon(self, name: str) -> bool:
         """Creates a new, empty lexicon file (list of indices)."""
@@ -127,8 +464,20 @@ class Lexicon:
         old_path = self._get_lexicon_path(old_name)
         new_path = self._get_lexicon_path(new_name)
         if os.path.exists(old_path) and not os.path.exists(new_path):
+            # Pending changes go to the old name first; the rename carries them over
+            self.writer.flush(old_path)
+            in_sync = self._catalog_in_sync()
             try:
                 os.rename(old_path, new_path)
+                self.writer.rename(old_path, new_path)
+                # A rename keeps mtime and size, so the cached entry stays valid
+                cached = self._members.pop(old_name, None)
+                self._members.pop(new_name, None)
+                if cached is not None:
+                    self._members[new_name] = cached
+                if self.catalog is not None:
+                    self.catalog.rename(old_name, new_name)
+                    self._catalog_changed(in_sync)
                 return True
             except OSError as e:
                 print(f"Error renaming lexicon {old_name} to {new_name}: {e}")
@@ -148,8 +497,15 @@ class Lexicon:
             return False
         path = self._get_lexicon_path(name)
         if os.path.exists(path):
+            self.writer.cancel(path)
+            in_sync = self._catalog_in_sync()
             try:
                 os.remove(path)
+                self.writer.forget(path)
+                self._members.pop(name, None)
+                if self.catalog is not None:
+                    self.catalog.remove(name)
+                    self._catalog_changed(in_sync)
                 return True
             except OSError as e:
                 print(f"Error deleting lexicon {name}: {e}")
@@ -158,26 +514,240 @@ class Lexicon:
             print(f"Info: Lexicon '{name}' not found, cannot delete.")
             return False # It wasn't there to delete
 
+    def _scan_lexicon_names(self) -> List[str]:
+        """Lists the lexicon files on disk, excluding 'defaults'."""
+        files = os.listdir(self.lexicon_dir)
+        return [
+            os.path.splitext(f)[0]
+            for f in files
+            if f.endswith('.json') and os.path.splitext(f)[0] != 'defaults'
+        ]
+
     def get_lexicon_list(self) -> List[str]:
-        """Gets list of lexicon names, excluding 'defaults'."""
+        """
+        Gets list of lexicon names, excluding 'defaults'. The names come from the
+        catalog; the directory is only rescanned when its mtime has changed.
+        """
         if not self.lexicon_dir or not os.path.isdir(self.lexicon_dir):
             return []
+        if self.catalog is None:
+            try:
+                return sorted(self._scan_lexicon_names())
+            except OSError as e:
+                print(f"Error reading lexicon directory {self.lexicon_dir}: {e}")
+                return []
         try:
-            files = os.listdir(self.lexicon_dir)
-            lexicon_names = [
-                os.path.splitext(f)[0]
-                for f in files
-                if f.endswith('.json') and os.path.splitext(f)[0] != 'defaults'
-            ]
-            return sorted(lexicon_names)
+            self._sync_catalog()
         except OSError as e:
             print(f"Error reading lexicon directory {self.lexicon_dir}: {e}")
             return []
+        return self.catalog.names()
+
+    # --- Catalog (catalog.manifest) ---
+
+    def _load_catalog(self) -> Optional[Catalog]:
+        """
+        Loads the lexicon catalog. Its scheme counts are dropped unless they
+        were saved for this defaults list at the current stats generation.
+        """
+        if not self.lexicon_dir:
+            return None
+        catalog = Catalog.load(os.path.join(self.lexicon_dir, CATALOG_NAME))
+        generation = self.stats.generation if self.stats is not None else None
+        if (catalog.defaults_count != len(self.defaults) or generation is None
+                or catalog.stats_generation != generation):
+            catalog.clear_schemes()
+            catalog.defaults_count = len(self.defaults)
+            catalog.dirty = True
+        return catalog
+
+    def _save_catalog(self) -> bool:
+        """
+        Writes the catalog, stamped with the stats generation its scheme counts
+        match. Pending lexicon writes are flushed first, so the catalog never
+        describes content that is not on disk yet.
+        """
+        if self.catalog is None:
+            return True
+        self.writer.flush()
+        generation = self.stats.generation if self.stats is not None else None
+        if self.catalog.stats_generation != generation:
+            self.catalog.stats_generation = generation
+            self.catalog.dirty = True
+        return self.catalog.save()
+
+    def _dir_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.lexicon_dir).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def _catalog_in_sync(self) -> bool:
+        """True if the catalog's file list matches the directory as of now."""
+        return self.catalog is not None and self.catalog.dir_mtime_ns == self._dir_mtime_ns()
+
+    def _catalog_changed(self, was_in_sync: bool) -> None:
+        """
+        Called after this class changed a lexicon file. If the catalog matched the
+        directory before the change, it still does (it was updated alongside), so
+        the new directory mtime is recorded; otherwise the next listing rescans.
+        """
+        if self.catalog is None:
+            return
+        if was_in_sync:
+            self.catalog.dir_mtime_ns = self._dir_mtime_ns()
+            self.catalog.dirty = True
+        self._save_catalog()
+
+    def _sync_catalog(self) -> None:
+        """Reconciles the catalog with the directory if files were added, renamed or removed."""
+        dir_mtime = self._dir_mtime_ns()
+        if dir_mtime is not None and self.catalog.dir_mtime_ns == dir_mtime:
+            return
+        names = self._scan_lexicon_names()
+        for name in names:
+            self._refresh_catalog_entry(name)
+        for name in set(self.catalog.lexicons) - set(names):
+            self.catalog.remove(name)
+        self.catalog.dir_mtime_ns = dir_mtime
+        self.catalog.dirty = True
+        self._save_catalog()
+
+    def _refresh_catalog_entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the catalog entry of a lexicon, re-reading the lexicon if its
+        file's (mtime_ns, size) no longer matches. None if the file is missing.
+        """
+        fingerprint = _file_fingerprint(self._get_lexicon_path(name))
+        if fingerprint is None:
+            self.catalog.remove(name)
+            return None
+        info = self.catalog.get(name)
+        if info is not None and (info['mtime_ns'], info['size']) == fingerprint:
+            return info
+        members = self.get_lexicon_members(name)
+        self.catalog.set_lexicon(name, fingerprint, len(members))
+        return self.catalog.get(name)
+
+    def _catalog_set_count(self, name: str, count: int) -> None:
+        """Records a lexicon's new entry count (its file may still be pending a write)."""
+        if self.catalog is None:
+            return
+        fingerprint = _file_fingerprint(self._get_lexicon_path(name))
+        if fingerprint is not None:
+            self.catalog.set_lexicon(name, fingerprint, count)
+
+    def get_lexicon_size(self, lexicon_name: str) -> int:
+        """Number of entries in a lexicon, from the catalog when it is current."""
+        if self.catalog is None:
+            return len(self.get_lexicon_members(lexicon_name))
+        info = self._refresh_catalog_entry(lexicon_name)
+        return info['count'] if info is not None else 0
+
+    def get_scheme_counts(self, lexicon_name: str) -> Dict[str, int]:
+        """
+        Per-scheme entry counts of a lexicon ('new', 'consolidate', 'review',
+        'other' and 'all'). Served from the catalog; computed from the scheme
+        column and recorded there when missing.
+        """
+        info = self._refresh_catalog_entry(lexicon_name) if self.catalog is not None else None
+        if info is not None and 'schemes' in info:
+            return dict(info['schemes'])
+        positions = self.get_lexicon_positions(lexicon_name)
+        counts = schemes.count_schemes(self.defaults.schemes, positions)
+        if info is not None:
+            self.catalog.set_schemes(lexicon_name, counts)
+        return counts
+
+    def _known_membership(self, lexicon_name: str, position: int) -> Optional[bool]:
+        """Membership of a position from the member cache only; None if not cached."""
+        cached = self._members.get(lexicon_name)
+        if cached is None:
+            return None
+        return position in cached[1]
+
+    def _on_scheme_change(self, position: int, old_code: int, new_code: int) -> None:
+        """Keeps the catalog's scheme counts current as counters change."""
+        if self.catalog is not None:
+            self.catalog.move_entry(
+                position, schemes.SCHEMES[old_code], schemes.SCHEMES[new_code], self._known_membership
+            )
+
+    @staticmethod
+    def _entry_key(entry: Any) -> Optional[Tuple[Any, Any]]:
+        """Identity key of an entry: its ('chinese', 'english') pair."""
+        if not isinstance(entry, Mapping):
+            return None
+        chinese = entry.get('chinese')
+        english = entry.get('english')
+        if chinese is None or english is None:
+            return None
+        return chinese, english
+
+    def _build_entry_index(self) -> None:
+        """(Re)builds the (chinese, english) -> position index over `self.defaults`."""
+        index: Dict[Tuple[Any, Any], int] = {}
+        # Read the text columns directly instead of materialising a view per entry
+        columns = zip(self.defaults.text['chinese'], self.defaults.text['english'])
+        for i, key in enumerate(columns):
+            chinese, english = key
+            if chinese is None or chinese is MISSING or english is None or english is MISSING:
+                continue
+            # Keep the first position for duplicates, like the old linear scan did
+            if key not in index:
+                index[key] = i
+        self._entry_index = index
+
+    def _reindex_entry(self, position: int, old_key: Optional[Tuple[Any, Any]]) -> None:
+        """
+        Keeps the hash index current after the entry at `position` was replaced.
+
+        Args:
+            position: Position in `self.defaults` that changed.
+            old_key: Identity key the position had before the change.
+        """
+        if self._entry_index is None:
+            return # Not built yet; it will read the current text when it is
+        new_key = self._entry_key(self.defaults[position])
+        if old_key == new_key:
+            return
+        if old_key is not None and self._entry_index.get(old_key) == position:
+            del self._entry_index[old_key]
+            # A later duplicate of the old key becomes the first match
+            for i in range(position + 1, len(self.defaults)):
+                if self._entry_key(self.defaults[i]) == old_key:
+                    self._entry_index[old_key] = i
+                    break
+        if new_key is not None:
+            current = self._entry_index.get(new_key)
+            if current is None or position < current:
+                self._entry_index[new_key] = position
+
+    def add_entry_listener(self, callback: Callable[[int], Any]) -> None:
+        """
+        Registers a callback invoked with the position of every defaults entry
+        updated through `update_entry_in_defaults`, so derived indexes (e.g. the
+        search index in Data) can update incrementally.
+        """
+        if callback not in self._entry_listeners:
+            self._entry_listeners.append(callback)
+
+    def remove_entry_listener(self, callback: Callable[[int], Any]) -> None:
+        if callback in self._entry_listeners:
+            self._entry_listeners.remove(callback)
+
+    def _notify_entry_changed(self, position: int) -> None:
+        for callback in list(self._entry_listeners):
+            try:
+                callback(position)
+            except Exception as e:
+                print(f"Error in entry listener for position {position}: {e}")
 
     def find_entry_index(self, entry_to_find: Dict[str, Any]) -> Optional[int]:
         """
         Finds the index (position) of a given entry dictionary within the
-        `self.defaults` list. Matching is based on 'chinese' and 'english' fields.
+        `self.defaults` list. Matching is based on 'chinese' and 'english' fields
+        and resolved through the hash index in O(1).
 
         Returns:
             The integer index if found, otherwise None.
@@ -187,20 +757,33 @@ class Lexicon:
              # print("Warning: Trying to find entry index but defaults list is empty.")
              return None
 
-        # Extract keys for matching to handle potential missing keys in entry_to_find
-        target_chinese = entry_to_find.get('chinese')
-        target_english = entry_to_find.get('english')
+        # A view into self.defaults already knows its position
+        if isinstance(entry_to_find, EntryView) and entry_to_find.table is self.defaults:
+            return entry_to_find.position
 
-        if target_chinese is None or target_english is None:
+        # Extract keys for matching to handle potential missing keys in entry_to_find
+        key = self._entry_key(entry_to_find)
+        if key is None:
             print("Warning: Entry to find is missing 'chinese' or 'english' field.")
             return None
 
-        for i, default_entry in enumerate(self.defaults):
-            # Check if the default entry also has the keys before comparing
-            if default_entry.get('chinese') == target_chinese and \
-               default_entry.get('english') == target_english:
-                return i  # Return the index (position in the list)
-        return None # Not found
+        return self._lookup_entry_key(key)
+
+    def _lookup_entry_key(self, key: Tuple[Any, Any]) -> Optional[int]:
+        """
+        Resolves an identity key through the hash index. If the indexed entry no
+        longer carries that key (a dict in defaults had its 'chinese'/'english'
+        edited in place), the index is rebuilt once and the lookup retried.
+        """
+        if self._entry_index is None:
+            self._build_entry_index()
+        position = self._entry_index.get(key)
+        if position is None:
+            return None
+        if position < len(self.defaults) and self._entry_key(self.defaults[position]) == key:
+            return position
+        self._build_entry_index()
+        return self._entry_index.get(key)
 
     def add_entry_to_lexicon(self, entry: Dict[str, Any], lexicon_name: str) -> Tuple[bool, str]:
         """
@@ -213,30 +796,50 @@ class Lexicon:
         Returns:
             A tuple (success_boolean, message_string).
         """
-        entry_index = self.find_entry_index(entry)
+        return self.add_entries_to_lexicon([entry], lexicon_name)[0]
 
-        if entry_index is None:
-            return False, '条目未在主词库(defaults)中找到' # Entry must exist in defaults
+    def add_entries_to_lexicon(self, entries: Iterable[Any], lexicon_name: str) -> List[Tuple[bool, str]]:
+        """
+        Adds many entries to a lexicon with one load and one save.
 
-        # Load the target lexicon's list of indices
-        lexicon_indices = self.load_lexicon(lexicon_name)
+        Args:
+            entries: Entry dictionaries (or views) and/or defaults positions.
+            lexicon_name: The name of the target lexicon (without .json).
 
-        if entry_index in lexicon_indices:
-            return False, '该条目已存在于此词库中'
-        else:
-            lexicon_indices.append(entry_index)
-            success = self.save_lexicon(lexicon_name, lexicon_indices)
-            if success:
-                return True, '添加成功'
+        Returns:
+            One (success_boolean, message_string) tuple per item of `entries`, in order.
+        """
+        # The target lexicon's members, as a bitset (O(1) membership test)
+        members = self.get_lexicon_members(lexicon_name)
+        results: List[Tuple[bool, str]] = []
+        for item in entries:
+            entry_index = self._resolve_entry_index(item)
+            if entry_index is None:
+                results.append((False, '条目未在主词库(defaults)中找到')) # Entry must exist in defaults
+            elif members.add(entry_index):
+                results.append((True, '添加成功'))
             else:
-                return False, '添加失败 (无法保存词库文件)'
+                results.append((False, '该条目已存在于此词库中'))
+        if any(success for success, _ in results) and not self._save_members(lexicon_name, members):
+            return [(False, '添加失败 (无法保存词库文件)') if success else (success, message)
+                    for success, message in results]
+        return results
+
+    def _resolve_entry_index(self, item: Any) -> Optional[int]:
+        """Defaults position of an entry (dict or view) or of an int position; None if invalid."""
+        if isinstance(item, int) and not isinstance(item, bool):
+            return item if 0 <= item < len(self.defaults) else None
+        return self.find_entry_index(item)
 
     def update_entry_in_defaults(self, updated_entry: Dict[str, Any]) -> bool:
         """
-        Updates an existing entry within the `self.defaults` list and saves
-        the entire list back to `defaults.json`.
+        Updates an existing entry within the `self.defaults` list.
         Finds the entry based on 'chinese' and 'english' match.
 
+        When only the counters (inquiry/memory/mistake) changed, just the
+        entry's record in the stats file is rewritten. Changes to any other
+        field fall back to rewriting the whole 'defaults.json'.
+
         Returns:
             True if the entry was found and the save was successful, False otherwise.
         """
@@ -245,13 +848,24 @@ class Lexicon:
         if entry_index is not None:
             # Make sure the index is valid before updating
             if 0 <= entry_index < len(self.defaults):
+                # Snapshot before assigning: entries are views onto the table
+                previous_entry = self.defaults[entry_index]
+                previous_key = self._entry_key(previous_entry)
+                previous_text = _without_stats(previous_entry)
                 # Update the entry at the found index
                 # Important: Ensure all necessary fields are present in updated_entry
                 # or merge carefully if only partial updates are intended.
                 # This replaces the whole dict at that position:
+                text_changed = previous_text != _without_stats(updated_entry)
                 self.defaults[entry_index] = updated_entry
-                # Save the entire updated list back to defaults.json
-                return self.save_lexicon('defaults', self.defaults)
+                self._reindex_entry(entry_index, previous_key)
+                if text_changed:
+                    self.text_version += 1
+                self._notify_entry_changed(entry_index)
+                if self.stats is not None and not text_changed:
+                    return self._write_entry_stats(entry_index, updated_entry)
+                # Text fields changed (or no stats file): save the entire list
+                return self.compact_defaults()
             else:
                  print(f"Error: Found index {entry_index} for update, but it's out of bounds for defaults list (len={len(self.defaults)}).")
                  return False
@@ -264,6 +878,73 @@ class Lexicon:
             # return self.save_lexicon('defaults', self.defaults)
             return False # Indicate update failed because entry wasn't found
 
+    def compact_defaults(self) -> bool:
+        """
+        Rewrites the defaults file ('defaults.json', or 'defaults.bin' when
+        that is in use) with the current entries, counters included, and marks
+        the stats file as in sync with it.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        if self.defaults_format == 'bin':
+            if not self._save_dictfile():
+                return False
+        elif not self.save_lexicon('defaults', self.defaults.to_list()):
+            return False
+        if self.stats is not None:
+            for i, row in enumerate(zip(*(self.defaults.column(field) for field in STATS_FIELDS))):
+                self.stats.write(i, row)
+            self.stats.set_source(*self._defaults_fingerprint())
+            self.stats.flush()
+        return True
+
+    def _save_dictfile(self) -> bool:
+        """Rewrites 'defaults.bin'. The table is fully decoded first, since the mapped file is replaced."""
+        self.defaults.materialise()
+        if self._dictfile is not None:
+            self._dictfile.close()
+            self._dictfile = None
+        path = self._get_dictfile_path()
+        try:
+            write_dictfile(path, self.defaults.to_list())
+            return True
+        except (IOError, OSError) as e:
+            print(f"Error writing to file {path}: {e}")
+            return False
+
+    def export_defaults(self, path: str) -> bool:
+        """
+        Exports the defaults list, counters included, as JSON to `path`
+        without touching 'defaults.json' or the stats file.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.defaults.to_list(), f, ensure_ascii=False, indent=2)
+            return True
+        except (IOError, OSError) as e:
+            print(f"Error exporting defaults to {path}: {e}")
+            return False
+
+    def close(self) -> None:
+        """
+        Flushes pending lexicon writes, saves the catalog and closes the stats,
+        review and dictionary files. Call when the app stops.
+        """
+        self.flush()
+        if self.stats is not None:
+            self.stats.close()
+            self.stats = None
+        if self.reviews is not None:
+            self.reviews.close()
+            self.reviews = None
+        if self._dictfile is not None:
+            self._dictfile.close()
+            self._dictfile = None
+
 
     def remove_entry_from_lexicon(self, entry: Dict[str, Any], lexicon_name: str) -> Tuple[bool, str]:
         """
@@ -276,57 +957,128 @@ class Lexicon:
         Returns:
             A tuple (success_boolean, message_string).
         """
-        entry_index = self.find_entry_index(entry)
+        return self.remove_entries_from_lexicon([entry], lexicon_name)[0]
 
-        if entry_index is None:
-            # Should not happen if entry came from the lexicon, but safeguard
-            return False, '条目未在主词库(defaults)中找到'
+    def remove_entries_from_lexicon(self, entries: Iterable[Any], lexicon_name: str) -> List[Tuple[bool, str]]:
+        """
+        Removes many entries from a lexicon with one load and one save.
 
-        lexicon_indices = self.load_lexicon(lexicon_name)
+        Args:
+            entries: Entry dictionaries (or views) and/or defaults positions.
+            lexicon_name: The name of the lexicon from which to remove them.
 
-        if entry_index in lexicon_indices:
-            lexicon_indices.remove(entry_index)
-            success = self.save_lexicon(lexicon_name, lexicon_indices)
-            if success:
-                return True, '条目已移出词库'
+        Returns:
+            One (success_boolean, message_string) tuple per item of `entries`, in order.
+        """
+        members = self.get_lexicon_members(lexicon_name)
+        results: List[Tuple[bool, str]] = []
+        for item in entries:
+            entry_index = self._resolve_entry_index(item)
+            if entry_index is None:
+                # Should not happen if entry came from the lexicon, but safeguard
+                results.append((False, '条目未在主词库(defaults)中找到'))
+            elif members.discard(entry_index):
+                results.append((True, '条目已移出词库'))
             else:
-                # Should attempt to restore the index list? Maybe not.
-                return False, '移除失败 (无法保存词库文件)'
-        else:
-            return False, '条目不在此词库中'
+                results.append((False, '条目不在此词库中'))
+        if any(success for success, _ in results) and not self._save_members(lexicon_name, members):
+            return [(False, '移除失败 (无法保存词库文件)') if success else (success, message)
+                    for success, message in results]
+        return results
 
-    def get_lexicon_entries(self, lexicon_name: str) -> List[Dict[str, Any]]:
+    def get_lexicon_members(self, lexicon_name: str) -> PositionSet:
         """
-        Retrieves the full entry dictionaries for a given lexicon name
-        by mapping its indices to the `self.defaults` list.
+        Returns the members of a custom lexicon as a PositionSet (a bitset over
+        defaults positions that iterates in file order).
+
+        Results are cached per lexicon and revalidated by the file's
+        (mtime_ns, size), so repeated calls only stat the file; an external
+        edit is picked up on the next call. Modify the set only through
+        add/remove_entry_*_lexicon so the file stays in sync.
         """
-        indices = self.load_lexicon(lexicon_name)
-        entries = []
+        fingerprint = _file_fingerprint(self._get_lexicon_path(lexicon_name))
+        cached = self._members.get(lexicon_name)
+        if cached is not None and fingerprint is not None and cached[0] == fingerprint:
+            self._members.move_to_end(lexicon_name)
+            return cached[1]
+        members = self._members_from_indices(lexicon_name, self.load_lexicon(lexicon_name))
+        self._cache_members(lexicon_name, members)
+        return members
+
+    def _members_from_indices(self, lexicon_name: str, indices: List[Any]) -> PositionSet:
+        """Builds a lexicon's PositionSet, dropping indices that are not valid defaults positions."""
+        members = PositionSet()
+        size = len(self.defaults)
+        for i in indices:
+            if not isinstance(i, int) or i < 0:
+                print(f"Warning: Invalid index '{i}' found in '{lexicon_name}.json' ignored.")
+                continue
+            if i >= size:
+                print(f"Warning: Invalid index '{i}' found in '{lexicon_name}.json' ignored (defaults length: {size}).")
+                continue
+            members.add(i)
+        return members
+
+    def _cache_members(self, lexicon_name: str, members: PositionSet) -> None:
+        """Caches a lexicon's members under the current fingerprint of its file."""
+        fingerprint = _file_fingerprint(self._get_lexicon_path(lexicon_name))
+        if fingerprint is None:
+            self._members.pop(lexicon_name, None)
+            return
+        self._members[lexicon_name] = (fingerprint, members)
+        self._members.move_to_end(lexicon_name)
+        while len(self._members) > MEMBER_CACHE_SIZE:
+            self._members.popitem(last=False)
+
+    def _save_members(self, lexicon_name: str, members: PositionSet) -> bool:
+        """Writes a lexicon's members back to its file and caches the same set."""
+        if self._write_lexicon_file(lexicon_name, members.to_list, defer=True):
+            self._cache_members(lexicon_name, members)
+            self._catalog_set_count(lexicon_name, len(members))
+            return True
+        return False # The cache entry was dropped; the next access reloads the file
+
+    def get_lexicon_positions(self, lexicon_name: str) -> List[int]:
+        """
+        Returns the valid defaults positions stored in a lexicon, in file order.
+        Callers that only need counters can work on these positions and the
+        counter columns of `self.defaults` without materialising entries.
+        """
+        members = self.get_lexicon_members(lexicon_name)
         if not self.defaults:
             print(f"Warning: Cannot get entries for '{lexicon_name}', defaults list is not loaded.")
             return []
 
-        for i in indices:
-            # Check if index is valid for the current defaults list
-            if isinstance(i, int) and 0 <= i < len(self.defaults):
-                # Append a copy to avoid external modification? Optional.
-                # entries.append(self.defaults[i].copy())
-                entries.append(self.defaults[i])
-            else:
-                print(f"Warning: Invalid index '{i}' found in '{lexicon_name}.json' ignored (defaults length: {len(self.defaults)}).")
-        return entries
+        # 越界的索引在建立成员集合时已经剔除
+        return members.to_list()
+
+    def get_lexicon_entries(self, lexicon_name: str) -> List[Dict[str, Any]]:
+        """
+        Retrieves the full entry dictionaries for a given lexicon name
+        by mapping its indices to the `self.defaults` list.
+        The entries are views onto `self.defaults`, so edits write through.
+        """
+        defaults = self.defaults
+        return [defaults[i] for i in self.get_lexicon_positions(lexicon_name)]
 
     def get_entry_indices(self, entries: List[Dict[str, Any]]) -> List[int]:
         """
         Converts a list of entry dictionaries back into a list of their
-        corresponding indices in the `self.defaults` list.
+        corresponding indices in the `self.defaults` list, in one pass over
+        `entries` using the hash index.
         """
         indices = []
+        if not self.defaults:
+            return indices
         for entry in entries:
-            index = self.find_entry_index(entry)
+            if isinstance(entry, EntryView) and entry.table is self.defaults:
+                indices.append(entry.position)
+                continue
+            key = self._entry_key(entry)
+            index = self._lookup_entry_key(key) if key is not None else None
             if index is not None:
                 indices.append(index)
             else:
                 # Log if an entry couldn't be mapped back?
                 print(f"Warning: Could not find index for entry: {entry.get('english')}")
-        return indices
\ No newline at end of file
+        return indices
@@ -1,9 +1,16 @@
 # core/recite.py
-import random
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from core import schemes
+from core.sampling import reservoir_sample
 # 不再需要从这里导入 Lexicon 或 Data
 # from core.lexicon import Lexicon
 # from core.data import Data
 
+# 按复习到期时间选词的方案 (不属于按计数划分的 core.schemes)
+DUE_SCHEME = 'due'
+
 class Recite:
     # 修改 __init__ 以接收共享实例
     def __init__(self, lexicon_instance, data_instance):
@@ -25,37 +32,59 @@ class Recite:
     # def get_words(self, lexicon_name=None, n=10): ...
     # def recite_words(self, lexicon_name=None, n=10): ...
 
-    def get_filtered_entries(self, lexicon_name, scheme, count):
+    def get_filtered_entries(self, lexicon_name, scheme, count, mode='uniform'):
         """
         Gets entries from a specified lexicon, filters them based on a scheme,
         and returns a random sample. Uses shared Lexicon and Data instances.
+        The 'due' scheme is not sampled: it returns the entries whose review is
+        due, most overdue first, straight from the review queue.
+
+        Args:
+            mode: 'uniform' samples evenly, streaming the lexicon through a
+                reservoir instead of building the filtered list; 'mistake',
+                'low_memory' and 'recency' draw from a cached alias table
+                weighted accordingly (see core.sampling).
         """
         if not self.lexicon or not self.data:
              print("错误: Recite 无法访问共享的 Lexicon 或 Data 实例。")
              return [], False # 返回空列表和 False
 
-        # --- 使用共享的 lexicon 实例获取条目 ---
-        # get_lexicon_entries 已经处理了索引到字典的映射
-        entries = self.lexicon.get_lexicon_entries(lexicon_name)
-        if not entries:
+        defaults = self.lexicon.defaults
+        if scheme == DUE_SCHEME:
+            # 到期队列：只取前 count 个，不扫描整个词库
+            due_positions = self.lexicon.get_due_positions(lexicon_name, limit=count)
+            if not due_positions:
+                 print(f"信息: 词库 '{lexicon_name}' 中没有到期需要复习的条目。")
+                 return [], False
+            return [defaults[p] for p in due_positions], len(due_positions) >= count
+
+        if mode != 'uniform':
+            # 加权抽样：别名表缓存在 Data 中，每次抽取 O(1)，不需要排序
+            table, members = self.data.weighted_sampler(lexicon_name, scheme, mode)
+            if not table:
+                 print(f"信息: 在词库 '{lexicon_name}' 中根据方案 '{scheme}' 未找到符合条件的条目。")
+                 return [], False
+            sampled_positions = table.sample(count, accept=members.__contains__)
+            return [defaults[p] for p in sampled_positions], len(table) >= count
+
+        # --- 使用共享的 lexicon 实例获取条目位置 ---
+        # 只处理 defaults 中的位置，筛选直接读方案列，取样后才生成条目视图
+        positions = self.lexicon.get_lexicon_positions(lexicon_name)
+        if not positions:
              print(f"信息: 词库 '{lexicon_name}' 为空或加载失败。")
              return [], False # 返回空
+        if scheme not in schemes.SCHEMES and scheme != 'all':
+             print(f"警告: 未知的筛选方案 '{scheme}'")
+             return [], False
 
-        # --- 使用共享的 data 实例进行筛选 ---
-        filtered_entries = self.data.filter_entries(entries, scheme)
-        if not filtered_entries:
+        # 蓄水池抽样：边筛选边取样，不生成筛选后的列表
+        sampled_positions, actual_count = reservoir_sample(
+            schemes.iter_select(defaults.schemes, positions, scheme), count
+        )
+        if not sampled_positions:
              print(f"信息: 在词库 '{lexicon_name}' 中根据方案 '{scheme}' 未找到符合条件的条目。")
-             return [], False # 返回空
-
-        actual_count = len(filtered_entries)
-        sufficient = actual_count >= count
-
-        # 取样：如果请求数量大于实际数量，则返回所有筛选出的条目
-        sample_count = min(count, actual_count)
-        sampled_entries = random.sample(filtered_entries, sample_count)
-
-        # 返回取样结果和是否足够
-        return sampled_entries, sufficient
+             return [], False
+        return [defaults[p] for p in sampled_positions], actual_count >= count
 
 
     def update_entry(self, entry, update_type):
@@ -66,7 +95,7 @@ class Recite:
         if not self.lexicon:
              print("错误: Recite.update_entry 无法访问共享的 Lexicon 实例。")
              return
-        if not isinstance(entry, dict):
+        if not isinstance(entry, Mapping):
             print("错误: Recite.update_entry 接收到的 entry 不是字典。")
             return
 
@@ -88,5 +117,105 @@ class Recite:
             # 可能不需要更新，直接返回
             return
 
+        # 按结果重新安排复习时间 (只更新这一条的到期时间)；
+        # 先于保存，这样条目变更通知到达时复习时间已是最新的
+        self.lexicon.record_review(entry, update_type)
         # --- 使用共享的 lexicon 实例保存更新 ---
-        self.lexicon.update_entry_in_defaults(entry)
\ No newline at end of file
+        self.lexicon.update_entry_in_defaults(entry)
+
+
+# 背诵结果类型 (与 Recite.update_entry 的 update_type 一致)
+UPDATE_TYPES = ('pass', 'view', 'mistake')
+
+
+class ReciteSession:
+    """
+    State of one recitation run over a fixed list of entries.
+
+    The screen only swaps text: card texts (front and detail) are formatted
+    ahead of time for the current card and the `lookahead` cards after it,
+    so answering a card never has to touch the entries to draw the next one.
+    Answers go straight through Recite.update_entry.
+    """
+
+    def __init__(self, recite_handler: Recite, entries: Sequence[Mapping], lookahead: int = 1):
+        self.recite_handler = recite_handler
+        self.entries = list(entries)
+        self.lookahead = max(0, lookahead)
+        self.index = 0
+        self.mistakes = 0
+        self.results: List[Optional[str]] = [None] * len(self.entries)
+        self._texts: Dict[int, Tuple[str, str]] = {}
+        self.prefetch()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def finished(self) -> bool:
+        return self.index >= len(self.entries)
+
+    @property
+    def current(self) -> Optional[Mapping]:
+        return None if self.finished else self.entries[self.index]
+
+    def progress_text(self) -> str:
+        return f"{min(self.index + 1, len(self.entries))} / {len(self.entries)}"
+
+    @staticmethod
+    def format_card(entry: Mapping) -> Tuple[str, str]:
+        """(front text, detail text) of a card."""
+        front = f"{entry.get('chinese', 'N/A')}"
+        detail = f"英: {entry.get('english', '')}\n备注: {entry.get('note', '')}"
+        return front, detail
+
+    def card(self, offset: int = 0) -> Optional[Tuple[str, str]]:
+        """
+        Texts of the card `offset` places after the current one.
+
+        Returns:
+            (front, detail), or None past the end of the session.
+        """
+        position = self.index + offset
+        if not 0 <= position < len(self.entries):
+            return None
+        texts = self._texts.get(position)
+        if texts is None:
+            texts = self._texts[position] = self.format_card(self.entries[position])
+        return texts
+
+    def prefetch(self) -> None:
+        """Formats the current and the next `lookahead` cards; drops the texts of answered ones."""
+        for position in [p for p in self._texts if p < self.index]:
+            del self._texts[position]
+        for offset in range(self.lookahead + 1):
+            self.card(offset)
+
+    def answer(self, update_type: str) -> bool:
+        """
+        Records the answer for the current card, updates its statistics and
+        moves on to the next card.
+
+        Returns:
+            True if the answer was recorded, False if the session is over or
+            `update_type` is unknown.
+        """
+        if self.finished:
+            return False
+        if update_type not in UPDATE_TYPES:
+            print(f"警告: ReciteSession.answer 收到未知的 update_type: {update_type}")
+            return False
+        self.recite_handler.update_entry(self.entries[self.index], update_type)
+        self.results[self.index] = update_type
+        if update_type == 'mistake':
+            self.mistakes += 1
+        self.index += 1
+        self.prefetch()
+        return True
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals of the run: total, correct, mistakes and accuracy (percent)."""
+        total = len(self.entries)
+        correct = total - self.mistakes
+        accuracy = (correct / total * 100) if total > 0 else 0
+        return {'total': total, 'correct': correct, 'mistakes': self.mistakes, 'accuracy': accuracy}
@@ -0,0 +1,239 @@
+# core/sampling.py
+import heapq
+import math
+import random
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# 抽样方式：uniform 等概率；mistake 按错误率；low_memory 记忆次数越少越容易抽到；
+# recency 越久没复习越容易抽到
+SAMPLING_MODES = ('uniform', 'mistake', 'low_memory', 'recency')
+
+DAY = 24 * 60 * 60
+RECENCY_CAP_DAYS = 365  # 从未复习过的条目按这么多天算
+
+
+def mistake_weight(memory: int, mistake: int) -> float:
+    """Smoothed mistake rate, (mistake + 1) / (memory + 2)."""
+    return (mistake + 1) / (memory + 2)
+
+
+def low_memory_weight(memory: int, mistake: int) -> float:
+    return 1.0 / (memory + 1)
+
+
+def recency_weight(last_reviewed: int, now: int) -> float:
+    """1 + days since the last review, capped; never-reviewed entries get the cap."""
+    if last_reviewed <= 0:
+        return 1.0 + RECENCY_CAP_DAYS
+    return 1.0 + min(max(now - last_reviewed, 0) / DAY, RECENCY_CAP_DAYS)
+
+
+def reservoir_sample(items: Iterable[int], k: int, rng=random) -> Tuple[List[int], int]:
+    """
+    Uniform sample of k items from a stream in one pass (Algorithm R).
+
+    Returns:
+        (sample, number of items seen).
+    """
+    sample: List[int] = []
+    seen = 0
+    for item in items:
+        seen += 1
+        if len(sample) < k:
+            sample.append(item)
+        else:
+            j = int(rng.random() * seen)
+            if j < k:
+                sample[j] = item
+    rng.shuffle(sample)
+    return sample, seen
+
+
+def weighted_reservoir(pairs: Iterable[Tuple[int, float]], k: int, rng=random) -> Tuple[List[int], int]:
+    """
+    Weighted sample of k distinct items from a stream of (item, weight) in one
+    pass (Efraimidis-Spirakis A-Res: keep the k largest u ** (1 / w) keys).
+    Items with a non-positive weight are skipped.
+
+    Returns:
+        (sample, largest keys first; number of positive-weight items seen).
+    """
+    heap: List[Tuple[float, int]] = []
+    seen = 0
+    if k <= 0:
+        return [], 0
+    for item, weight in pairs:
+        if weight <= 0:
+            continue
+        seen += 1
+        key = math.log(1.0 - rng.random()) / weight  # log(u) / w，u 取 (0, 1]
+        if len(heap) < k:
+            heapq.heappush(heap, (key, item))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, item))
+    return [item for _, item in sorted(heap, reverse=True)], seen
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table over weighted positions: O(n) to build, O(1) per
+    draw.
+
+    Weight changes are applied without rebuilding: the changed positions move
+    to a small overlay with their current weight, draws from the table that
+    land on an overlaid position are rejected, and the overlay is drawn from
+    directly with its share of the total weight. The table is rebuilt once the
+    overlay outgrows `max_overlay`, which keeps both the rejection rate and the
+    overlay scan small.
+    """
+
+    def __init__(self, positions: Sequence[int], weights: Sequence[float], max_overlay: Optional[int] = None):
+        self._max_overlay = max_overlay
+        self._build(positions, weights)
+
+    def _build(self, positions: Iterable[int], weights: Iterable[float]) -> None:
+        items: List[int] = []
+        base: List[float] = []
+        for position, weight in zip(positions, weights):
+            if weight > 0:
+                items.append(position)
+                base.append(float(weight))
+        n = len(items)
+        total = math.fsum(base)
+        prob = [1.0] * n
+        alias = list(range(n))
+        if n:
+            scaled = [weight * n / total for weight in base]
+            small = [i for i, value in enumerate(scaled) if value < 1.0]
+            large = [i for i, value in enumerate(scaled) if value >= 1.0]
+            while small and large:
+                s, l = small.pop(), large.pop()
+                prob[s], alias[s] = scaled[s], l
+                scaled[l] += scaled[s] - 1.0
+                (small if scaled[l] < 1.0 else large).append(l)
+            # 剩下的 (浮点误差) 概率都按 1 处理
+        self._items = items
+        self._base = base
+        self._slots = {position: slot for slot, position in enumerate(items)}
+        self._prob = prob
+        self._alias = alias
+        self._base_total = total
+        self._overlay: Dict[int, float] = {}
+        self._overlay_total = 0.0
+        self._stale_total = 0.0
+        self._stale_count = 0
+        self._limit = self._max_overlay if self._max_overlay is not None else max(32, n // 64)
+
+    def __len__(self) -> int:
+        """Number of positions with a positive weight."""
+        return len(self._items) - self._stale_count + sum(1 for weight in self._overlay.values() if weight > 0)
+
+    def __contains__(self, position: object) -> bool:
+        weight = self._overlay.get(position)
+        if weight is not None:
+            return weight > 0
+        return position in self._slots
+
+    @property
+    def total_weight(self) -> float:
+        return self._base_total - self._stale_total + self._overlay_total
+
+    def weight(self, position: int) -> float:
+        weight = self._overlay.get(position)
+        if weight is not None:
+            return weight
+        slot = self._slots.get(position)
+        return self._base[slot] if slot is not None else 0.0
+
+    def items(self) -> Iterator[Tuple[int, float]]:
+        """(position, weight) of every position with a positive weight."""
+        overlay = self._overlay
+        for position, weight in zip(self._items, self._base):
+            if position not in overlay:
+                yield position, weight
+        for position, weight in overlay.items():
+            if weight > 0:
+                yield position, weight
+
+    def update(self, position: int, weight: float) -> None:
+        """Sets a position's weight (0 removes it, a new position is added)."""
+        weight = max(float(weight), 0.0)
+        previous = self._overlay.get(position)
+        if previous is not None:
+            self._overlay_total -= previous
+        else:
+            slot = self._slots.get(position)
+            if slot is not None:
+                if weight == self._base[slot]:
+                    return
+                self._stale_total += self._base[slot]
+                self._stale_count += 1
+            elif weight == 0:
+                return
+        self._overlay[position] = weight
+        self._overlay_total += weight
+        if len(self._overlay) > self._limit:
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Folds the overlay back into a fresh alias table."""
+        pairs = list(self.items())
+        self._build((position for position, _ in pairs), (weight for _, weight in pairs))
+
+    def draw(self, rng=random) -> Optional[int]:
+        """One position drawn with probability proportional to its weight (None if all weights are 0)."""
+        live = 0.0 if self._stale_count >= len(self._items) else self._base_total - self._stale_total
+        total = live + self._overlay_total
+        if total <= 0:
+            return None
+        r = rng.random() * total
+        if r < live:
+            n = len(self._items)
+            overlay = self._overlay
+            while True:
+                slot = int(rng.random() * n)
+                if rng.random() >= self._prob[slot]:
+                    slot = self._alias[slot]
+                position = self._items[slot]
+                if position not in overlay:
+                    return position
+        r -= live
+        chosen = None
+        for position, weight in self._overlay.items():
+            if weight > 0:
+                chosen = position
+                r -= weight
+                if r < 0:
+                    break
+        return chosen
+
+    def sample(self, k: int, rng=random, accept: Optional[Callable[[int], bool]] = None) -> List[int]:
+        """
+        Up to k distinct positions, each draw weighted by the current weights.
+
+        Repeated draws are rejected, as are positions `accept` refuses (e.g.
+        entries removed from the lexicon since the table was built). When k
+        is a large share of the table, or rejections pile up, the remainder is
+        taken by a weighted reservoir pass over the table instead.
+        """
+        if k <= 0:
+            return []
+        size = len(self)
+        chosen: Dict[int, None] = {}
+        if k * 2 < size:
+            attempts = k * 8 + 64
+            while len(chosen) < k and attempts > 0:
+                attempts -= 1
+                position = self.draw(rng)
+                if position is None:
+                    break
+                if position not in chosen and (accept is None or accept(position)):
+                    chosen[position] = None
+        if len(chosen) < k:
+            rest = (
+                (position, weight) for position, weight in self.items()
+                if position not in chosen and (accept is None or accept(position))
+            )
+            picked, _ = weighted_reservoir(rest, k - len(chosen), rng)
+            chosen.update(dict.fromkeys(picked))
+        return list(chosen)
@@ -0,0 +1,280 @@
+# core/scheduler.py
+import heapq
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Collection, Container, List, Optional, Tuple
+
+# 背诵结果对应的 SM-2 回答质量 (0-5，低于 3 视为答错)
+QUALITY = {'pass': 5, 'view': 3, 'mistake': 1}
+
+DAY = 24 * 60 * 60
+RELEARN_DELAY = 10 * 60   # 答错后 10 分钟再次到期 (秒)
+DEFAULT_EASE = 2500       # 难度系数 x1000 (SM-2 初始 2.5)
+MIN_EASE = 1300           # SM-2 下限 1.3
+_MAX_U16 = 0xFFFF
+_MAX_U32 = 0xFFFFFFFF
+
+# Header: magic, format version, record size, record count.
+# Record: due (unix seconds, 0 = never reviewed), interval (days), ease (x1000),
+# repetitions (successful reviews in a row), lapses.
+_HEADER = struct.Struct('<4sHHI')
+_RECORD = struct.Struct('<IHHHH')
+_MAGIC = b'WPRV'
+_VERSION = 1
+
+DUE_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def sm2_step(record: Tuple[int, int, int, int, int], quality: int, now: int) -> Tuple[int, int, int, int, int]:
+    """
+    Applies one SM-2 review to a record.
+
+    Args:
+        record: (due, interval, ease, repetitions, lapses) before the review.
+        quality: Answer quality, 0-5.
+        now: Review time, unix seconds.
+
+    Returns:
+        The updated record.
+    """
+    _, interval, ease, repetitions, lapses = record
+    ease = ease or DEFAULT_EASE
+    if quality < 3:
+        # 答错：重新开始间隔，短时间后再复习
+        ease = max(MIN_EASE, ease - 200)
+        return now + RELEARN_DELAY, 0, ease, 0, min(lapses + 1, _MAX_U16)
+    if repetitions == 0:
+        interval = 1
+    elif repetitions == 1:
+        interval = 6
+    else:
+        interval = round(interval * ease / 1000)
+    # EF' = EF + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    miss = 5 - quality
+    ease = max(MIN_EASE, ease + 100 - miss * (80 + miss * 20))
+    interval = min(max(interval, 1), _MAX_U16)
+    due = min(now + interval * DAY, _MAX_U32)
+    return due, interval, min(ease, _MAX_U16), min(repetitions + 1, _MAX_U16), lapses
+
+
+class ReviewStore:
+    """
+    Fixed-width, memory-mapped store of the review schedule, one record per
+    defaults position (see _RECORD), laid out like the counters file so a
+    review rewrites only its own record.
+    """
+
+    def __init__(self, path: str, file_obj, mapping: mmap.mmap):
+        self.path = path
+        self._file = file_obj
+        self._map = mapping
+        self.count = _HEADER.unpack_from(mapping, 0)[3]
+
+    @classmethod
+    def create(cls, path: str, count: int) -> 'ReviewStore':
+        """Writes an empty schedule (nothing reviewed yet) for `count` positions and opens it."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, _RECORD.size, count))
+            f.write(bytes(count * _RECORD.size))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        store = cls.open(path, expected_count=count)
+        if store is None:
+            raise IOError(f"Review file '{path}' could not be reopened after creation.")
+        return store
+
+    @classmethod
+    def open(cls, path: str, expected_count: Optional[int] = None) -> Optional['ReviewStore']:
+        """
+        Opens an existing review file.
+
+        Returns:
+            The store, or None if the file is missing, malformed, or does not
+            hold `expected_count` records.
+        """
+        if not os.path.exists(path):
+            return None
+        f = None
+        try:
+            f = open(path, 'r+b')
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                f.close()
+                return None
+            mapping = mmap.mmap(f.fileno(), 0)
+        except (OSError, ValueError) as e:
+            print(f"Error opening review file {path}: {e}")
+            if f is not None:
+                f.close()
+            return None
+
+        magic, version, record_size, count = _HEADER.unpack_from(mapping, 0)
+        valid = (
+            magic == _MAGIC and version == _VERSION and record_size == _RECORD.size
+            and size == _HEADER.size + count * _RECORD.size
+            and (expected_count is None or count == expected_count)
+        )
+        if not valid:
+            mapping.close()
+            f.close()
+            return None
+        return cls(path, f, mapping)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, position: int) -> int:
+        if not 0 <= position < self.count:
+            raise IndexError(f"Review position {position} out of range (count={self.count}).")
+        return _HEADER.size + position * _RECORD.size
+
+    def read(self, position: int) -> Tuple[int, int, int, int, int]:
+        """Returns (due, interval, ease, repetitions, lapses) of a defaults position."""
+        return _RECORD.unpack_from(self._map, self._offset(position))
+
+    def write(self, position: int, record: Tuple[int, int, int, int, int]) -> None:
+        _RECORD.pack_into(self._map, self._offset(position), *record)
+
+    def read_due(self) -> array:
+        """Due timestamps of every position at once (records are three uint32 words, due first)."""
+        flat = array(DUE_TYPECODE)
+        flat.frombytes(self._map[_HEADER.size:_HEADER.size + self.count * _RECORD.size])
+        if sys.byteorder != 'little':
+            flat.byteswap()
+        return flat[0::_RECORD.size // 4]
+
+    def flush(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ReviewScheduler:
+    """
+    Due queue over a ReviewStore.
+
+    Reviewed positions sit in a binary heap of (due, position). Recording a
+    review pushes the new due time and leaves the old heap item behind; stale
+    items are recognised against the in-memory due column and the heap is
+    rebuilt once they outnumber the live ones. The next k due cards are read
+    by walking the heap from its root with a small frontier heap, so a query
+    costs O(k log k) plus skipped (stale or non-member) items, not a scan of
+    every position.
+    """
+
+    def __init__(self, store: ReviewStore):
+        self.store = store
+        self._due = store.read_due()
+        self._heap: List[Tuple[int, int]] = []
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._heap = [(due, position) for position, due in enumerate(self._due) if due]
+        heapq.heapify(self._heap)
+        self._live = len(self._heap)
+
+    def __len__(self) -> int:
+        """Number of positions that have been reviewed at least once."""
+        return self._live
+
+    def due_at(self, position: int) -> int:
+        """Due time of a position (0 if it was never reviewed)."""
+        return self._due[position]
+
+    def last_reviewed(self, position: int) -> int:
+        """Time of the last review of a position (0 if it was never reviewed)."""
+        due, interval, _, _, _ = self.store.read(position)
+        if not due:
+            return 0
+        return due - (interval * DAY if interval else RELEARN_DELAY)
+
+    def is_new(self, position: int) -> bool:
+        return self._due[position] == 0
+
+    def record(self, position: int, update_type: str, now: Optional[int] = None) -> Optional[int]:
+        """
+        Applies a recite result to a position's schedule and re-queues it.
+
+        Args:
+            update_type: 'pass', 'view' or 'mistake'.
+            now: Review time in unix seconds (defaults to the current time).
+
+        Returns:
+            The new due time, or None if the result type or position is unknown.
+        """
+        quality = QUALITY.get(update_type)
+        if quality is None or not 0 <= position < len(self._due):
+            return None
+        now = int(time.time()) if now is None else now
+        was_new = self._due[position] == 0
+        record = sm2_step(self.store.read(position), quality, now)
+        self.store.write(position, record)
+        due = record[0]
+        self._due[position] = due
+        if was_new:
+            self._live += 1
+        heapq.heappush(self._heap, (due, position))
+        if len(self._heap) > 2 * self._live + 64:
+            self._rebuild()  # 过期的堆项太多时重建
+        return due
+
+    def due_positions(self, now: Optional[int] = None, limit: Optional[int] = None,
+                      members: Optional[Container[int]] = None) -> List[int]:
+        """
+        Positions due at `now`, most overdue first.
+
+        Args:
+            now: Unix seconds (defaults to the current time).
+            limit: Maximum number of positions to return (None for all).
+            members: Optional container restricting the result (e.g. a lexicon's PositionSet).
+        """
+        now = int(time.time()) if now is None else now
+        heap = self._heap
+        result: List[int] = []
+        if not heap or (limit is not None and limit <= 0):
+            return result
+        seen = set()
+        frontier = [(heap[0], 0)]
+        while frontier:
+            (due, position), i = heapq.heappop(frontier)
+            if due > now:
+                break  # 堆序保证其余项都更晚到期
+            if self._due[position] == due and position not in seen and (members is None or position in members):
+                seen.add(position)
+                result.append(position)
+                if limit is not None and len(result) >= limit:
+                    break
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
+
+    def count_due(self, now: Optional[int] = None, members: Optional[Collection[int]] = None) -> int:
+        """Number of positions due at `now`, optionally only among `members`."""
+        now = int(time.time()) if now is None else now
+        if members is not None and len(members) < self._live:
+            # 成员比已复习条目少：直接查到期时间列，不遍历堆
+            due = self._due
+            size = len(due)  # 词库文件里可能有超出 defaults 的旧索引
+            return sum(1 for position in members if position < size and 0 < due[position] <= now)
+        return len(self.due_positions(now, members=members))
+
+    def flush(self) -> None:
+        self.store.flush()
+
+    def close(self) -> None:
+        self.store.close()
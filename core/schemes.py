@@ -0,0 +1,68 @@
+# core/schemes.py
+from array import array
+from itertools import compress, repeat
+from operator import eq, itemgetter
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+# 背诵方案及其编码；每个 defaults 位置恰好属于其中一种
+SCHEMES = ('new', 'consolidate', 'review', 'other')
+SCHEME_CODES = {scheme: code for code, scheme in enumerate(SCHEMES)}
+
+
+def scheme_code(memory: int, mistake: int) -> int:
+    """
+    Scheme code of an entry from its counters:
+    new (memory == 0), consolidate (0 < memory < 6 and mistake > 0),
+    review (memory >= 6 and mistake > memory / 3), otherwise other.
+    """
+    if memory == 0:
+        return 0
+    if memory < 6:
+        return 1 if mistake > 0 else 3
+    # mistake > memory / 3 写成整数比较
+    return 2 if mistake * 3 > memory else 3
+
+
+def build_scheme_column(memory: Sequence[int], mistake: Sequence[int]) -> array:
+    """One scheme code byte per defaults position."""
+    return array('B', map(scheme_code, memory, mistake))
+
+
+def _gather(codes: array, positions: Sequence[int]) -> bytes:
+    """Scheme codes of `positions` as one bytes object (C-level gather)."""
+    if isinstance(positions, range) and positions == range(len(codes)):
+        return codes.tobytes()  # 整个词库按顺序，无需逐个取
+    if len(positions) < 2:
+        return bytes(codes[p] for p in positions)
+    return bytes(itemgetter(*positions)(codes))
+
+
+def count_schemes(codes: array, positions: Iterable[int]) -> Dict[str, int]:
+    """Per-scheme counts of `positions` (plus 'all'), without building lists."""
+    positions = positions if isinstance(positions, (list, array, range)) else list(positions)
+    gathered = _gather(codes, positions)
+    counts = {scheme: gathered.count(code) for scheme, code in SCHEME_CODES.items()}
+    counts['all'] = len(gathered)
+    return counts
+
+
+def select(codes: array, positions: Iterable[int], scheme: str) -> List[int]:
+    """Positions of a single scheme ('all' returns every position)."""
+    positions = positions if isinstance(positions, (list, array, range)) else list(positions)
+    if scheme == 'all':
+        return list(positions)
+    code = SCHEME_CODES[scheme]
+    return list(compress(positions, map(eq, _gather(codes, positions), repeat(code))))
+
+
+def matches(codes: array, position: int, scheme: str) -> bool:
+    """Whether the entry at `position` belongs to `scheme` ('all' matches everything)."""
+    return scheme == 'all' or codes[position] == SCHEME_CODES[scheme]
+
+
+def iter_select(codes: array, positions: Iterable[int], scheme: str) -> Iterator[int]:
+    """Lazily yields the positions of a single scheme, for streaming consumers."""
+    if scheme == 'all':
+        return iter(positions)
+    code = SCHEME_CODES[scheme]
+    return (position for position in positions if codes[position] == code)
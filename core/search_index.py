@@ -0,0 +1,270 @@
+# core/search_index.py
+import gc
+import re
+from array import array
+from collections.abc import Mapping
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+# 判断输入是否包含中文字符 (与 Data.search_word 原有规则一致)
+_CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+# 英文三元组两端的填充字符，保证长度 < 3 的单词也有至少一个三元组
+_PAD_START = '\x02'
+_PAD_END = '\x03'
+
+# 候选集合小于该值时停止求交集，直接逐条校验更快
+_VERIFY_THRESHOLD = 64
+
+
+def is_chinese_query(word: str) -> bool:
+    """True if the query contains a CJK character and should match 'chinese'."""
+    return bool(_CJK_PATTERN.search(word))
+
+
+def _english_grams(text: str) -> Set[str]:
+    """Trigrams of a lower-cased English string, padded at both ends."""
+    padded = f'{_PAD_START}{text}{_PAD_END}'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _chinese_grams(text: str) -> Set[str]:
+    """Unigrams and bigrams of a Chinese string."""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def _insert_sorted(posting: array, position: int) -> None:
+    if not posting or posting[-1] < position:
+        posting.append(position) # 构建时按位置递增，直接追加
+        return
+    i = bisect_left(posting, position)
+    if i == len(posting) or posting[i] != position:
+        posting.insert(i, position)
+
+
+def _remove_sorted(posting: array, position: int) -> None:
+    i = bisect_left(posting, position)
+    if i < len(posting) and posting[i] == position:
+        posting.pop(i)
+
+
+def _add_posting(postings: Dict[str, array], key: str, position: int) -> None:
+    posting = postings.get(key)
+    if posting is None:
+        postings[key] = array('I', (position,))
+    else:
+        _insert_sorted(posting, position)
+
+
+def _remove_posting(postings: Dict[str, array], key: str, position: int) -> None:
+    posting = postings.get(key)
+    if posting is not None:
+        _remove_sorted(posting, position)
+        if not posting:
+            del postings[key]
+
+
+class SearchIndex:
+    """
+    Inverted n-gram index over the defaults entries used by Data.search_word.
+
+    English headwords are indexed by trigrams of their lower-cased text and
+    Chinese strings by unigrams and bigrams. A query intersects the posting
+    lists of its grams, verifies the surviving candidates with a substring
+    test, and looks exact matches up in a dict, so no query scans defaults.
+    """
+
+    def __init__(self, entries: Optional[Sequence[Any]] = None):
+        self._reset()
+        if entries is not None:
+            self.build(entries)
+
+    def _reset(self) -> None:
+        self._english: List[Optional[str]] = []  # lower-cased 'english' per position
+        self._chinese: List[Optional[str]] = []  # 'chinese' per position (None if not a str)
+        self._english_postings: Dict[str, array] = {}
+        self._chinese_postings: Dict[str, array] = {}
+        self._english_exact: Dict[str, array] = {}
+        self._chinese_exact: Dict[str, array] = {}
+        self._eligible = array('I')  # positions of searchable entries
+
+    @staticmethod
+    def _entry_texts(entry: Any):
+        """
+        Returns (english_lower, chinese) for a searchable entry, or (None, None)
+        if the entry is skipped by search (not a dict or lacking either key).
+        """
+        if not (isinstance(entry, Mapping) and 'chinese' in entry and 'english' in entry):
+            return None, None
+        english = entry.get('english', '')
+        english_lower = english.lower() if isinstance(english, str) else ''
+        chinese = entry['chinese']
+        return english_lower, chinese if isinstance(chinese, str) else None
+
+    def build(self, entries: Iterable[Any]) -> None:
+        """Builds the index from scratch over `entries` (positions = list order)."""
+        self._reset()
+        # 构建时位置单调递增：先收集到普通列表，最后一次性转为 array
+        # 大量小容器分配会反复触发循环 GC，构建期间暂时关闭
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._build_postings(entries)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _build_postings(self, entries: Iterable[Any]) -> None:
+        english_postings: Dict[str, list] = {}
+        chinese_postings: Dict[str, list] = {}
+        english_exact: Dict[str, list] = {}
+        chinese_exact: Dict[str, list] = {}
+        eligible = []
+        for position, entry in enumerate(entries):
+            english, chinese = self._entry_texts(entry)
+            self._english.append(english)
+            self._chinese.append(chinese)
+            if english is None:
+                continue
+            eligible.append(position)
+            english_exact.setdefault(english, []).append(position)
+            for gram in _english_grams(english):
+                english_postings.setdefault(gram, []).append(position)
+            if chinese is not None:
+                chinese_exact.setdefault(chinese, []).append(position)
+                for gram in _chinese_grams(chinese):
+                    chinese_postings.setdefault(gram, []).append(position)
+
+        self._eligible = array('I', eligible)
+        for source, target in (
+            (english_postings, self._english_postings), (chinese_postings, self._chinese_postings),
+            (english_exact, self._english_exact), (chinese_exact, self._chinese_exact),
+        ):
+            for key, positions in source.items():
+                target[key] = array('I', positions)
+
+    def _index_entry(self, position: int, entry: Any) -> None:
+        english, chinese = self._entry_texts(entry)
+        if english is None:
+            return
+        self._english[position] = english
+        self._chinese[position] = chinese
+        _insert_sorted(self._eligible, position)
+        _add_posting(self._english_exact, english, position)
+        for gram in _english_grams(english):
+            _add_posting(self._english_postings, gram, position)
+        if chinese is not None:
+            _add_posting(self._chinese_exact, chinese, position)
+            for gram in _chinese_grams(chinese):
+                _add_posting(self._chinese_postings, gram, position)
+
+    def _unindex_entry(self, position: int) -> None:
+        english = self._english[position]
+        if english is None:
+            return
+        chinese = self._chinese[position]
+        _remove_sorted(self._eligible, position)
+        _remove_posting(self._english_exact, english, position)
+        for gram in _english_grams(english):
+            _remove_posting(self._english_postings, gram, position)
+        if chinese is not None:
+            _remove_posting(self._chinese_exact, chinese, position)
+            for gram in _chinese_grams(chinese):
+                _remove_posting(self._chinese_postings, gram, position)
+        self._english[position] = None
+        self._chinese[position] = None
+
+    def update_entry(self, position: int, entry: Any) -> bool:
+        """
+        Re-indexes the entry at `position` after it changed (or was appended).
+
+        Returns:
+            True if the searchable text changed, False if nothing had to be done.
+        """
+        while position >= len(self._english):
+            self._english.append(None)
+            self._chinese.append(None)
+        if self._entry_texts(entry) == (self._english[position], self._chinese[position]):
+            return False
+        self._unindex_entry(position)
+        self._index_entry(position, entry)
+        return True
+
+    def search(self, word: str) -> List[int]:
+        """
+        Returns the positions matching `word`, exact matches first and then
+        partial (substring) matches, each group in defaults order.
+        """
+        if is_chinese_query(word):
+            texts, exact_map, postings, query = self._chinese, self._chinese_exact, self._chinese_postings, word
+            grams = set(word) if len(word) == 1 else {word[i:i + 2] for i in range(len(word) - 1)}
+        else:
+            query = word.lower()
+            texts, exact_map, postings = self._english, self._english_exact, self._english_postings
+            grams = {query[i:i + 3] for i in range(len(query) - 2)}
+
+        exact = exact_map.get(query, ())
+        if not query:
+            candidates = self._eligible
+        elif grams:
+            candidates = self._intersect([postings.get(g) for g in grams])
+        else:
+            # 英文查询短于三元组：合并所有包含该查询的三元组的 posting
+            merged: Set[int] = set()
+            for key, posting in postings.items():
+                if query in key:
+                    merged.update(posting)
+            candidates = merged
+
+        exact_set = set(exact)
+        partial = [
+            p for p in sorted(candidates)
+            if p not in exact_set and texts[p] is not None and query in texts[p]
+        ]
+        return list(exact) + partial
+
+    def iter_search(self, word: str) -> Iterator[int]:
+        """
+        Yields the same positions as search(), in the same order, without
+        collecting them first: exact matches, then the shortest posting list
+        of the query's grams (or every searchable entry for very short
+        queries) is walked in defaults order and each candidate is checked by
+        substring. The first results arrive after a few checks however many
+        entries match in total.
+        """
+        if is_chinese_query(word):
+            texts, exact_map, postings, query = self._chinese, self._chinese_exact, self._chinese_postings, word
+            grams = set(word) if len(word) == 1 else {word[i:i + 2] for i in range(len(word) - 1)}
+        else:
+            query = word.lower()
+            texts, exact_map, postings = self._english, self._english_exact, self._english_postings
+            grams = {query[i:i + 3] for i in range(len(query) - 2)}
+
+        exact = exact_map.get(query, ())
+        yield from exact
+        if not query or not grams:
+            candidates: Iterable[int] = self._eligible
+        else:
+            posting_lists = [postings.get(g) for g in grams]
+            if any(p is None for p in posting_lists):
+                return
+            candidates = min(posting_lists, key=len)
+        exact_set = set(exact)
+        for p in candidates:
+            text = texts[p]
+            if text is not None and query in text and p not in exact_set:
+                yield p
+
+    @staticmethod
+    def _intersect(posting_lists: List[Optional[array]]) -> Iterable[int]:
+        if any(p is None for p in posting_lists):
+            return ()
+        posting_lists.sort(key=len)
+        candidates: Any = posting_lists[0]
+        for posting in posting_lists[1:]:
+            if len(candidates) <= _VERIFY_THRESHOLD:
+                break # 剩余的候选直接交给子串校验
+            candidates = set(candidates).intersection(posting)
+        return candidates
@@ -0,0 +1,73 @@
+# core/search_task.py
+import threading
+from typing import Callable, List, Optional
+
+FIRST_BATCH = 30  # 先交付的结果数量 (一页)
+
+
+class SearchTask:
+    """
+    Runs Data.iter_search_positions on a worker thread.
+
+    `on_first(task, positions)` is delivered once the first `first_batch`
+    positions exist (or the search ended with fewer), and
+    `on_done(task, positions)` with every position when the search
+    finishes. If the search raises (e.g. an entry edited on the main thread
+    changed the index mid-walk), `on_error(task, error)` is delivered
+    instead of `on_done`, so partial results are never reported as complete.
+    All go through `schedule(callback, *args)`, which the UI sets to hand
+    them to the main thread. A cancelled task stops at its next result and
+    delivers nothing more.
+    """
+
+    def __init__(self, data, word: str, on_first: Optional[Callable] = None,
+                 on_done: Optional[Callable] = None, first_batch: int = FIRST_BATCH,
+                 schedule: Optional[Callable] = None, on_error: Optional[Callable] = None):
+        self.data = data
+        self.word = word
+        self.on_first = on_first
+        self.on_done = on_done
+        self.on_error = on_error
+        self.first_batch = first_batch
+        self.schedule = schedule if schedule is not None else (lambda callback, *args: callback(*args))
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def start(self) -> 'SearchTask':
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _deliver(self, callback: Optional[Callable], *args) -> None:
+        if callback is not None and not self.cancelled:
+            self.schedule(callback, self, *args)
+
+    def _run(self) -> None:
+        positions: List[int] = []
+        first_sent = False
+        try:
+            for position in self.data.iter_search_positions(self.word):
+                if self.cancelled:
+                    return
+                positions.append(position)
+                if not first_sent and len(positions) >= self.first_batch:
+                    first_sent = True
+                    self._deliver(self.on_first, list(positions))
+        except Exception as e:
+            print(f"Error while searching for '{self.word}': {e}")
+            self._deliver(self.on_error, e)
+            return
+        if not first_sent:
+            self._deliver(self.on_first, list(positions))
+        self._deliver(self.on_done, positions)
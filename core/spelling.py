@@ -0,0 +1,245 @@
+# core/spelling.py
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# 拼写纠错 (“你是不是要找”)：SymSpell 对称删除索引。
+# 每个英文词头 (小写) 取前 PREFIX_LENGTH 个字符，生成删除至多 MAX_DISTANCE 个字符后的所有变体；
+# 查询词做同样的删除，两边有相同变体的词才是候选，再用 OSA 编辑距离 (允许相邻交换) 核对。
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+# 变体不直接存字符串 (十万词头约有近两百万个变体)：存 crc32 和条目位置两列按哈希排序的
+# uint32 数组，查询时二分查找。哈希冲突只会多出候选，核对编辑距离时会被排除。
+# Header: magic, format version, max distance, prefix length, defaults count,
+# number of (hash, position) pairs, source fingerprint (size, mtime_ns) of the defaults file.
+_HEADER = struct.Struct('<4sHBBIIQQ')
+_MAGIC = b'WPSP'
+_VERSION = 1
+_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def normalise(word: Any) -> Optional[str]:
+    """Lower-cased, stripped headword, or None if there is nothing to index."""
+    if not isinstance(word, str):
+        return None
+    word = word.strip().lower()
+    return word or None
+
+
+def deletes(word: str, max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH) -> Set[str]:
+    """The word's prefix and every string made by deleting up to `max_distance` characters from it."""
+    word = word[:prefix_length]
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+def _hash(text: str) -> int:
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def osa_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus adjacent
+    transpositions). Returns max_distance + 1 as soon as the distance is
+    known to exceed max_distance.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2: Optional[List[int]] = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        ca = a[i - 1]
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and ca == b[j - 2] and a[i - 2] == cb):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class SpellingIndex:
+    """
+    SymSpell lookup over the English headwords of the defaults list.
+
+    The deletion neighbourhood is stored as two parallel uint32 arrays
+    (hash of the variant, defaults position) sorted by hash, which is
+    compact enough to keep in memory and to save next to the dictionary.
+    Candidates are verified against the current text of each entry, so an
+    entry whose headword changed after the index was built simply stops
+    matching; new headwords go to a small in-memory overlay.
+    """
+
+    def __init__(self, keys: array, positions: array,
+                 max_distance: int = MAX_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.keys = keys
+        self.positions = positions
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._overlay: Dict[int, List[int]] = {}  # 变体哈希 -> 建立索引后新增的位置
+
+    @classmethod
+    def build(cls, words: Sequence[Any], max_distance: int = MAX_DISTANCE,
+              prefix_length: int = PREFIX_LENGTH) -> 'SpellingIndex':
+        """
+        Builds the index over a column of English headwords.
+
+        Args:
+            words: English text per defaults position (non-strings are skipped).
+        """
+        packed: List[int] = []
+        cache: Dict[str, Set[int]] = {}  # 同一个前缀的变体只算一次
+        for position in range(len(words)):
+            word = normalise(words[position])
+            if word is None:
+                continue
+            prefix = word[:prefix_length]
+            hashes = cache.get(prefix)
+            if hashes is None:
+                hashes = cache[prefix] = {_hash(d) for d in deletes(prefix, max_distance, prefix_length)}
+            packed.extend((h << 32) | position for h in hashes)
+        packed.sort()
+        keys = array(_TYPECODE, (value >> 32 for value in packed))
+        positions = array(_TYPECODE, (value & 0xFFFFFFFF for value in packed))
+        return cls(keys, positions, max_distance, prefix_length)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, position: int, word: Any) -> None:
+        """Indexes a headword that changed (or was added) after the index was built."""
+        word = normalise(word)
+        if word is None or position in self._positions_of(word[:self.prefix_length]):
+            return  # 词头没变 (例如只是计数更新)
+        for d in deletes(word, self.max_distance, self.prefix_length):
+            self._overlay.setdefault(_hash(d), []).append(position)
+
+    def _positions_of(self, variant: str) -> List[int]:
+        """Positions indexed under one deletion variant."""
+        h = _hash(variant)
+        keys = self.keys
+        lo = bisect_left(keys, h)
+        hi = lo
+        while hi < len(keys) and keys[hi] == h:
+            hi += 1
+        return list(self.positions[lo:hi]) + self._overlay.get(h, [])
+
+    def candidates(self, query: str) -> Iterable[int]:
+        """Positions whose headword shares a deletion variant with the query (unverified)."""
+        for d in deletes(query, self.max_distance, self.prefix_length):
+            yield from self._positions_of(d)
+
+    def lookup(self, query: Any, words: Sequence[Any], k: int = 5,
+               rank: Optional[Callable[[int], int]] = None,
+               max_distance: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Closest headwords to a (possibly misspelled) query.
+
+        Args:
+            query: The word typed by the user.
+            words: Current English text per defaults position.
+            k: Number of results.
+            rank: Tie-break score of a position (higher first), e.g. its inquiry counter.
+            max_distance: Maximum edit distance (defaults to the index's).
+
+        Returns:
+            Up to k (position, distance), closest first, then by rank.
+        """
+        query = normalise(query)
+        if query is None or k <= 0:
+            return []
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        found: Dict[int, int] = {}
+        distances: Dict[str, int] = {}  # 同一个词头只算一次距离
+        for position in self.candidates(query):
+            if position in found:
+                continue
+            word = normalise(words[position]) if position < len(words) else None
+            if word is None:
+                continue
+            distance = distances.get(word)
+            if distance is None:
+                distance = distances[word] = osa_distance(query, word, limit)
+            if distance <= limit:
+                found[position] = distance
+        score = rank if rank is not None else (lambda position: 0)
+        ordered = sorted(found.items(), key=lambda item: (item[1], -score(item[0]), item[0]))
+        return ordered[:k]
+
+    def save(self, path: str, count: int, source: Tuple[int, int]) -> bool:
+        """
+        Writes the index next to the dictionary (atomically).
+
+        Args:
+            count: Number of defaults positions the index was built for.
+            source: Fingerprint of the defaults file it was built from.
+        """
+        tmp_path = path + '.tmp'
+        keys, positions = self.keys, self.positions
+        if sys.byteorder != 'little':
+            keys, positions = array(_TYPECODE, keys), array(_TYPECODE, positions)
+            keys.byteswap()
+            positions.byteswap()
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _VERSION, self.max_distance, self.prefix_length,
+                                     count, len(keys), *source))
+                keys.tofile(f)
+                positions.tofile(f)
+            os.replace(tmp_path, path)
+            return True
+        except OSError as e:
+            print(f"Error saving spelling index {path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, path: str, count: int, source: Tuple[int, int]) -> Optional['SpellingIndex']:
+        """
+        Reads a saved index.
+
+        Returns:
+            The index, or None if the file is missing, malformed, or was built
+            for a different defaults list (count or source fingerprint differ).
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return None
+                magic, version, max_distance, prefix_length, saved_count, pairs, size, mtime = _HEADER.unpack(header)
+                if (magic != _MAGIC or version != _VERSION or saved_count != count
+                        or (size, mtime) != tuple(source)):
+                    return None
+                keys = array(_TYPECODE)
+                positions = array(_TYPECODE)
+                keys.fromfile(f, pairs)
+                positions.fromfile(f, pairs)
+        except (OSError, EOFError, struct.error) as e:
+            print(f"Error loading spelling index {path}: {e}")
+            return None
+        if sys.byteorder != 'little':
+            keys.byteswap()
+            positions.byteswap()
+        return cls(keys, positions, max_distance, prefix_length)
@@ -0,0 +1,179 @@
+# core/stats.py
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# 每个条目的计数器字段，顺序即二进制记录中的顺序
+STATS_FIELDS = ('inquiry', 'memory', 'mistake')
+
+# Header: magic, format version, record size, record count, write generation,
+# size and mtime_ns of the defaults.json the records were migrated from.
+_HEADER = struct.Struct('<4sHHIIQQ')
+_RECORD = struct.Struct('<' + 'I' * len(STATS_FIELDS))
+_MAGIC = b'WPST'
+_VERSION = 1
+_MAX_COUNTER = 0xFFFFFFFF
+
+# array 类型码：4 字节无符号整数，与记录中的 uint32 对应
+COUNTER_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+def clamp_counter(value: Any) -> int:
+    """Coerces a counter value from JSON into the uint32 range of a record."""
+    try:
+        value = int(value)
+    except (ValueError, TypeError):
+        return 0
+    return min(max(value, 0), _MAX_COUNTER)
+
+
+class StatsStore:
+    """
+    Fixed-width, memory-mapped store for the counters of 'defaults.json'.
+
+    The file holds one record of uint32 counters (see STATS_FIELDS) per
+    defaults position, so updating an entry's counters rewrites only that
+    record in place instead of re-serialising the whole defaults list.
+    """
+
+    def __init__(self, path: str, file_obj, mapping: mmap.mmap):
+        self.path = path
+        self._file = file_obj
+        self._map = mapping
+        self.count = _HEADER.unpack_from(mapping, 0)[3]
+
+    @classmethod
+    def create(cls, path: str, rows: Iterable[Tuple[int, ...]], count: int,
+               source: Tuple[int, int] = (0, 0)) -> 'StatsStore':
+        """
+        Writes a new stats file from an iterable of counter tuples and opens it.
+        The file is written to a temporary path and renamed into place, so an
+        interrupted migration never leaves a half-written store behind.
+
+        Args:
+            path: Target path of the stats file.
+            rows: One tuple of counters per defaults position.
+            count: Number of rows (must match the length of `rows`).
+            source: (size, mtime_ns) of the JSON file the rows came from.
+        """
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, _RECORD.size, count, 0, *source))
+            buffer = bytearray()
+            for row in rows:
+                buffer += _RECORD.pack(*(clamp_counter(v) for v in row))
+                if len(buffer) >= 1 << 16:
+                    f.write(buffer)
+                    buffer.clear()
+            f.write(buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        store = cls.open(path, expected_count=count)
+        if store is None:
+            raise IOError(f"Stats file '{path}' could not be reopened after creation.")
+        return store
+
+    @classmethod
+    def open(cls, path: str, expected_count: Optional[int] = None) -> Optional['StatsStore']:
+        """
+        Opens an existing stats file.
+
+        Returns:
+            The store, or None if the file is missing, malformed, or does not
+            hold `expected_count` records.
+        """
+        if not os.path.exists(path):
+            return None
+        f = None
+        try:
+            f = open(path, 'r+b')
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                f.close()
+                return None
+            mapping = mmap.mmap(f.fileno(), 0)
+        except (OSError, ValueError) as e:
+            print(f"Error opening stats file {path}: {e}")
+            if f is not None:
+                f.close()
+            return None
+
+        magic, version, record_size, count, _, _, _ = _HEADER.unpack_from(mapping, 0)
+        valid = (
+            magic == _MAGIC and version == _VERSION and record_size == _RECORD.size
+            and size == _HEADER.size + count * _RECORD.size
+            and (expected_count is None or count == expected_count)
+        )
+        if not valid:
+            mapping.close()
+            f.close()
+            return None
+        return cls(path, f, mapping)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, position: int) -> int:
+        if not 0 <= position < self.count:
+            raise IndexError(f"Stats position {position} out of range (count={self.count}).")
+        return _HEADER.size + position * _RECORD.size
+
+    def read(self, position: int) -> Tuple[int, ...]:
+        """Returns the counters stored for a defaults position."""
+        return _RECORD.unpack_from(self._map, self._offset(position))
+
+    def read_columns(self) -> Dict[str, array]:
+        """
+        Reads every record at once and splits them into one array per counter
+        field, indexed by defaults position.
+        """
+        flat = array(COUNTER_TYPECODE)
+        flat.frombytes(self._map[_HEADER.size:_HEADER.size + self.count * _RECORD.size])
+        if sys.byteorder != 'little':
+            flat.byteswap()
+        width = len(STATS_FIELDS)
+        return {field: flat[i::width] for i, field in enumerate(STATS_FIELDS)}
+
+    def write(self, position: int, values: Iterable[Any]) -> None:
+        """Overwrites the counters of a defaults position in place."""
+        _RECORD.pack_into(self._map, self._offset(position), *(clamp_counter(v) for v in values))
+        self._bump_generation()
+
+    def _bump_generation(self) -> None:
+        fields = list(_HEADER.unpack_from(self._map, 0))
+        fields[4] = (fields[4] + 1) & _MAX_COUNTER
+        _HEADER.pack_into(self._map, 0, *fields)
+
+    @property
+    def generation(self) -> int:
+        """Counter incremented on every record write; lets readers detect changes."""
+        return _HEADER.unpack_from(self._map, 0)[4]
+
+    @property
+    def source(self) -> Tuple[int, int]:
+        """(size, mtime_ns) of the defaults.json the records are in sync with."""
+        return _HEADER.unpack_from(self._map, 0)[5:7]
+
+    def set_source(self, size: int, mtime_ns: int) -> None:
+        """Records that the store is in sync with a (re)written defaults.json."""
+        fields = list(_HEADER.unpack_from(self._map, 0))
+        fields[5], fields[6] = size, mtime_ns
+        _HEADER.pack_into(self._map, 0, *fields)
+
+    def flush(self) -> None:
+        """Flushes dirty pages of the mapping to disk."""
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,152 @@
+# core/suggest.py
+import heapq
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.search_index import is_chinese_query
+
+# 前缀范围超过该大小时缓存其 top-k 结果（如单字母前缀）
+_MEMO_MIN_RANGE = 512
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with `prefix`."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class _SortedKeys:
+    """Sorted array of (key, position) pairs supporting prefix range queries."""
+
+    def __init__(self, pairs: List[Tuple[str, int]]):
+        pairs.sort()
+        self.keys: List[str] = [k for k, _ in pairs]
+        self.positions = array('I', (p for _, p in pairs))
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, _prefix_upper_bound(prefix), lo)
+        return lo, hi
+
+    def insert(self, key: str, position: int) -> None:
+        i = bisect_left(self.keys, key)
+        # 相同 key 按位置排序，保持与构建时一致
+        while i < len(self.keys) and self.keys[i] == key and self.positions[i] < position:
+            i += 1
+        self.keys.insert(i, key)
+        self.positions.insert(i, position)
+
+    def remove(self, key: str, position: int) -> None:
+        i = bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.positions[i] == position:
+                del self.keys[i]
+                self.positions.pop(i)
+                return
+            i += 1
+
+
+class PrefixIndex:
+    """
+    Prefix structure for search-as-you-type suggestions.
+
+    Lower-cased English headwords and Chinese strings are kept in sorted
+    arrays; a prefix maps to a contiguous range found with bisect, and the
+    top-k entries of that range by `inquiry` are picked with a heap.
+    """
+
+    def __init__(self, entries: Sequence[Any], rank: Optional[Callable[[int], int]] = None):
+        """
+        Args:
+            entries: The defaults list (positions = list order).
+            rank: Returns the ranking score of a position; defaults to the
+                  entry's 'inquiry' counter.
+        """
+        self._entries = entries
+        self._rank = rank or self._inquiry
+        self._english_of: Dict[int, str] = {}
+        self._chinese_of: Dict[int, str] = {}
+        self._memo: Dict[Tuple[str, int], List[int]] = {}
+        english_pairs, chinese_pairs = [], []
+        for position, entry in enumerate(entries):
+            english, chinese = self._entry_keys(entry)
+            if english:
+                english_pairs.append((english, position))
+                self._english_of[position] = english
+            if chinese:
+                chinese_pairs.append((chinese, position))
+                self._chinese_of[position] = chinese
+        self._english = _SortedKeys(english_pairs)
+        self._chinese = _SortedKeys(chinese_pairs)
+
+    def _inquiry(self, position: int) -> int:
+        entry = self._entries[position]
+        return entry.get('inquiry', 0) if isinstance(entry, Mapping) else 0
+
+    @staticmethod
+    def _entry_keys(entry: Any) -> Tuple[Optional[str], Optional[str]]:
+        if not isinstance(entry, Mapping):
+            return None, None
+        english = entry.get('english')
+        chinese = entry.get('chinese')
+        return (
+            english.lower() if isinstance(english, str) else None,
+            chinese if isinstance(chinese, str) else None,
+        )
+
+    def suggest(self, prefix: str, k: int = 8) -> List[int]:
+        """
+        Returns up to `k` positions whose headword starts with `prefix`, highest
+        `inquiry` first (ties keep alphabetical order).
+        """
+        if not prefix or k <= 0:
+            return []
+        if is_chinese_query(prefix):
+            keys, query = self._chinese, prefix
+        else:
+            keys, query = self._english, prefix.lower()
+
+        lo, hi = keys.prefix_range(query)
+        if hi - lo <= k:
+            candidates = keys.positions[lo:hi]
+            return sorted(candidates, key=self._rank, reverse=True) if len(candidates) > 1 else list(candidates)
+
+        memo_key = (query, k)
+        if hi - lo >= _MEMO_MIN_RANGE:
+            cached = self._memo.get(memo_key)
+            if cached is not None:
+                return list(cached)
+
+        result = heapq.nlargest(k, keys.positions[lo:hi], key=self._rank)
+        if hi - lo >= _MEMO_MIN_RANGE:
+            self._memo[memo_key] = result
+        return list(result)
+
+    def update_entry(self, position: int) -> None:
+        """
+        Refreshes the keys of the entry at `position` and drops the memoised
+        rankings of prefixes it falls under (its text or `inquiry` may have
+        changed).
+        """
+        if not 0 <= position < len(self._entries):
+            self._memo.clear()
+            return
+        english, chinese = self._entry_keys(self._entries[position])
+        affected = [key for key in (english, chinese, self._english_of.get(position),
+                                    self._chinese_of.get(position)) if key]
+        for memo_key in [m for m in self._memo if any(a.startswith(m[0]) for a in affected)]:
+            del self._memo[memo_key]
+        for keys, known, new_key in (
+            (self._english, self._english_of, english),
+            (self._chinese, self._chinese_of, chinese),
+        ):
+            old_key = known.get(position)
+            if old_key == new_key:
+                continue
+            if old_key is not None:
+                keys.remove(old_key, position)
+                del known[position]
+            if new_key:
+                keys.insert(new_key, position)
+                known[position] = new_key
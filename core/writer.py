@@ -0,0 +1,178 @@
+# core/writer.py
+import hashlib
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 持久化级别：none 只做原子替换；fsync 先把临时文件刷到磁盘；
+# fsync+dir 再刷新目录，保证改名本身在断电后也存在
+DURABILITY_NONE = 'none'
+DURABILITY_FSYNC = 'fsync'
+DURABILITY_FSYNC_DIR = 'fsync+dir'
+DURABILITY_LEVELS = (DURABILITY_NONE, DURABILITY_FSYNC, DURABILITY_FSYNC_DIR)
+
+
+def _fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+def atomic_write(path: str, data: bytes, durability: str = DURABILITY_FSYNC) -> None:
+    """
+    Replaces `path` with `data` atomically: the bytes go to a temporary file in
+    the same directory, which is then renamed over the target. A crash leaves
+    either the old or the new file, never a truncated one.
+
+    Raises:
+        OSError: If the file cannot be written or renamed.
+    """
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            if durability != DURABILITY_NONE:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if durability == DURABILITY_FSYNC_DIR:
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        except OSError:
+            return # 某些平台 (Windows) 不能打开目录，改名已经完成
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+class WriteScheduler:
+    """
+    Coalescing, debounced writer for lexicon files.
+
+    Callers `defer` a commit callable per path; repeated defers for the same
+    path before the flush replace each other, so a burst of edits costs one
+    write. Pending commits run after `delay` seconds through the injected
+    `schedule(callback, delay)` function (e.g. kivy's Clock.schedule_once),
+    or immediately when no scheduler is set. `write` performs the atomic
+    replacement and skips content whose hash matches what is already on disk.
+    """
+
+    def __init__(self, delay: float = 0.0, durability: str = DURABILITY_FSYNC,
+                 schedule: Optional[Callable[[Callable[..., Any], float], Any]] = None):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level '{durability}', expected one of {DURABILITY_LEVELS}.")
+        self.delay = delay
+        self.durability = durability
+        self._schedule = schedule
+        self._event = None
+        self._pending: Dict[str, Callable[[], bool]] = {}
+        # path -> (content digest, file fingerprint right after it was written/read)
+        self._known: Dict[str, Tuple[bytes, Tuple[int, int]]] = {}
+        self.bytes_written = 0
+        self.writes = 0
+        self.skipped = 0
+
+    @staticmethod
+    def _digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def remember(self, path: str, data: bytes) -> None:
+        """Records the content just read from `path`, so saving it back unchanged is skipped."""
+        fingerprint = _fingerprint(path)
+        if fingerprint is not None:
+            self._known[path] = (self._digest(data), fingerprint)
+
+    def forget(self, path: str) -> None:
+        self._known.pop(path, None)
+
+    def write(self, path: str, data: bytes) -> bool:
+        """
+        Atomically writes `data` to `path` unless the file already holds exactly
+        this content (same digest and untouched since we last wrote or read it).
+
+        Returns:
+            True if the file holds `data` afterwards, False on error.
+        """
+        digest = self._digest(data)
+        known = self._known.get(path)
+        if known is not None and known[0] == digest and known[1] == _fingerprint(path):
+            self.skipped += 1
+            return True
+        try:
+            atomic_write(path, data, self.durability)
+        except OSError as e:
+            print(f"Error writing to file {path}: {e}")
+            self._known.pop(path, None)
+            return False
+        self.writes += 1
+        self.bytes_written += len(data)
+        fingerprint = _fingerprint(path)
+        if fingerprint is not None:
+            self._known[path] = (digest, fingerprint)
+        return True
+
+    def defer(self, path: str, commit: Callable[[], bool]) -> None:
+        """
+        Schedules `commit` (which performs the actual write of `path`) to run at
+        the next flush, replacing any commit already pending for that path.
+        """
+        self._pending[path] = commit
+        if self._schedule is None or self.delay <= 0:
+            self.flush(path)
+        elif self._event is None:
+            self._event = self._schedule(self._on_timer, self.delay)
+
+    def _on_timer(self, *args) -> None:
+        self._event = None
+        self.flush()
+
+    def is_pending(self, path: str) -> bool:
+        return path in self._pending
+
+    def cancel(self, path: str) -> None:
+        """Drops the pending commit of `path` (e.g. before the file is deleted)."""
+        self._pending.pop(path, None)
+
+    def rename(self, old_path: str, new_path: str) -> None:
+        """Carries the known digest of a renamed file over to its new path."""
+        known = self._known.pop(old_path, None)
+        if known is not None:
+            self._known[new_path] = known
+
+    def flush(self, path: Optional[str] = None) -> bool:
+        """
+        Runs pending commits now: all of them, or only the one for `path`.
+
+        A commit that fails stays pending and is retried at the next flush.
+
+        Returns:
+            True if every commit succeeded, False otherwise.
+        """
+        if path is not None:
+            commit = self._pending.pop(path, None)
+            if commit is None or commit():
+                return True
+            self._pending.setdefault(path, commit)
+            return False
+        failed: Dict[str, Callable[[], bool]] = {}
+        while self._pending:
+            pending_path = next(iter(self._pending))
+            commit = self._pending.pop(pending_path)
+            if not commit():
+                failed[pending_path] = commit
+        for pending_path, commit in failed.items():
+            self._pending.setdefault(pending_path, commit)
+        if self._event is not None and hasattr(self._event, 'cancel'):
+            self._event.cancel()
+        self._event = None
+        return not failed
@@ -1,7 +1,9 @@
 # main.py
 import os
+import threading
 # Kivy setup
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.core.text import LabelBase
 # from kivy.core.window import Window
 # from kivy.utils import platform
@@ -14,36 +16,108 @@ LabelBase.register(name='Roboto', fn_regular=font_path)
 # --- 导入核心逻辑和主屏幕 ---
 from core.lexicon import Lexicon
 from core.data import Data
+from core.writer import WriteScheduler, DURABILITY_FSYNC
 from screens.main_screen import MainScreen
+from ui_elements.buttons import set_lite_mode
+from ui_elements.labels import reset_text_cache
+
+# --- 词库文件写入：连续修改合并后延迟写入，原子替换 ---
+LEXICON_WRITE_DELAY = 2.0            # 秒
+LEXICON_WRITE_DURABILITY = DURABILITY_FSYNC  # 'none' / 'fsync' / 'fsync+dir'
+
+# --- 按钮轻量渲染：不用 Animation，波纹按容器共享 (低端设备上打开) ---
+BUTTON_LITE_MODE = False
 
 class WordApp(App):
     def build(self):
-        """构建主界面并初始化共享的数据实例"""
-        # --- 创建共享实例 ---
+        """构建主界面，并在后台线程加载共享的数据实例"""
+        set_lite_mode(BUTTON_LITE_MODE)
+        self.shared_lexicon = None
+        self.shared_data = None
+
+        # 主菜单立即显示，加载进度显示在菜单上方；需要数据的界面在对应的加载步骤完成前保持锁定
+        self.main_screen = MainScreen(
+            lexicon_instance=None,
+            data_instance=None,
+            app_instance=self
+        )
+        writer = WriteScheduler(
+            delay=LEXICON_WRITE_DELAY,
+            durability=LEXICON_WRITE_DURABILITY,
+            schedule=Clock.schedule_once,
+        )
+        threading.Thread(target=self._load_dictionary, args=(writer,), daemon=True).start()
+        return self.main_screen
+
+    def _load_dictionary(self, writer):
+        """后台线程：先加载词典，再建立搜索索引；每一步完成后回到主线程解锁对应的按钮"""
         try:
-            self.shared_lexicon = Lexicon()  # Lexicon 初始化时会加载 defaults
+            lexicon = Lexicon(writer=writer)  # Lexicon 初始化时会加载 defaults
         except FileNotFoundError as e:
-             print(f"严重错误: 初始化 Lexicon 时出错 - {e}")
-             # 可能需要显示错误弹窗并退出
-             # self.show_error_popup_and_exit(f"无法找到 Lexicon 目录或文件: {e}")
-             return None # 返回 None 会导致应用退出
+            self._report_load_error(f"无法找到词库目录或文件:\n{e}")
+            return
+        except Exception as e:  # 包括低端设备上的 MemoryError
+            self._report_load_error(f"加载词典时出错:\n{e}")
+            return
 
         # 检查 Lexicon 是否成功加载了 defaults
-        if not self.shared_lexicon.defaults:
-             print("严重错误: Lexicon 未能加载 defaults.json。应用可能无法正常工作。")
-             # self.show_error_popup_and_exit("无法加载核心词库文件 (defaults.json)。")
-             return None
-
-        # 创建 Data 实例，并传入共享的 Lexicon 实例
-        self.shared_data = Data(self.shared_lexicon)
-
-        # --- 传递共享实例给主屏幕 ---
-        main_screen = MainScreen(
-            lexicon_instance=self.shared_lexicon,
-            data_instance=self.shared_data,
-            app_instance=self
-        )
-        return main_screen
+        if not lexicon.defaults:
+            self._report_load_error("无法加载核心词库文件 (defaults.json)。")
+            return
+
+        try:
+            # 创建 Data 实例，并传入共享的 Lexicon 实例
+            data = Data(lexicon)
+        except Exception as e:
+            self._report_load_error(f"加载词典时出错:\n{e}")
+            return
+        Clock.schedule_once(lambda dt: self._on_dictionary_loaded(lexicon, data))
+
+        try:
+            indexes = data.prepare_indexes()
+        except Exception as e:
+            self._report_load_error(f"建立搜索索引时出错:\n{e}")
+            return
+        Clock.schedule_once(lambda dt: self._on_indexes_built(indexes))
+
+        # 拼写纠错索引：从文件加载，词典改变后的第一次启动才重新建立 (只在查询无结果时用到)
+        try:
+            spelling_index = data.prepare_spelling_index()
+        except Exception as e:
+            self._report_load_error(f"拼写纠错索引不可用 (不影响查询):\n{e}")
+            return
+        Clock.schedule_once(lambda dt: data.install_spelling_index(spelling_index))
+
+    def _report_load_error(self, message):
+        """后台线程中的加载错误：打印并在主线程显示在主菜单上 (线程随后结束)"""
+        print(f"错误: {message}")
+        Clock.schedule_once(lambda dt: self.main_screen.show_load_error(message))
+
+    def _on_dictionary_loaded(self, lexicon, data):
+        self.shared_lexicon = lexicon
+        self.shared_data = data
+        self.main_screen.set_dictionary(lexicon, data)
+
+    def _on_indexes_built(self, indexes):
+        self.shared_data.install_indexes(indexes)
+        self.main_screen.mark_ready('search')
+
+    def on_pause(self):
+        """切到后台时立即写入尚未保存的词库修改 (系统可能直接结束进程)"""
+        lexicon = getattr(self, 'shared_lexicon', None)
+        if lexicon:
+            lexicon.flush()
+        return True
+
+    def on_resume(self):
+        """回到前台后 GL 上下文可能已重建：缓存的文字纹理要重新渲染"""
+        Clock.schedule_once(reset_text_cache)
+
+    def on_stop(self):
+        """应用退出时写入未保存的修改，并关闭统计文件"""
+        lexicon = getattr(self, 'shared_lexicon', None)
+        if lexicon:
+            lexicon.close()
 
     # (可选) 添加一个错误弹窗方法
     # def show_error_popup_and_exit(self, message):
@@ -6,7 +6,6 @@ from kivy.uix.textinput import TextInput
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.popup import Popup
-from kivy.uix.checkbox import CheckBox
 from kivy.clock import Clock
 
 # 不再需要导入 core.Lexicon
@@ -14,6 +13,7 @@ from kivy.clock import Clock
 from core.data import Data
 from ui_elements.buttons import RoundButton
 from ui_elements.labels import create_wrapped_label
+from ui_elements.lists import EntryListView, SelectableEntryRow
 from utils.popups import show_message, show_confirmation
 
 # 常量定义
@@ -41,7 +41,7 @@ class LexiconScreen(BoxLayout):
         self.lexicons_available = []  # 将在 show_lexicon_list_view 中填充
         self.current_lexicon_name = None
         self.all_entries_in_view = []
-        self.sort_option = ('alphabetical', False)  # 默认按中文正序 (来自 Data.sort_entries)
+        self.sort_option = ('alphabetical', False)  # 默认按中文拼音正序 (来自 Data.get_sort_options)
 
         # 分页状态
         self.current_page = 0
@@ -55,29 +55,77 @@ class LexiconScreen(BoxLayout):
         self.prev_btn = None
         self.next_btn = None
         self.footer = None  # 页脚容器
+        self._saved_scroll_y = 1  # 离开界面时条目列表的滚动位置
 
         # 启动流程
         self.show_lexicon_list_view()
 
-    def _create_main_layout(self):
-        """Creates the basic structure with header, scrollview, and footer."""
+    def _create_main_layout(self, entry_list=False):
+        """
+        Creates the basic structure with header, scrollview, and footer.
+        With `entry_list`, the content area is a recycling EntryListView
+        (widgets only for the visible rows) instead of a GridLayout.
+        """
+        self._release_entry_rows()
         self.clear_widgets()
 
         # Header (e.g., for title or actions) - Optional
         # header = BoxLayout(size_hint_y=None, height=50)
         # self.add_widget(header)
 
-        # Scroll View for content
-        self.scroll_view = ScrollView(size_hint=(1, 1)) # Takes most space
-        self.grid_layout = GridLayout(cols=1, size_hint_y=None, spacing=5)
-        self.grid_layout.bind(minimum_height=self.grid_layout.setter('height'))
-        self.scroll_view.add_widget(self.grid_layout)
-        self.add_widget(self.scroll_view)
+        if entry_list:
+            self.grid_layout = None
+            self.scroll_view = EntryListView(
+                format_row=self._format_entry_row,
+                row_height=BUTTON_HEIGHT_NORMAL,
+                on_row_press=self.show_lexicon_entry_details_popup,
+                row_colors=(EVEN_COLOR, ODD_COLOR),
+                size_hint=(1, 1)
+            )
+            self.add_widget(self.scroll_view)
+        else:
+            # Scroll View for content
+            self.scroll_view = ScrollView(size_hint=(1, 1)) # Takes most space
+            self.grid_layout = GridLayout(cols=1, size_hint_y=None, spacing=5)
+            self.grid_layout.bind(minimum_height=self.grid_layout.setter('height'))
+            self.scroll_view.add_widget(self.grid_layout)
+            self.add_widget(self.scroll_view)
 
         # Footer (e.g., for main action buttons)
         self.footer = BoxLayout(size_hint_y=None, height=BUTTON_HEIGHT_LARGE, spacing=10)
         self.add_widget(self.footer)
 
+    def _release_entry_rows(self):
+        """Hands the entry list's row widgets back to the shared pool when the view closes."""
+        if isinstance(self.scroll_view, EntryListView):
+            self.scroll_view.release_rows()
+
+    def on_parent(self, instance, parent):
+        # 离开词库界面时归还行控件 (记住滚动位置，返回时恢复)
+        if parent is None:
+            if isinstance(self.scroll_view, EntryListView):
+                self._saved_scroll_y = self.scroll_view.scroll_y
+            self._release_entry_rows()
+
+    def on_reenter(self):
+        """
+        Called by MainScreen when this cached screen is shown again: rebuilds
+        the lexicon list (lexicons may have been created from the query
+        screen), or reloads the open lexicon and restores its page and scroll
+        position.
+        """
+        if self.current_lexicon_name is None:
+            self.show_lexicon_list_view()
+            return
+        if self.current_lexicon_name not in self.lexicon.get_lexicon_list():
+            self.show_lexicon_list_view()
+            return
+        page = self.current_page
+        self._load_and_sort_entries()
+        self.current_page = min(page, self.total_pages - 1)
+        self._display_current_entry_page()
+        self.scroll_view.scroll_y = self._saved_scroll_y
+
     def show_lexicon_list_view(self):
         """Displays the list of available lexicons."""
         self._create_main_layout()
@@ -119,7 +167,7 @@ class LexiconScreen(BoxLayout):
     def show_lexicon_entries_view(self, instance):
         """Displays entries within a selected lexicon with pagination."""
         self.current_lexicon_name = instance.lexicon_name
-        self._create_main_layout() # Rebuild layout for entry view
+        self._create_main_layout(entry_list=True) # Rebuild layout for entry view
 
         # 添加分页控件
         pagination_height = 60
@@ -162,11 +210,8 @@ class LexiconScreen(BoxLayout):
     def _load_and_sort_entries(self):
         """Loads entries for the current lexicon and applies sorting."""
         try:
-            # --- 使用 self.lexicon 获取条目 ---
-            all_entries = self.lexicon.get_lexicon_entries(self.current_lexicon_name)
-            # --- 使用 self.data 排序 (静态方法) ---
-            self.all_entries_in_view = Data.sort_entries(all_entries, *self.sort_option)
-            # 或者如果 sort_entries 需要实例: self.data.sort_entries(...)
+            # 按缓存的全表排列筛选出本词库的条目；只有显示的那一页才会创建条目视图
+            self.all_entries_in_view = self.data.sort_lexicon_entries(self.current_lexicon_name, *self.sort_option)
         except Exception as e:
             self.all_entries_in_view = []
             show_message(f"加载或排序词库 '{self.current_lexicon_name}' 时出错:\n{e}", title="错误")
@@ -176,42 +221,27 @@ class LexiconScreen(BoxLayout):
         self.total_pages = (len(self.all_entries_in_view) + self.results_per_page - 1) // self.results_per_page
         self.total_pages = max(1, self.total_pages) # Ensure at least 1 page
 
+    @staticmethod
+    def _format_entry_row(entry):
+        # Use a simpler format for the list button
+        btn_text = f"中: {entry.get('chinese', '')[:15]} | 英: {entry.get('english', '')[:20]}"
+        if len(btn_text) > 38: btn_text = btn_text[:35] + "..."
+        return btn_text
+
     def _display_current_entry_page(self):
-        """Clears and repopulates the grid with the current page's entries."""
-        self.grid_layout.clear_widgets()
+        """Shows the current page's entries in the recycling list (rows are rebound, not rebuilt)."""
         start = self.current_page * self.results_per_page
         end = start + self.results_per_page
-        current_entries_page = self.all_entries_in_view[start:end]
-
-        if not current_entries_page:
-            self.grid_layout.add_widget(Label(text="此词库为空", size_hint_y=None, height=100))
-        else:
-            for index, entry in enumerate(current_entries_page):
-                bg_color = EVEN_COLOR if index % 2 == 0 else ODD_COLOR
-                # Use a simpler format for the list button
-                btn_text = f"中: {entry.get('chinese', '')[:15]} | 英: {entry.get('english', '')[:20]}"
-                if len(btn_text) > 38: btn_text = btn_text[:35] + "..."
-
-                button = RoundButton(
-                    text=btn_text,
-                    size_hint_y=None,
-                    height=BUTTON_HEIGHT_NORMAL,
-                    bg_color=bg_color,
-                    halign='left', padding=(10, 5) # Align left
-                )
-                button.entry_data = entry # Store data
-                # Link to the *specific* detail popup for this screen
-                button.bind(on_press=lambda btn, ent=entry: self.show_lexicon_entry_details_popup(ent))
-                self.grid_layout.add_widget(button)
-
+        self.scroll_view.set_entries(self.all_entries_in_view[start:end])
         self._update_entry_pagination_controls()
-        if self.scroll_view:
-             self.scroll_view.scroll_y = 1 # Scroll to top
 
     def _update_entry_pagination_controls(self):
         """Updates pagination buttons based on current page and total pages."""
         if self.page_label:
-            self.page_label.text = f"{self.current_page + 1} / {self.total_pages}"
+            if self.all_entries_in_view:
+                self.page_label.text = f"{self.current_page + 1} / {self.total_pages}"
+            else:
+                self.page_label.text = "此词库为空"
         if self.prev_btn:
             self.prev_btn.disabled = self.current_page <= 0
         if self.next_btn:
@@ -331,37 +361,29 @@ class LexiconScreen(BoxLayout):
             return
 
         content = BoxLayout(orientation='vertical', spacing=5)
-        content.add_widget(Label(text="选择要删除的条目:", size_hint_y=None, height=40))
-
-        scroll = ScrollView(size_hint=(1, 1))
-        grid = GridLayout(cols=1, size_hint_y=None, spacing=5)
-        grid.bind(minimum_height=grid.setter('height'))
-
-        selected_entries_for_deletion = [] # Track selections
+        header = BoxLayout(size_hint_y=None, height=40, spacing=5)
+        header.add_widget(Label(text="选择要删除的条目:", size_hint_x=0.6))
+        select_all_button = RoundButton(text='全选', size_hint_x=0.4)
+        header.add_widget(select_all_button)
+        content.add_widget(header)
+
+        # Display ALL entries for selection, not just current page.
+        # 只为可见行创建控件；勾选状态保存在列表的位集里
+        selection_list = EntryListView(
+            format_row=lambda entry: f"中:{entry.get('chinese','')[:10]} 英:{entry.get('english','')[:15]}",
+            viewclass=SelectableEntryRow,
+            row_height=50,
+            size_hint=(1, 1)
+        )
+        selection_list.set_entries(entries_for_selection)
+        content.add_widget(selection_list)
 
-        def toggle_selection(checkbox, value, entry):
-            if value:
-                selected_entries_for_deletion.append(entry)
-            else:
-                if entry in selected_entries_for_deletion:
-                    selected_entries_for_deletion.remove(entry)
-
-        # Display ALL entries for selection, not just current page
-        for entry in self.all_entries_in_view:
-             entry_layout = BoxLayout(size_hint_y=None, height=50)
-             # Shorten text for display
-             text = f"中:{entry.get('chinese','')[:10]} 英:{entry.get('english','')[:15]}"
-             entry_label = Label(text=text, size_hint_x=0.8, halign='left', valign='middle', text_size=(None,50))
-             entry_label.bind(width=lambda *x: entry_label.setter('text_size')(entry_label, (entry_label.width, None)))
-
-             entry_checkbox = CheckBox(size_hint_x=0.2)
-             entry_checkbox.bind(active=lambda cb, val, e=entry: toggle_selection(cb, val, e))
-             entry_layout.add_widget(entry_label)
-             entry_layout.add_widget(entry_checkbox)
-             grid.add_widget(entry_layout)
+        def toggle_select_all(button):
+            select = len(selection_list.selection) < len(entries_for_selection)
+            selection_list.select_all(select)
+            button.text = '全不选' if select else '全选'
 
-        scroll.add_widget(grid)
-        content.add_widget(scroll)
+        select_all_button.bind(on_press=toggle_select_all)
 
         button_layout = BoxLayout(size_hint_y=None, height=BUTTON_HEIGHT_NORMAL, spacing=10)
         delete_button = RoundButton(text='删除选中', bg_color=DELETE_COLOR)
@@ -371,16 +393,17 @@ class LexiconScreen(BoxLayout):
         content.add_widget(button_layout)
 
         popup = Popup(title='删除条目', content=content, size_hint=(0.9, 0.85), auto_dismiss=False)
+        popup.bind(on_dismiss=lambda *args: selection_list.release_rows())
 
         def confirm_delete():
-            if not selected_entries_for_deletion:
+            count = len(selection_list.selection)
+            if not count:
                 show_message("未选择任何条目。")
                 return
 
-            count = len(selected_entries_for_deletion)
             show_confirmation(
                 f"确定要从词库 '{self.current_lexicon_name}'\n中删除选中的 {count} 个条目吗？",
-                on_confirm=lambda: self.delete_selected_entries_action(selected_entries_for_deletion, popup),
+                on_confirm=lambda: self.delete_selected_entries_action(selection_list.selected_entries(), popup),
                 title='确认删除条目'
             )
 
@@ -392,16 +415,10 @@ class LexiconScreen(BoxLayout):
         if not self.current_lexicon_name or not entries_to_delete:
             return
 
-        success_count = 0
-        fail_count = 0
-        # --- 使用 self.lexicon ---
-        for entry in entries_to_delete:
-            # 使用实例方法
-            success, _ = self.lexicon.remove_entry_from_lexicon(entry, self.current_lexicon_name)
-            if success:
-                success_count += 1
-            else:
-                fail_count += 1
+        # --- 使用 self.lexicon 批量删除：只读取、保存一次词库文件 ---
+        results = self.lexicon.remove_entries_from_lexicon(entries_to_delete, self.current_lexicon_name)
+        success_count = sum(1 for success, _ in results if success)
+        fail_count = len(results) - success_count
 
         delete_popup.dismiss()
 
@@ -550,36 +567,17 @@ class LexiconScreen(BoxLayout):
         filter_popup.dismiss() # Close the selection popup
 
         try:
-            # --- 使用 self.lexicon 获取条目 ---
-            entries = self.lexicon.get_lexicon_entries(lexicon_name)
-            if not entries:
+            # --- 使用 self.lexicon 获取条目位置 ---
+            positions = self.lexicon.get_lexicon_positions(lexicon_name)
+            if not positions:
                 show_message(f"词库 '{lexicon_name}' 为空或加载失败。", title="筛选结果")
                 return
 
-            # --- 使用 self.data 筛选 (静态方法) ---
-            filtered_entries = Data.filter_entries(entries, 'consolidate')
-
-            if not filtered_entries:
-                show_message(f"词库 '{lexicon_name}' 中\n没有找到'巩固'类型的词条。", title="筛选结果")
-                return
-
-            # --- 使用 self.lexicon 获取索引 (实例方法) ---
-            # get_entry_indices 已经帮我们处理了从 entry 到 index 的映射
-            filtered_indices = self.lexicon.get_entry_indices(filtered_entries)
-
-            # --- 这里不再需要之前的 english_to_index 字典查找了 ---
-            # --- 删除或注释掉以下错误行：---
-            # english_to_index = {v['english']: k for k, v in self.lexicon.defaults.items() if isinstance(k, int)}
-            # filtered_indices = []
-            # for entry in filtered_entries:
-            #     idx = english_to_index.get(entry.get('english'))
-            #     if idx is not None:
-            #         filtered_indices.append(idx)
-            # --- 以上错误代码已由 self.lexicon.get_entry_indices(filtered_entries) 替代 ---
+            # --- 使用 Data 在计数列上筛选 (静态方法)，结果本身就是 defaults 索引 ---
+            filtered_indices = Data.filter_positions(self.lexicon.defaults, positions, 'consolidate')
 
             if not filtered_indices:
-                # 这通常意味着 get_entry_indices 内部未能找到索引，应该检查 find_entry_index
-                show_message("无法将筛选出的词条映射回索引。\n请检查主词库数据。", title="内部错误")
+                show_message(f"词库 '{lexicon_name}' 中\n没有找到'巩固'类型的词条。", title="筛选结果")
                 return
 
             # 创建新词库名
@@ -1,15 +1,29 @@
 # screens/main_screen.py
+import importlib
+
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.label import Label
 from kivy.animation import Animation
-
-# Use relative imports for sibling modules (screens)
-from .query_screen import QueryScreen
-from .recite_screen import ReciteScreen
-from .lexicon_screen import LexiconScreen
+from kivy.metrics import dp
 
 # Import RoundButton from its new location
 from ui_elements.buttons import RoundButton
 
+# 子界面在第一次进入时才导入 (连同它们的弹窗依赖)，启动时只加载主菜单
+SCREEN_CLASSES = {
+    'query': ('screens.query_screen', 'QueryScreen'),
+    'recite': ('screens.recite_screen', 'ReciteScreen'),
+    'lexicon': ('screens.lexicon_screen', 'LexiconScreen'),
+}
+
+# 进入各界面前需要完成的加载步骤：'dictionary' 词典，'search' 搜索索引
+SCREEN_REQUIREMENTS = {
+    'query': ('dictionary', 'search'),
+    'recite': ('dictionary',),
+    'lexicon': ('dictionary',),
+}
+LOADING_STAGES = ('dictionary', 'search')
+
 class MainScreen(BoxLayout):
     def __init__(self, lexicon_instance, data_instance, app_instance=None, **kwargs): # Pass app instance if needed later
         super(MainScreen, self).__init__(**kwargs)
@@ -20,20 +34,61 @@ class MainScreen(BoxLayout):
         self.lexicon = lexicon_instance
         self.data = data_instance
 
-        # Button Creation (rest remains the same)
-        self.query_button = RoundButton(text='查询', font_size=500, color=(1, 1, 1, 1), bg_color=(0.529, 0.808, 0.922, 1), animation_duration=0.1, enable_ripple=True, ripple_color=(1, 1, 1, 0.3))
+        # 已创建的子界面，返回主菜单后保留 (滚动位置、页码等状态不丢失)
+        self._screens = {}
+
+        # 词典可以在后台加载 (见 WordApp)：没有传入实例时先显示加载进度，按钮锁定，
+        # 每完成一步 (mark_ready) 解锁需要它的按钮
+        self._ready = set(LOADING_STAGES) if lexicon_instance is not None else set()
+        self.status_label = Label(text='正在加载词典...', size_hint_y=None, height=dp(40), font_size=20)
+
+        # 主菜单按钮只创建一次
+        self.query_button = RoundButton(text='查询', font_size=500, color=(1, 1, 1, 1), bg_color=(0.529, 0.808, 0.922, 1), animation_duration=0.1)
         self.query_button.bind(on_press=self.show_query_screen)
-        self.add_widget(self.query_button)
 
-        self.recite_button = RoundButton(text='记忆', font_size=500, color=(1, 1, 1, 1), bg_color=(0.275, 0.510, 0.706, 1), animation_duration=0.1, enable_ripple=True, ripple_color=(1, 1, 1, 0.3))
+        self.recite_button = RoundButton(text='记忆', font_size=500, color=(1, 1, 1, 1), bg_color=(0.275, 0.510, 0.706, 1), animation_duration=0.1)
         self.recite_button.bind(on_press=self.show_recite_screen)
-        self.add_widget(self.recite_button)
 
-        self.lexicon_button = RoundButton(text='词库', font_size=500, color=(1, 1, 1, 1), bg_color=(0.118, 0.216, 0.600, 1), animation_duration=0.1, enable_ripple=True, ripple_color=(1, 1, 1, 0.3))
+        self.lexicon_button = RoundButton(text='词库', font_size=500, color=(1, 1, 1, 1), bg_color=(0.118, 0.216, 0.600, 1), animation_duration=0.1)
         self.lexicon_button.bind(on_press=self.show_lexicon_screen)
-        self.add_widget(self.lexicon_button)
 
-        self._add_main_buttons()  # 调用添加按钮的方法
+        self._buttons = {
+            'query': self.query_button,
+            'recite': self.recite_button,
+            'lexicon': self.lexicon_button,
+        }
+        self._update_locked_buttons()
+        self._add_main_buttons()
+
+    # --- Background Loading ---
+    def set_dictionary(self, lexicon_instance, data_instance):
+        """Called on the main thread once the shared Lexicon and Data are loaded."""
+        self.lexicon = lexicon_instance
+        self.data = data_instance
+        self.mark_ready('dictionary')
+
+    def mark_ready(self, stage):
+        """Marks a loading stage as done and unlocks the buttons whose screens only needed what is loaded."""
+        self._ready.add(stage)
+        self.status_label.text = '正在建立搜索索引...' if 'search' not in self._ready else ''
+        self._update_locked_buttons()
+        if self.is_loaded and self.status_label.parent is self:
+            self.remove_widget(self.status_label)
+
+    def show_load_error(self, message):
+        """Shows a loading failure above the menu (even if loading had otherwise finished)."""
+        self.status_label.text = message
+        self.status_label.height = dp(80)
+        if self.status_label.parent is None and self.query_button.parent is self:
+            self.add_widget(self.status_label, index=len(self.children))
+
+    @property
+    def is_loaded(self):
+        return self._ready.issuperset(LOADING_STAGES)
+
+    def _update_locked_buttons(self):
+        for name, button in self._buttons.items():
+            button.disabled = not self._ready.issuperset(SCREEN_REQUIREMENTS[name])
 
     # 动画辅助方法 (不变)
     def _create_switch_animation(self, instance, switch_method):
@@ -55,54 +110,56 @@ class MainScreen(BoxLayout):
         self._create_switch_animation(instance, self._switch_to_lexicon)
 
     # --- Switching Methods ---
-    # These now instantiate classes from other modules
-
-    # 修改切换屏幕的方法以传递实例
-    def _switch_to_query(self):
-        self.clear_widgets()
-        # Pass the callback to return to this screen's logic
-        self.add_widget(QueryScreen(
+    def _get_screen(self, name):
+        """
+        Returns the cached screen `name`, importing its module and creating
+        it on first use.
+
+        Returns:
+            (screen, True if it was created just now).
+        """
+        screen = self._screens.get(name)
+        if screen is not None:
+            return screen, False
+        module_name, class_name = SCREEN_CLASSES[name]
+        screen_class = getattr(importlib.import_module(module_name), class_name)
+        screen = screen_class(
             return_to_main=self.show_main_screen,  # 回调函数
             lexicon_instance=self.lexicon,  # 传递共享实例
             data_instance=self.data  # 传递共享实例
-        ))
+        )
+        self._screens[name] = screen
+        return screen, True
 
-    def _switch_to_recite(self):
+    def _switch_to(self, name):
+        screen, created = self._get_screen(name)
         self.clear_widgets()
-        self.add_widget(ReciteScreen(
-            return_to_main=self.show_main_screen,
-            lexicon_instance=self.lexicon,
-            data_instance=self.data
-        ))
+        self.add_widget(screen)
+        # 复用的界面：让它刷新离开期间可能变化的数据
+        if not created and hasattr(screen, 'on_reenter'):
+            screen.on_reenter()
+
+    def _switch_to_query(self):
+        self._switch_to('query')
+
+    def _switch_to_recite(self):
+        self._switch_to('recite')
 
     def _switch_to_lexicon(self):
-        self.clear_widgets()
-        self.add_widget(LexiconScreen(
-            return_to_main=self.show_main_screen,
-            lexicon_instance=self.lexicon,
-            data_instance=self.data
-        ))
+        self._switch_to('lexicon')
 
     # --- Return Logic ---
-    # 返回主屏幕的逻辑 (确保 _add_main_buttons 被调用)
     def show_main_screen(self, instance=None):
         if instance:
              Animation.cancel_all(instance)
              instance.scale = 1
-        self.clear_widgets()
-        self._add_main_buttons()  # 重新构建按钮
+        self._add_main_buttons()  # 放回已有的按钮
 
     def _add_main_buttons(self):
         self.clear_widgets()
-
-        self.query_button = RoundButton(text='查询', font_size=500, color=(1, 1, 1, 1), bg_color=(0.529, 0.808, 0.922, 1), animation_duration=0.1, enable_ripple=True, ripple_color=(1, 1, 1, 0.3))
-        self.query_button.bind(on_press=self.show_query_screen)
-        self.add_widget(self.query_button)
-
-        self.recite_button = RoundButton(text='记忆', font_size=500, color=(1, 1, 1, 1), bg_color=(0.275, 0.510, 0.706, 1), animation_duration=0.1, enable_ripple=True, ripple_color=(1, 1, 1, 0.3))
-        self.recite_button.bind(on_press=self.show_recite_screen)
-        self.add_widget(self.recite_button)
-
-        self.lexicon_button = RoundButton(text='词库', font_size=500, color=(1, 1, 1, 1), bg_color=(0.118, 0.216, 0.600, 1), animation_duration=0.1, enable_ripple=True, ripple_color=(1, 1, 1, 0.3))
-        self.lexicon_button.bind(on_press=self.show_lexicon_screen)
-        self.add_widget(self.lexicon_button)
\ No newline at end of file
+        if not self.is_loaded or self.status_label.text:
+            self.add_widget(self.status_label)
+        for button in (self.query_button, self.recite_button, self.lexicon_button):
+            Animation.cancel_all(button)
+            button.scale = 1
+            self.add_widget(button)
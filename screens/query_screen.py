@@ -13,7 +13,15 @@ from kivy.clock import Clock
 # from core.lexicon import Lexicon
 from ui_elements.buttons import RoundButton
 from ui_elements.labels import create_wrapped_label
+from ui_elements.lists import EntryListView
 from utils.popups import show_message  # (以及可能需要的 show_confirmation)
+from core.search_index import is_chinese_query
+from core.search_task import SearchTask
+
+# 输入联想设置
+SUGGESTION_COUNT = 6        # 最多显示的联想条数
+SUGGESTION_HEIGHT = 60      # 每条联想按钮高度
+SUGGESTION_DELAY = 0.15     # 输入防抖延迟 (秒)
 
 class QueryScreen(BoxLayout):
     def __init__(self, return_to_main, lexicon_instance, data_instance, **kwargs):
@@ -30,6 +38,22 @@ class QueryScreen(BoxLayout):
         self.input = TextInput(hint_text='输入中文或英文', size_hint_y=0.1) # Give specific size hint
         self.add_widget(self.input)
 
+        # 输入联想区域：按钮只创建一次，之后只替换文本
+        self.suggestion_box = GridLayout(cols=1, size_hint_y=None, height=0, spacing=2)
+        self.suggestion_buttons = []
+        for _ in range(SUGGESTION_COUNT):
+            btn = RoundButton(text='', size_hint_y=None, height=SUGGESTION_HEIGHT, font_size=20,
+                              bg_color=(0.345, 0.627, 0.827, 1), halign='left', padding=(10, 5))
+            btn.suggestion_text = ''
+            btn.bind(on_press=self._apply_suggestion)
+            self.suggestion_buttons.append(btn)
+        self.add_widget(self.suggestion_box)
+
+        # 输入变化经 Clock 防抖后再查询前缀索引
+        self._suggest_trigger = Clock.create_trigger(self._update_suggestions, SUGGESTION_DELAY)
+        self._suppress_suggestions = False
+        self.input.bind(text=self._on_input_text)
+
         self.search_button = RoundButton(text='查询', size_hint_y=0.1, font_size=40, bg_color=(0, 1, 1, 1)) # Adjusted font size
         self.search_button.bind(on_press=self.search_word)
         self.add_widget(self.search_button)
@@ -49,40 +73,132 @@ class QueryScreen(BoxLayout):
         self.results_per_page = 30
         self.total_pages = 0
         self.results_popup = None
+        self.results_complete = True  # 结果弹窗里的结果是否已经是全部 (后台查询结束)
+        self._search_task = None  # 正在进行的后台查询 (core.search_task.SearchTask)
         self.lexicon_popup = None  # 添加词库的弹窗
 
+    def _on_input_text(self, instance, text):
+        self._cancel_search()  # 查询词变了，之前的后台查询不再需要
+        if self._suppress_suggestions:
+            return
+        self._suggest_trigger()
+
+    def _update_suggestions(self, dt=None):
+        """Fills the pooled suggestion buttons with the top-k prefix matches."""
+        prefix = self.input.text.strip()
+        entries = self.data.suggest(prefix, SUGGESTION_COUNT) if prefix else []
+        self._show_suggestion_entries(entries, is_chinese_query(prefix))
+
+    def _show_suggestion_entries(self, entries, use_chinese):
+        """Shows entries in the pooled suggestion buttons (tapping one searches for it)."""
+        self.suggestion_box.clear_widgets()
+        for btn, entry in zip(self.suggestion_buttons, entries):
+            chinese = entry.get('chinese', '')
+            english = entry.get('english', '')
+            btn.suggestion_text = chinese if use_chinese else english
+            btn.text = self._format_button_text(entry)
+            self.suggestion_box.add_widget(btn)
+        shown = len(self.suggestion_box.children)
+        self.suggestion_box.height = shown * SUGGESTION_HEIGHT + max(shown - 1, 0) * self.suggestion_box.spacing[1]
+
+    def _hide_suggestions(self):
+        self._suggest_trigger.cancel()
+        self.suggestion_box.clear_widgets()
+        self.suggestion_box.height = 0
+
+    def _apply_suggestion(self, instance):
+        """Puts the chosen suggestion into the input and runs the search."""
+        self._suppress_suggestions = True
+        self.input.text = instance.suggestion_text
+        self._suppress_suggestions = False
+        self.search_word(instance)
+
     def search_word(self, instance):
+        self._hide_suggestions()
         word = self.input.text.strip()
         if not word:
             self.result_label.text = '请输入要查询的单词'
             self.input.focus = True
             return
 
-        # --- 使用 self.data ---
-        results = self.data.search_word(word)
-
-        if results:
-            if isinstance(results, list):
-                self.result_label.text = f"找到 {len(results)} 条结果，详情见弹窗。"
-                self.show_results_popup(results)
-            elif isinstance(results, dict):
-                # If only one result, show directly or maybe still use a simplified popup?
-                # For consistency, let's use the popup even for one result
-                self.result_label.text = "找到 1 条结果，详情见弹窗。"
-                self.show_results_popup([results]) # Wrap single dict in a list
-            else:
-                self.result_label.text = '未找到匹配的条目'
+        # --- 在后台线程查询：第一页结果一出来就显示，总数和页码随后补上 ---
+        self._cancel_search()
+        self.result_label.text = '正在查询...'
+        self._search_task = SearchTask(
+            self.data, word,
+            on_first=self._on_first_results,
+            on_done=self._on_search_done,
+            on_error=self._on_search_error,
+            first_batch=self.results_per_page,
+            schedule=lambda callback, *args: Clock.schedule_once(lambda dt: callback(*args)),
+        ).start()
+
+    def _cancel_search(self):
+        if self._search_task is not None:
+            self._search_task.cancel()
+            self._search_task = None
+
+    def _on_first_results(self, task, positions):
+        if task is not self._search_task or not positions:
+            return  # 已被新的查询取代；没有结果时等 _on_search_done 处理
+        self.result_label.text = '正在统计结果数量...'
+        self.show_results_popup(self.data.lexicon.defaults.lazy_views(positions), complete=False)
+
+    def _on_search_done(self, task, positions):
+        if task is not self._search_task:
+            return
+        self._search_task = None
+        self._show_final_results(task.word, self.data.lexicon.defaults.lazy_views(positions))
+
+    def _on_search_error(self, task, error):
+        """后台查询出错 (例如查询期间条目被修改)：不把部分结果当作完整结果，在主线程重新查询一次"""
+        if task is not self._search_task:
+            return
+        self._search_task = None
+        try:
+            results = self.data.search_word(task.word) or []
+        except Exception as e:
+            print(f"查询 '{task.word}' 时出错: {e}")
+            self.result_label.text = '查询出错，请重试'
+            if self.results_popup is not None:
+                self.results_popup.dismiss()
+            return
+        if self.results_popup is not None and not results:
+            self.results_popup.dismiss()
+        self._show_final_results(task.word, results)
+        if self.results_popup is not None:
+            self._load_current_page_results()  # 已显示的第一页来自出错前的部分结果
+
+    def _show_final_results(self, word, results):
+        if not results:
+            self._show_no_results(word)
+            return
+        self.result_label.text = f"找到 {len(results)} 条结果，详情见弹窗。"
+        if self.results_popup is None:
+            self.show_results_popup(results)
+        else:
+            self._set_results(results, complete=True)
+
+    def _show_no_results(self, word):
+        """没有结果时用拼写纠错索引给出相近的英文词头 (显示在联想按钮里)"""
+        candidates = self.data.did_you_mean(word, SUGGESTION_COUNT)
+        if candidates:
+            self.result_label.text = '未找到匹配的条目，你是不是要找:'
+            self._show_suggestion_entries(candidates, use_chinese=False)
         else:
             self.result_label.text = '未找到匹配的条目'
 
-    def show_results_popup(self, results):
+    def show_results_popup(self, results, complete=True):
+        """
+        Opens the results popup. With `complete=False` the results are only
+        the first page(s) of a search still running; _set_results fills in
+        the rest, the total and the page count when it finishes.
+        """
         if self.results_popup: # Avoid multiple popups
-             self.results_popup.dismiss()
-             self.results_popup = None
+             old_popup, self.results_popup = self.results_popup, None
+             old_popup.dismiss()
 
-        self.all_results = results
         self.current_page = 0
-        self.total_pages = (len(results) + self.results_per_page - 1) // self.results_per_page
 
         layout = BoxLayout(orientation='vertical')
 
@@ -90,19 +206,21 @@ class QueryScreen(BoxLayout):
         pagination_height = 80 # Smaller controls
         pagination = BoxLayout(size_hint_y=None, height=pagination_height, spacing=5)
         self.prev_btn = RoundButton(text="<", size_hint_x=0.2, bg_color=(0.3, 0.6, 0.9, 1), disabled=True)
-        self.page_label = Label(text=f"1 / {self.total_pages}", size_hint_x=0.6)
-        self.next_btn = RoundButton(text=">", size_hint_x=0.2, bg_color=(0.3, 0.9, 0.6, 1), disabled=self.total_pages <= 1)
+        self.page_label = Label(text="1 / 1", size_hint_x=0.6)
+        self.next_btn = RoundButton(text=">", size_hint_x=0.2, bg_color=(0.3, 0.9, 0.6, 1), disabled=True)
         self.prev_btn.bind(on_press=self._load_previous_page)
         self.next_btn.bind(on_press=self._load_next_page)
         pagination.add_widget(self.prev_btn)
         pagination.add_widget(self.page_label)
         pagination.add_widget(self.next_btn)
 
-        # Scrollable Area for Results
-        self.scroll_view = ScrollView(size_hint=(1, 1)) # Takes remaining space
-        self.grid_layout = GridLayout(cols=1, size_hint_y=None, spacing=5)
-        self.grid_layout.bind(minimum_height=self.grid_layout.setter('height'))
-        self.scroll_view.add_widget(self.grid_layout)
+        # Scrollable Area for Results: 回收式列表，只为可见行创建按钮
+        self.scroll_view = EntryListView(
+            format_row=self._format_button_text,
+            row_height=100, # Smaller buttons for list view
+            on_row_press=self.show_entry_details_popup, # Use the detailed popup method
+            size_hint=(1, 1) # Takes remaining space
+        )
 
         # Close Button
         close_button = RoundButton(text='关闭', size_hint_y=None, height=pagination_height, bg_color=(0.9, 0.2, 0.2, 1))
@@ -114,46 +232,49 @@ class QueryScreen(BoxLayout):
         layout.add_widget(close_button)
 
         self.results_popup = Popup(
-            title=f'查询结果 ({len(self.all_results)} 条)',
+            title='查询结果',
             content=layout,
             size_hint=(0.9, 0.85), # Slightly wider
             auto_dismiss=False
         )
         close_button.bind(on_press=self.results_popup.dismiss)
+        # 关闭时把结果行归还共享池，下一次查询的弹窗直接复用；还在统计的查询也一并取消
+        self.results_popup.bind(on_dismiss=lambda popup, rows=self.scroll_view: self._on_results_dismiss(popup, rows))
         self.results_popup.open()
 
+        self._set_results(results, complete)
         self._load_current_page_results() # Load initial page content
 
+    def _on_results_dismiss(self, popup, rows):
+        rows.release_rows()
+        if popup is self.results_popup:
+            # 用户关闭了弹窗 (不是被新的查询结果替换)
+            self.results_popup = None
+            self._cancel_search()
+
+    def _set_results(self, results, complete):
+        """Replaces the popup's results (e.g. the full list once the search finished) and updates the counts."""
+        self.all_results = results
+        self.results_complete = complete
+        self.total_pages = max(1, (len(results) + self.results_per_page - 1) // self.results_per_page)
+        if self.results_popup is not None:
+            self.results_popup.title = f'查询结果 ({len(results)} 条)' if complete else '查询结果 (统计中...)'
+            self._update_pagination_controls()
+
     def _load_current_page_results(self):
-        """Loads results for the current page into the grid_layout."""
-        self.grid_layout.clear_widgets()
+        """Shows the current page's results in the recycling list (rows are rebound, not rebuilt)."""
         start = self.current_page * self.results_per_page
         end = start + self.results_per_page
-        current_results = self.all_results[start:end]
-
-        button_height = 100 # Smaller buttons for list view
-
-        for index, result in enumerate(current_results):
-            bg_color = (0.275, 0.510, 0.706, 1) if index % 2 == 0 else (0.345, 0.627, 0.827, 1)
-            btn_text = self._format_button_text(result)
-            btn = RoundButton(
-                text=btn_text,
-                size_hint_y=None,
-                height=button_height,
-                bg_color=bg_color,
-                halign='left', # Align text left for readability
-                padding=(10, 5)
-            )
-            btn.result_data = result # Store data directly on button
-            btn.bind(on_press=self.show_entry_details_popup) # Use the detailed popup method
-            self.grid_layout.add_widget(btn)
+        self.scroll_view.set_entries(self.all_results[start:end]) # Also scrolls to top
 
         self._update_pagination_controls()
-        self.scroll_view.scroll_y = 1 # Scroll to top after loading
 
     def _update_pagination_controls(self):
         """Updates the text and disabled state of pagination buttons."""
-        self.page_label.text = f"{self.current_page + 1} / {self.total_pages}"
+        if self.results_complete:
+            self.page_label.text = f"{self.current_page + 1} / {self.total_pages}"
+        else:
+            self.page_label.text = f"{self.current_page + 1} / ..."
         self.prev_btn.disabled = self.current_page <= 0
         self.next_btn.disabled = self.current_page >= self.total_pages - 1
 
@@ -178,9 +299,8 @@ class QueryScreen(BoxLayout):
             text = text[:max_len-3] + "..."
         return text
 
-    def show_entry_details_popup(self, instance):
+    def show_entry_details_popup(self, result):
         """Shows entry details in a standardized popup."""
-        result = instance.result_data
 
         # --- 使用 self.lexicon ---
         # 更新查询次数并保存 (现在由 Lexicon 实例负责)
@@ -270,8 +390,8 @@ class QueryScreen(BoxLayout):
         self.lexicon_popup.open()
 
     def _perform_add_entry(self, lexicon_name, entry, parent_popup):
-        # --- 使用 self.lexicon ---
-        success, message = self.lexicon.add_entry_to_lexicon(entry, lexicon_name)
+        # --- 使用 self.lexicon 的批量接口 (也接受单个条目) ---
+        success, message = self.lexicon.add_entries_to_lexicon([entry], lexicon_name)[0]
 
         if self.lexicon_popup:
             self.lexicon_popup.dismiss()
@@ -6,16 +6,26 @@ from kivy.uix.scrollview import ScrollView
 from kivy.uix.popup import Popup
 from kivy.uix.floatlayout import FloatLayout  # 或者其他布局
 from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.metrics import dp
 
 
 # 不再需要导入 core.Lexicon
 # from core.lexicon import Lexicon
-from core.recite import Recite
+from core.recite import Recite, ReciteSession, DUE_SCHEME
 from core.data import Data
 from ui_elements.buttons import RoundButton
-from ui_elements.labels import create_wrapped_label
+from ui_elements.labels import create_wrapped_label, CachedLabel
 from utils.popups import show_message, show_confirmation
 
+# 抽样方式的显示名称 (顺序即切换顺序)
+SAMPLING_MODE_LABELS = {
+    'uniform': '随机',
+    'mistake': '错误率高优先',
+    'low_memory': '记忆少优先',
+    'recency': '久未复习优先',
+}
+
 class ReciteScreen(BoxLayout):
     def __init__(self, return_to_main, lexicon_instance, data_instance, **kwargs):
         super(ReciteScreen, self).__init__(**kwargs)
@@ -41,9 +51,19 @@ class ReciteScreen(BoxLayout):
         self.lexicons_available = []  # 将在 show_lexicon_selection 中填充
         self.current_lexicon = None
         self.current_scheme = None
+        self.scheme_counts = {}  # 当前词库各方案的数量 (来自词库目录清单)
+        self.sampling_mode = 'uniform'  # 抽样方式 (core.sampling.SAMPLING_MODES)
         self.entries = []
-        self.current_index = 0
-        self.session_mistakes = 0
+        self.session = None  # 当前背诵过程 (ReciteSession)
+        self.fast_mode = False  # 快速模式：无弹窗，键盘/滑动作答
+        self.revealed = False  # 快速模式下当前卡片的详情是否已显示
+        self._card_view = None  # 卡片界面，只创建一次
+        self._keyboard_bound = False
+
+        # 卡片按钮颜色
+        self.pass_color = (0.1, 0.7, 0.1, 1)
+        self.view_color = (0.1, 0.5, 0.8, 1)
+        self.mistake_color = (0.9, 0.2, 0.2, 1)
 
         # 启动流程
         self.show_lexicon_selection()
@@ -77,9 +97,8 @@ class ReciteScreen(BoxLayout):
             for index, lexicon_name in enumerate(self.lexicons_available):
                 entry_count = 'N/A'  # 获取数量可能需要加载，这里先简化
                 try:
-                    # 尝试加载索引数量，避免加载完整条目
-                    indices = self.lexicon.load_lexicon(lexicon_name)
-                    entry_count = len(indices)
+                    # 数量直接来自词库目录清单，不读取词库文件
+                    entry_count = self.lexicon.get_lexicon_size(lexicon_name)
                 except Exception as e:
                     print(f"获取词库 '{lexicon_name}' 条目数时出错: {e}")
 
@@ -110,24 +129,26 @@ class ReciteScreen(BoxLayout):
 
         button_height = 100
 
-        # --- 使用 self.lexicon 获取条目 (用于计算数量) ---
-        # 注意: get_lexicon_entries 现在由 Lexicon 实例处理映射
+        # --- 各方案数量来自词库目录清单，不需要读取词库或筛选条目 ---
+        # 具体位置留到开始背诵时 (Recite.get_filtered_entries) 再筛选
         try:
-            entries = self.lexicon.get_lexicon_entries(lexicon_name)
+            self.scheme_counts = self.lexicon.get_scheme_counts(lexicon_name)
         except Exception as e:
-            entries = []
+            self.scheme_counts = {}
             show_message(f"加载词库 '{lexicon_name}' 条目时出错: {e}", title="加载错误")
             self.show_lexicon_selection()  # 返回上一步
             return
 
-        schemes = [('新鲜词', 'new'), ('巩固词', 'consolidate'), ('复习词', 'review'), ('所有词', 'all')]
+        # 到期复习数量来自复习队列 (只遍历到期的条目)
+        try:
+            self.scheme_counts[DUE_SCHEME] = self.lexicon.count_due(lexicon_name)
+        except Exception as e:
+            print(f"获取词库 '{lexicon_name}' 到期条目数时出错: {e}")
+
+        schemes = [('到期复习', DUE_SCHEME), ('新鲜词', 'new'), ('巩固词', 'consolidate'), ('复习词', 'review'), ('所有词', 'all')]
 
         for index, (label, scheme) in enumerate(schemes):
-             # --- 使用 self.data 筛选条目 (静态方法) ---
-             # 注意 filter_entries 是 Data 的静态方法，不需要 self.data 实例
-             # 但如果 filter_entries 将来需要访问 data 实例属性，就需要 self.data.filter_entries
-             filtered_entries = Data.filter_entries(entries, scheme)
-             count = len(filtered_entries)
+             count = self.scheme_counts.get(scheme, 0)
 
              if count == 0 and scheme != 'all': continue # 跳过空方案
 
@@ -162,10 +183,7 @@ class ReciteScreen(BoxLayout):
         # --- 获取最大可用数量 (需要 lexicon 和 data) ---
         max_count = 0
         try:
-            entries = self.lexicon.get_lexicon_entries(self.current_lexicon)
-            # 使用 Data 的静态方法
-            filtered_entries = Data.filter_entries(entries, self.current_scheme)
-            max_count = len(filtered_entries)
+            max_count = self.scheme_counts.get(scheme, 0)
         except Exception as e:
             print(f"计算最大数量时出错: {e}")
 
@@ -173,6 +191,16 @@ class ReciteScreen(BoxLayout):
         if max_count == 0:
             grid.add_widget(Label(text="该方案下无可用词条", halign='center'))
         else:
+            if scheme != DUE_SCHEME:
+                # 抽样方式：点击切换 (到期复习按到期顺序，不抽样)
+                mode_button = RoundButton(
+                    text=f"抽样: {SAMPLING_MODE_LABELS[self.sampling_mode]}",
+                    size_hint_y=None,
+                    height=button_height,
+                    bg_color=(0.275, 0.510, 0.706, 1)
+                )
+                mode_button.bind(on_press=self._cycle_sampling_mode)
+                grid.add_widget(mode_button)
             for index, count in enumerate(counts):
                 bg_color = self.orange1 if index % 2 == 0 else self.orange2
                 display_count = count
@@ -201,10 +229,15 @@ class ReciteScreen(BoxLayout):
         self.add_widget(scroll)
         self._add_return_button(lambda: self.show_scheme_selection(self.current_lexicon))
 
+    def _cycle_sampling_mode(self, button):
+        modes = list(SAMPLING_MODE_LABELS)
+        self.sampling_mode = modes[(modes.index(self.sampling_mode) + 1) % len(modes)]
+        button.text = f"抽样: {SAMPLING_MODE_LABELS[self.sampling_mode]}"
+
     def prepare_recite_session(self, count):
         # --- 使用 self.recite_handler (它内部会使用共享的 lexicon 和 data) ---
         self.entries, sufficient = self.recite_handler.get_filtered_entries(
-            self.current_lexicon, self.current_scheme, count
+            self.current_lexicon, self.current_scheme, count, mode=self.sampling_mode
         )
 
         if not self.entries:
@@ -222,34 +255,49 @@ class ReciteScreen(BoxLayout):
             self.begin_recite()
 
     def begin_recite(self): # No longer needs entries passed directly
-        self.current_index = 0
-        self.session_mistakes = 0
-        self.show_entry_card() # Switch to the card display
-
-    def show_entry_card(self):
-        if self.current_index >= len(self.entries):
-            self.show_summary()
-            return
-
-        entry = self.entries[self.current_index]
+        self.session = ReciteSession(self.recite_handler, self.entries, lookahead=1)
         self.clear_widgets()
-
+        # 卡片界面只创建一次，之后每张卡片只替换文字
+        if self._card_view is None:
+            self._card_view = self._build_card_view()
+        self.add_widget(self._card_view)
+        self._bind_keyboard()
+        self._load_card(swap=False)
+
+    def _build_card_view(self):
+        """Builds the card widgets once; show_entry_card only swaps their text."""
         card_layout = FloatLayout()
 
-        progress_text = f"{self.current_index + 1} / {len(self.entries)}"
-        progress_label = Label(text=progress_text, size_hint=(None, None), size=(200, 50),
-                               pos_hint={'center_x': 0.5, 'top': 1})
-        card_layout.add_widget(progress_label)
-
-        chinese_label = create_wrapped_label(
-            text=f"{entry.get('chinese', 'N/A')}",
-            font_size=40, # Adjust as needed
-            size_hint=(0.9, 0.6), # Take 90% width, 60% height
-            pos_hint={'center_x': 0.5, 'center_y': 0.6}, # Position in upper-middle
-            halign='center', valign='middle' # Center text within label bounds
+        self.progress_label = Label(text='', size_hint=(None, None), size=(200, 50),
+                                    pos_hint={'center_x': 0.5, 'top': 1})
+        card_layout.add_widget(self.progress_label)
+
+        self.fast_mode_button = RoundButton(text='', size_hint=(None, None), size=(dp(120), dp(40)),
+                                            pos_hint={'right': 1, 'top': 1}, font_size=16)
+        self.fast_mode_button.bind(on_press=lambda btn: self.toggle_fast_mode())
+        card_layout.add_widget(self.fast_mode_button)
+
+        # 两个正面标签轮流使用：一个显示当前卡片，另一个 (透明) 提前排好下一张的文字
+        self._front_labels = []
+        for _ in range(2):
+            label = CachedLabel(
+                text='', font_size=40, size_hint=(0.9, 0.45),
+                pos_hint={'center_x': 0.5, 'center_y': 0.62},
+                halign='center', valign='middle', opacity=0
             )
-        card_layout.add_widget(chinese_label)
-
+            label.bind(size=lambda instance, size: setattr(instance, 'text_size', size))
+            card_layout.add_widget(label)
+            self._front_labels.append(label)
+        self._front = 0
+
+        # 快速模式下的内联详情 (代替详情弹窗)
+        self.detail_label = CachedLabel(
+            text='', font_size=22, size_hint=(0.9, 0.2),
+            pos_hint={'center_x': 0.5, 'center_y': 0.28},
+            halign='center', valign='top', opacity=0
+        )
+        self.detail_label.bind(size=lambda instance, size: setattr(instance, 'text_size', size))
+        card_layout.add_widget(self.detail_label)
 
         # Bottom Button Bar
         button_bar_height = 100
@@ -258,21 +306,139 @@ class ReciteScreen(BoxLayout):
             pos_hint={'center_x': 0.5, 'y': 0}, # Anchor to bottom
             spacing=10, padding=10
         )
+        self.pass_button = RoundButton(text='认识', bg_color=self.pass_color)
+        self.view_button = RoundButton(text='查看', bg_color=self.view_color)
+        button_bar.add_widget(self.pass_button)
+        button_bar.add_widget(self.view_button)
+        card_layout.add_widget(button_bar)
 
-        pass_button = RoundButton(text='认识', bg_color=(0.1, 0.7, 0.1, 1))
-        view_button = RoundButton(text='查看', bg_color=(0.1, 0.5, 0.8, 1))
-        # Removed 'Return' during recite, add 'Finish Early' if needed
+        self.pass_button.bind(on_press=lambda btn: self._on_pass_button())
+        self.view_button.bind(on_press=lambda btn: self._on_view_button())
+        # 快速模式：左右滑动作答，上滑查看
+        card_layout.bind(on_touch_up=self._on_card_touch_up)
+        return card_layout
 
-        button_bar.add_widget(pass_button)
-        button_bar.add_widget(view_button)
-        card_layout.add_widget(button_bar)
+    def show_entry_card(self):
+        """Shows the session's current card by swapping text into the prebuilt widgets."""
+        self._load_card(swap=True)
 
-        # --- 绑定动作到 update_entry_state 和 show_entry_details_popup ---
-        # 这两个方法会使用 self.recite_handler 或显示弹窗
-        pass_button.bind(on_press=lambda btn: self.update_entry_state('pass'))
-        view_button.bind(on_press=lambda btn: self.show_entry_details_popup(entry))  # entry 是当前条目
+    def _load_card(self, swap):
+        if self.session is None or self.session.finished:
+            self.show_summary()
+            return
 
-        self.add_widget(card_layout)
+        self.revealed = False
+        front_text, detail_text = self.session.card()
+        current, upcoming = self._front_labels[self._front], self._front_labels[1 - self._front]
+        if swap and upcoming.text == front_text:
+            # 下一张卡片的文字已经提前排好，直接交换显示
+            current, upcoming = upcoming, current
+            self._front = 1 - self._front
+        else:
+            current.text = front_text
+        current.opacity = 1
+        upcoming.opacity = 0
+        # 预先排好下一张卡片的正面文字 (透明标签，不显示)
+        next_card = self.session.card(1)
+        upcoming.text = next_card[0] if next_card else ''
+
+        self.detail_label.text = detail_text
+        self.detail_label.opacity = 0
+        self.progress_label.text = self.session.progress_text()
+        self._update_card_buttons()
+
+    def _update_card_buttons(self):
+        self.fast_mode_button.text = '快速: 开' if self.fast_mode else '快速: 关'
+        if self.fast_mode and self.revealed:
+            self.pass_button.text, self.pass_button.bg_color = '认识了', self.pass_color
+            self.view_button.text, self.view_button.bg_color = '不认识', self.mistake_color
+        else:
+            self.pass_button.text, self.pass_button.bg_color = '认识', self.pass_color
+            self.view_button.text, self.view_button.bg_color = '查看', self.view_color
+
+    def toggle_fast_mode(self):
+        """快速模式：不弹窗，查看时在卡片上直接显示详情，支持键盘和滑动操作。"""
+        self.fast_mode = not self.fast_mode
+        if not self.fast_mode and self.revealed:
+            self.revealed = False
+            self.detail_label.opacity = 0
+        self._update_card_buttons()
+
+    def reveal_details(self):
+        """Shows the current card's details inline (fast mode)."""
+        if self.session is None or self.session.finished or self.revealed:
+            return
+        self.revealed = True
+        self.detail_label.opacity = 1
+        self._update_card_buttons()
+
+    def _on_pass_button(self):
+        # 已查看详情后的“认识了”算作 'view'
+        self.update_entry_state('view' if self.revealed else 'pass')
+
+    def _on_view_button(self):
+        if not self.fast_mode:
+            self.show_entry_details_popup(self.session.current)  # 普通模式仍使用详情弹窗
+        elif self.revealed:
+            self.update_entry_state('mistake')
+        else:
+            self.reveal_details()
+
+    def _on_card_touch_up(self, widget, touch):
+        if not self.fast_mode or self.session is None or not widget.collide_point(*touch.opos):
+            return False
+        dx, dy = touch.x - touch.ox, touch.y - touch.oy
+        threshold = dp(80)
+        if abs(dx) >= threshold and abs(dx) > abs(dy):
+            if dx > 0:
+                self._on_pass_button()  # 右滑：认识
+            else:
+                self.update_entry_state('mistake')  # 左滑：不认识
+            return True
+        if dy >= threshold and abs(dy) > abs(dx):
+            self.reveal_details()  # 上滑：查看
+            return True
+        return False
+
+    def _bind_keyboard(self):
+        if not self._keyboard_bound:
+            Window.bind(on_key_down=self._on_key_down)
+            self._keyboard_bound = True
+
+    def _unbind_keyboard(self):
+        if self._keyboard_bound:
+            Window.unbind(on_key_down=self._on_key_down)
+            self._keyboard_bound = False
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        """快速模式按键：空格/回车/→ 认识，← 不认识，↑/↓ 查看。"""
+        if not self.fast_mode or self._card_view is None or self._card_view.parent is not self:
+            return False
+        if key in (32, 13, 275):
+            self._on_pass_button()
+        elif key == 276:
+            self.update_entry_state('mistake')
+        elif key in (273, 274):
+            self.reveal_details()
+        else:
+            return False
+        return True
+
+    def on_parent(self, instance, parent):
+        # 离开背诵界面时解除键盘绑定，避免 Window 持有已移除的界面
+        if parent is None:
+            self._unbind_keyboard()
+
+    def on_reenter(self):
+        """
+        Called by MainScreen when this cached screen is shown again: resumes
+        keyboard input on the card view, or otherwise starts over from a fresh
+        lexicon list (lexicons may have been created, renamed or deleted since).
+        """
+        if self._card_view is not None and self._card_view.parent is self:
+            self._bind_keyboard()
+        else:
+            self.show_lexicon_selection()
 
     def show_entry_details_popup(self, entry):
         main_layout = BoxLayout(orientation='vertical', spacing=5, padding=10)
@@ -338,31 +504,23 @@ class ReciteScreen(BoxLayout):
         # mistake_popup.open()
 
     def update_entry_state(self, update_type):
-        """Updates the entry state using Recite handler and advances."""
-        if self.current_index < len(self.entries):
-            entry = self.entries[self.current_index]
-
-            if update_type == 'mistake':
-                self.session_mistakes += 1
-
-            self.recite_handler.update_entry(entry, update_type)
-
-            self.current_index += 1
-            # 延迟调用 show_entry_card，确保弹窗完全关闭后再刷新界面，避免闪烁
-            Clock.schedule_once(lambda dt: self.show_entry_card(), 0.1) # 延迟0.1秒
-        else:
-            # 延迟调用 show_summary
-            Clock.schedule_once(lambda dt: self.show_summary(), 0.1)
+        """Records the answer through the session and shows the next card right away."""
+        if self.session is None:
+            return
+        # 卡片控件不再重建，无需延迟等待弹窗关闭
+        self.session.answer(update_type)
+        self.show_entry_card()
 
     def show_summary(self):
+        self._unbind_keyboard()
         self.clear_widgets()
 
-        total = len(self.entries)
         # Use session mistakes for summary, not persistent entry['mistake']
-        mistakes = self.session_mistakes
-        correct = total - mistakes
-        accuracy = (correct / total * 100) if total > 0 else 0
-
+        summary = self.session.summary() if self.session else {'total': 0, 'correct': 0, 'mistakes': 0, 'accuracy': 0}
+        total = summary['total']
+        mistakes = summary['mistakes']
+        correct = summary['correct']
+        accuracy = summary['accuracy']
         # --- Summary Layout ---
         summary_layout = BoxLayout(orientation='vertical', spacing=15, padding=30)
 
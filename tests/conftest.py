@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# 测试直接导入 core (不需要 Kivy)，从仓库根目录解析
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
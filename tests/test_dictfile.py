@@ -0,0 +1,113 @@
+# tests/test_dictfile.py
+import json
+
+from core.dictfile import DictFile, dictfile_to_json, json_to_dictfile, write_dictfile
+from core.entries import MISSING
+from core.lexicon import Lexicon
+from core.stats import StatsStore
+
+ENTRIES = [
+    {'chinese': '你好', 'english': 'hello', 'note': 'greeting', 'inquiry': 3, 'memory': 1, 'mistake': 0},
+    {'chinese': '世界', 'english': 'world', 'inquiry': 0, 'memory': 0, 'mistake': 2},
+    {'chinese': '例子', 'english': 'example', 'note': '', 'tags': ['n'], 'inquiry': 1, 'memory': 0, 'mistake': 0},
+    ['not', 'an', 'object'],
+    {'english': 'only english', 'inquiry': 0, 'memory': 0, 'mistake': 0},
+]
+
+
+def write_json(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+
+def read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_json_bin_json_round_trip(tmp_path):
+    json_path = str(tmp_path / 'defaults.json')
+    bin_path = str(tmp_path / 'defaults.bin')
+    back_path = str(tmp_path / 'back.json')
+    write_json(json_path, ENTRIES)
+
+    assert json_to_dictfile(json_path, bin_path)
+    assert dictfile_to_json(bin_path, back_path)
+    assert read_json(back_path) == ENTRIES
+
+
+def test_dictfile_reads_text_and_counters_lazily(tmp_path):
+    bin_path = str(tmp_path / 'defaults.bin')
+    write_dictfile(bin_path, ENTRIES)
+    dictfile = DictFile.open(bin_path)
+    try:
+        assert dictfile.count == len(ENTRIES)
+        assert dictfile.read_text(0) == ('你好', 'hello', 'greeting')
+        assert dictfile.read_text(1) == ('世界', 'world', MISSING)
+        counters = dictfile.read_counters()
+        assert list(counters['inquiry']) == [3, 0, 1, 0, 0]
+        assert list(counters['mistake']) == [0, 2, 0, 0, 0]
+        assert dict(dictfile.iter_raw()) == {3: ['not', 'an', 'object']}
+        assert dict(dictfile.iter_extras()) == {2: {'tags': ['n']}}
+    finally:
+        dictfile.close()
+
+
+def test_open_rejects_malformed_file(tmp_path):
+    path = tmp_path / 'defaults.bin'
+    path.write_bytes(b'not a dictionary file')
+    assert DictFile.open(str(path)) is None
+
+
+def test_pack_merges_counters_from_stats_in_sync(tmp_path):
+    json_path = str(tmp_path / 'defaults.json')
+    write_json(json_path, ENTRIES[:3])
+    lexicon = Lexicon(str(tmp_path))
+    entry = dict(lexicon.defaults[1])
+    entry['memory'] = 9
+    assert lexicon.update_entry_in_defaults(entry)  # 只写 defaults.stats，不改 JSON
+    lexicon.close()
+    assert read_json(json_path)[1]['memory'] == 0
+
+    bin_path = str(tmp_path / 'defaults.bin')
+    assert json_to_dictfile(json_path, bin_path)
+    dictfile = DictFile.open(bin_path)
+    try:
+        assert dictfile.read_counters()['memory'][1] == 9
+    finally:
+        dictfile.close()
+
+
+def test_pack_ignores_stats_of_another_json(tmp_path):
+    json_path = str(tmp_path / 'defaults.json')
+    write_json(json_path, ENTRIES[:3])
+    rows = [(7, 7, 7)] * 3
+    StatsStore.create(str(tmp_path / 'defaults.stats'), rows, 3, source=(1, 1)).close()
+
+    bin_path = str(tmp_path / 'defaults.bin')
+    assert json_to_dictfile(json_path, bin_path)
+    dictfile = DictFile.open(bin_path)
+    try:
+        assert list(dictfile.read_counters()['inquiry']) == [3, 0, 1]
+    finally:
+        dictfile.close()
+
+
+def test_lexicon_keeps_live_counters_when_bin_takes_over(tmp_path):
+    json_path = str(tmp_path / 'defaults.json')
+    write_json(json_path, ENTRIES[:3])
+    lexicon = Lexicon(str(tmp_path))
+    entry = dict(lexicon.defaults[2])
+    entry['inquiry'] = 42
+    assert lexicon.update_entry_in_defaults(entry)
+    lexicon.close()
+
+    # 直接打包旧的 JSON (不经过 json_to_dictfile 合并计数)
+    write_dictfile(str(tmp_path / 'defaults.bin'), read_json(json_path))
+    for _ in range(2):  # 第二次打开时计数文件已与 .bin 同步
+        lexicon = Lexicon(str(tmp_path))
+        try:
+            assert lexicon.defaults_format == 'bin'
+            assert lexicon.defaults.column('inquiry')[2] == 42
+        finally:
+            lexicon.close()
@@ -0,0 +1,79 @@
+# tests/test_stats.py
+import json
+
+from core.lexicon import Lexicon
+from core.stats import StatsStore, STATS_FIELDS, clamp_counter
+
+
+def test_counters_persist_across_reopen(tmp_path):
+    path = str(tmp_path / 'defaults.stats')
+    store = StatsStore.create(path, [(0, 0, 0)] * 4, 4, source=(10, 20))
+    generation = store.generation
+    store.write(2, (5, 6, 7))
+    assert store.generation == generation + 1
+    store.close()
+
+    store = StatsStore.open(path, expected_count=4)
+    try:
+        assert store.read(2) == (5, 6, 7)
+        assert tuple(store.source) == (10, 20)
+        columns = store.read_columns()
+        assert [list(columns[field]) for field in STATS_FIELDS] == [[0, 0, 5, 0], [0, 0, 6, 0], [0, 0, 7, 0]]
+    finally:
+        store.close()
+
+
+def test_open_rejects_wrong_count_and_garbage(tmp_path):
+    path = str(tmp_path / 'defaults.stats')
+    StatsStore.create(path, [(1, 2, 3)] * 3, 3).close()
+    assert StatsStore.open(path, expected_count=4) is None
+    (tmp_path / 'bad.stats').write_bytes(b'garbage')
+    assert StatsStore.open(str(tmp_path / 'bad.stats')) is None
+    assert StatsStore.open(str(tmp_path / 'missing.stats')) is None
+
+
+def test_clamp_counter():
+    assert clamp_counter('12') == 12
+    assert clamp_counter(-3) == 0
+    assert clamp_counter(None) == 0
+    assert clamp_counter(1 << 40) == 0xFFFFFFFF
+
+
+def test_lexicon_counter_updates_survive_restart(tmp_path):
+    entries = [{'chinese': '一', 'english': 'one', 'inquiry': 0, 'memory': 0, 'mistake': 0},
+               {'chinese': '二', 'english': 'two', 'inquiry': 4, 'memory': 0, 'mistake': 0}]
+    with open(tmp_path / 'defaults.json', 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+    lexicon = Lexicon(str(tmp_path))
+    entry = dict(lexicon.defaults[1])
+    entry['inquiry'] = 5
+    assert lexicon.update_entry_in_defaults(entry)
+    lexicon.close()
+
+    lexicon = Lexicon(str(tmp_path))
+    try:
+        assert lexicon.defaults.column('inquiry')[1] == 5
+        assert lexicon.defaults[1]['english'] == 'two'
+    finally:
+        lexicon.close()
+
+
+def test_replaced_json_migrates_its_own_counters(tmp_path):
+    json_path = tmp_path / 'defaults.json'
+    entries = [{'chinese': '一', 'english': 'one', 'inquiry': 1, 'memory': 0, 'mistake': 0}]
+    json_path.write_text(json.dumps(entries, ensure_ascii=False), encoding='utf-8')
+    lexicon = Lexicon(str(tmp_path))
+    entry = dict(lexicon.defaults[0])
+    entry['inquiry'] = 8
+    lexicon.update_entry_in_defaults(entry)
+    lexicon.close()
+
+    # 外部替换 defaults.json：指纹变了，计数从新的 JSON 迁移
+    entries[0]['inquiry'] = 2
+    json_path.write_text(json.dumps(entries, ensure_ascii=False) + '\n', encoding='utf-8')
+    lexicon = Lexicon(str(tmp_path))
+    try:
+        assert lexicon.defaults.column('inquiry')[0] == 2
+    finally:
+        lexicon.close()
@@ -1,8 +1,71 @@
+from weakref import WeakKeyDictionary
+
 from kivy.uix.button import Button
 from kivy.graphics import Color, RoundedRectangle
 from kivy.properties import ListProperty, NumericProperty, ColorProperty, BooleanProperty
 from kivy.metrics import dp
 from kivy.animation import Animation
+from kivy.clock import Clock
+
+# 轻量模式：状态颜色直接切换 (不创建 Animation)，
+# 波纹 (enable_ripple) 使用每个容器共享的一组画布指令，圆角分段更少
+_lite_mode = False
+LITE_SEGMENTS = 3          # 轻量模式下每个圆角的分段数 (RoundedRectangle 默认 10)
+RIPPLE_FRAME = 1 / 60.0    # 共享波纹的刷新间隔 (秒)
+
+
+def set_lite_mode(enabled):
+    """App-wide switch: buttons created afterwards, and every press handled afterwards, use lite mode."""
+    global _lite_mode
+    _lite_mode = bool(enabled)
+
+
+def is_lite_mode():
+    return _lite_mode
+
+
+class RippleOverlay:
+    """
+    One ripple for a whole container: a single Color + RoundedRectangle pair
+    in the container's canvas.after, reused by every button inside it. A
+    press restarts it over the pressed button; the fade is stepped by one
+    Clock event instead of Animation objects.
+    """
+    _overlays = WeakKeyDictionary()
+
+    def __init__(self, container):
+        with container.canvas.after:
+            self.color = Color(1, 1, 1, 0)
+            self.rect = RoundedRectangle(pos=(0, 0), size=(0, 0), segments=LITE_SEGMENTS)
+        self._event = None
+        self._alpha = 0.0
+        self._step = 0.0
+
+    @classmethod
+    def for_container(cls, container):
+        overlay = cls._overlays.get(container)
+        if overlay is None:
+            overlay = cls._overlays[container] = cls(container)
+        return overlay
+
+    def play(self, button):
+        self.rect.pos = button.pos
+        self.rect.size = button.size
+        self.rect.radius = button.radius
+        self.color.rgb = button.ripple_color[:3]
+        self._alpha = button.ripple_color[3]
+        self.color.a = self._alpha
+        self._step = self._alpha * RIPPLE_FRAME / max(button.ripple_duration, RIPPLE_FRAME)
+        if self._event is None:
+            self._event = Clock.schedule_interval(self._fade, RIPPLE_FRAME)
+
+    def _fade(self, dt):
+        self._alpha = max(self._alpha - self._step, 0.0)
+        self.color.a = self._alpha
+        if self._alpha <= 0:
+            self._event = None
+            return False
+
 
 class RoundButton(Button):
     """
@@ -19,10 +82,11 @@ class RoundButton(Button):
     pressed_color = ColorProperty((0.1, 0.5, 0.9, 1))
     animation_duration = NumericProperty(0.1)  # 动画时长
     scale_factor = NumericProperty(0.95)       # 按压缩放比例
-    enable_ripple = BooleanProperty(True)      # 是否启用波纹效果
+    enable_ripple = BooleanProperty(False)     # 是否启用波纹效果 (需要时显式打开)
     ripple_color = ColorProperty([1, 1, 1, 0.3])  # 波纹颜色
     ripple_duration = NumericProperty(0.5)  # 从父类继承
     ripple_scale = NumericProperty(2.0)  # 从父类继承
+    lite = BooleanProperty(False)  # 单个按钮的轻量模式 (另见 set_lite_mode)
 
     # 黑色 0, 0, 0, 1
     # 白色 1, 1, 1, 1
@@ -39,8 +103,9 @@ class RoundButton(Button):
         kwargs.setdefault('background_normal', '')
         kwargs.setdefault('background_color', (0, 0, 0, 0))
         kwargs.setdefault('ripple_duration', 0.4)  # 设置默认值
+        if _lite_mode:
+            kwargs.setdefault('lite', True)
         super().__init__(**kwargs)
-        self.original_scale = self.scale  # 初始化原始缩放值
         self._init_canvas()
         self.bind(
             pos=self._update_canvas,
@@ -51,12 +116,15 @@ class RoundButton(Button):
     def _init_canvas(self):
         with self.canvas.before:
             # 先画边框
+            # 轻量模式减少圆角分段，顶点更少
+            segments = {'segments': LITE_SEGMENTS} if self.is_lite else {}
             if self.border_width > 0:
                 self.border_color_inst = Color(*self.border_color)
                 self.border_rect = RoundedRectangle(
                     pos=self.pos,
                     size=self.size,
-                    radius=self.radius
+                    radius=self.radius,
+                    **segments
                 )
 
             # 再画背景
@@ -64,7 +132,8 @@ class RoundButton(Button):
             self.bg_rect = RoundedRectangle(
                 pos=self.pos,
                 size=self.size,
-                radius=self.radius
+                radius=self.radius,
+                **segments
             )
 
 
@@ -77,8 +146,16 @@ class RoundButton(Button):
             self.border_rect.pos = self.pos
             self.border_rect.size = self.size
 
+    @property
+    def is_lite(self):
+        return self.lite or _lite_mode
+
     def _update_state(self, instance, value):
         """状态更新处理"""
+        if self.is_lite:
+            # 直接切换颜色，不创建 Animation
+            self.bg_color_inst.rgba = self.pressed_color if value == 'down' else self.bg_color
+            return
         # 颜色渐变动画
         Animation(
             rgba=self.pressed_color if value == 'down' else self.bg_color,
@@ -86,35 +163,16 @@ class RoundButton(Button):
         ).start(self.bg_color_inst)
 
     def on_touch_down(self, touch):
-        # 先执行父类的事件处理
-        if super().on_touch_down(touch):
-            return True  # 父类已处理事件
-
-        if self.collide_point(*touch.pos):
-            # 执行你的动画逻辑
-            self.original_scale = self.scale
-            Animation(
-                scale=self.scale_factor,
-                t='out_quad',
-                duration=self.animation_duration
-            ).start(self)
-
-            if self.enable_ripple:
+        # 父类 (ButtonBehavior) 对落在按钮上的触摸总是返回 True，波纹要在调用它之前处理。
+        # 按压时不做缩放：没有画布指令读取 scale，缩放动画看不到效果
+        if (self.enable_ripple and self.collide_point(*touch.pos) and not self.disabled
+                and not getattr(touch, 'is_mouse_scrolling', False)):
+            if self.is_lite:
+                # 轻量模式：波纹由容器共享的覆盖层绘制
+                RippleOverlay.for_container(self.parent or self).play(self)
+            else:
                 self._create_ripple_effect(touch)
-            return True  # 表示事件已处理
-
-        return False  # 事件未处理
-
-
-
-    def on_touch_up(self, touch):
-        """处理释放事件"""
-        Animation(
-            scale=self.original_scale,
-            t='out_elastic',
-            duration=self.animation_duration * 2
-        ).start(self)
-        return super().on_touch_up(touch)
+        return super().on_touch_down(touch)
 
     def _create_ripple_effect(self, touch):
         with self.canvas.after:
@@ -126,10 +184,10 @@ class RoundButton(Button):
                 radius=self.radius
             )
 
-            # 使用 self.ripple_duration 控制动画时间
+            # 使用 self.ripple_duration 控制动画时间；波纹只铺满按钮本身，不画到相邻的行上
             anim_shape = Animation(
-                pos=(self.x - 50, self.y - 50),
-                size=(self.width + 100, self.height + 100),
+                pos=self.pos,
+                size=self.size,
                 duration=self.ripple_duration,  # 使用属性值
                 t='out_quad'
             )
@@ -150,6 +208,11 @@ class RoundButton(Button):
             anim_shape.bind(on_complete=clean_canvas)
 
 
+    def on_bg_color(self, instance, value):
+        """背景色改变时立即更新画布 (按钮被复用、换颜色时)"""
+        if hasattr(self, 'bg_color_inst') and self.state == 'normal':
+            self.bg_color_inst.rgba = value
+
     def on_border_width(self, instance, value):
         """属性监听方法"""
         # 添加画布存在性检查
@@ -1,6 +1,106 @@
+from collections import OrderedDict
+from weakref import WeakSet
+
+from kivy.clock import Clock
 from kivy.uix.label import Label
 from kivy.core.window import Window
 
+TEXT_CACHE_SIZE = 256  # 最多缓存的已渲染文字纹理数量
+
+
+class TextureCache:
+    """
+    Bounded LRU of rendered label text: (texture, texture_size) keyed by
+    everything that affects the layout (text, font, size, wrap width, ...).
+    Reopening a detail popup or revisiting a list page finds its strings here
+    and skips text layout and rasterisation.
+    """
+
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item
+
+    def put(self, key, texture, texture_size):
+        self._items[key] = (texture, tuple(texture_size))
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+
+text_cache = TextureCache()
+
+# 正在显示缓存纹理的标签 (GL 上下文重建后需要重新渲染)
+_cached_labels = WeakSet()
+
+
+def reset_text_cache(*args):
+    """
+    Drops every cached texture and re-renders the labels showing one. Call
+    once the GL context was recreated (Android pause/resume, window restore):
+    a cached texture is detached from the core label that drew it, so the
+    context reload refills it with that label's current text, or nothing.
+    """
+    text_cache.clear()
+    for label in list(_cached_labels):
+        label._trigger_texture()
+
+
+Window.bind(on_restore=lambda *args: Clock.schedule_once(reset_text_cache))
+
+
+class CachedTextureBehavior:
+    """
+    Mixin for Label subclasses: texture_update looks the text up in
+    `text_cache` before laying it out, and stores what it renders.
+    """
+
+    def _texture_key(self):
+        return (
+            self.text, self.font_name, self.font_size, self.bold, self.italic,
+            tuple(self.text_size), self.halign, self.valign, self.line_height,
+            self.markup, tuple(self.color), tuple(self.padding),
+        )
+
+    def texture_update(self, *largs):
+        if not self.text:
+            return super().texture_update(*largs)
+        key = self._texture_key()
+        cached = text_cache.get(key)
+        if cached is not None:
+            texture, texture_size = cached
+            self.texture = texture
+            self.texture_size = list(texture_size)
+            _cached_labels.add(self)
+            return
+        super().texture_update(*largs)
+        if self.texture is not None:
+            text_cache.put(key, self.texture, self.texture_size)
+            _cached_labels.add(self)
+            # 缓存的纹理不能再被 core label 复用 (下次渲染会原地覆盖它)
+            self._label.texture = None
+
+
+class CachedLabel(CachedTextureBehavior, Label):
+    """Label whose rendered text is shared through `text_cache`."""
+
+
 def create_wrapped_label(text, font_size=None, **kwargs):
     """Creates a Label that wraps text within the window width."""
     if 'halign' in kwargs:
@@ -8,7 +108,7 @@ def create_wrapped_label(text, font_size=None, **kwargs):
     if 'valign' in kwargs:
         del kwargs['valign']
 
-    label = Label(
+    label = CachedLabel(
         text=text,
         size_hint_y=None,
         halign='center',
@@ -25,15 +125,16 @@ def create_wrapped_label(text, font_size=None, **kwargs):
 
     # Adjust text_size and height automatically
     def update_text_size(instance, width):
-        instance.text_size = (width - 40, None) # Keep consistent padding
+        if instance.text_size[0] != width - 40:  # 宽度没变就不重新排版
+            instance.text_size = (width - 40, None) # Keep consistent padding
 
     def update_height(instance, texture_size):
         instance.height = texture_size[1]
 
     label.bind(width=update_text_size, texture_size=update_height)
 
-    # Trigger initial height calculation
+    # Trigger initial height calculation (命中缓存时不排版)
     label.texture_update()
     label.height = label.texture_size[1]
 
-    return label
\ No newline at end of file
+    return label
@@ -0,0 +1,185 @@
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.checkbox import CheckBox
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataAdapter, RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+
+from core.bitset import PositionSet
+from ui_elements.buttons import RoundButton
+from ui_elements.labels import CachedTextureBehavior, CachedLabel
+
+EVEN_ROW_COLOR = (0.275, 0.510, 0.706, 1)
+ODD_ROW_COLOR = (0.345, 0.627, 0.827, 1)
+ROW_POOL_SIZE = 64  # 每种行控件最多保留的空闲数量
+
+
+class RowPool:
+    """
+    Free list of row widgets shared by every EntryListView: a list that
+    closes hands its rows back, and the next list (another popup, or the
+    same view reopened) takes them instead of constructing new ones.
+    """
+
+    def __init__(self, max_size=ROW_POOL_SIZE):
+        self.max_size = max_size
+        self._free = {}
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, viewclass):
+        """A free row of `viewclass`, or None if the pool has none."""
+        free = self._free.get(viewclass)
+        if free:
+            self.reused += 1
+            return free.pop()
+        return None
+
+    def release(self, view):
+        if view.parent is not None:
+            view.parent.remove_widget(view)
+        free = self._free.setdefault(view.__class__, [])
+        if len(free) < self.max_size:
+            free.append(view)
+
+
+row_pool = RowPool()
+
+
+class PooledDataAdapter(RecycleDataAdapter):
+    """RecycleDataAdapter that takes new views from the shared row pool before constructing any."""
+
+    def create_view(self, index, data_item, viewclass):
+        if viewclass is None:
+            return None
+        view = row_pool.acquire(viewclass)
+        if view is None:
+            row_pool.created += 1
+            return super().create_view(index, data_item, viewclass)
+        self.refresh_view_attrs(index, data_item, view)
+        return view
+
+    def release_views(self):
+        """Hands every view this adapter holds back to the pool."""
+        views = list(self.views.values())
+        for dirty in self.dirty_views.values():
+            views.extend(dirty.values())
+        self.views = {}
+        self.dirty_views.clear()
+        for view in views:
+            row_pool.release(view)
+
+
+class EntryRow(RecycleDataViewBehavior, CachedTextureBehavior, RoundButton):
+    """可回收的条目按钮：只在滚动到可见区域时绑定到某一行 (行文字的纹理经 text_cache 复用)"""
+    index = None
+    _list_view = None
+
+    def refresh_view_attrs(self, rv, index, data):
+        self._list_view = rv
+        self.index = index
+        self.text = rv.row_text(index)
+        self.bg_color = rv.row_color(index)
+        return super().refresh_view_attrs(rv, index, data)
+
+    def on_press(self):
+        if self._list_view is not None and self.index is not None:
+            self._list_view.press_row(self.index)
+
+
+class SelectableEntryRow(RecycleDataViewBehavior, BoxLayout):
+    """可回收的勾选行：勾选状态保存在 EntryListView.selection (位集) 中，不在控件里"""
+    index = None
+    _list_view = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._refreshing = False
+        self.label = CachedLabel(size_hint_x=0.8, halign='left', valign='middle')
+        self.label.bind(size=lambda instance, size: setattr(instance, 'text_size', size))
+        self.checkbox = CheckBox(size_hint_x=0.2)
+        self.checkbox.bind(active=self._on_active)
+        self.add_widget(self.label)
+        self.add_widget(self.checkbox)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self._list_view = rv
+        self.index = index
+        self._refreshing = True  # 绑定新行时设置勾选框，不算用户操作
+        self.label.text = rv.row_text(index)
+        self.checkbox.active = index in rv.selection
+        self._refreshing = False
+        return super().refresh_view_attrs(rv, index, data)
+
+    def _on_active(self, checkbox, value):
+        if not self._refreshing and self._list_view is not None and self.index is not None:
+            self._list_view.set_selected(self.index, value)
+
+
+class EntryListView(RecycleView):
+    """
+    Virtualised list of entries: only the rows that fit on screen have
+    widgets, and scrolling rebinds them to other entries.
+
+    The data model is just the entry list; a row's text is formatted by
+    `format_row(entry)` when the row becomes visible. Selection (for
+    SelectableEntryRow lists) is a PositionSet of row indexes. Row widgets
+    come from the shared `row_pool`; call `release_rows` when the list is
+    closed so the next list can reuse them.
+    """
+
+    def __init__(self, format_row, viewclass=EntryRow, row_height=80, on_row_press=None,
+                 row_colors=(EVEN_ROW_COLOR, ODD_ROW_COLOR), **kwargs):
+        kwargs.setdefault('view_adapter', PooledDataAdapter())
+        super().__init__(**kwargs)
+        self.format_row = format_row
+        self.on_row_press = on_row_press
+        self.row_colors = row_colors
+        self.entries = []
+        self.selection = PositionSet()
+        layout = RecycleBoxLayout(
+            default_size=(None, row_height), default_size_hint=(1, None),
+            size_hint_y=None, orientation='vertical', spacing=5
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+        self.viewclass = viewclass
+
+    def set_entries(self, entries):
+        """Shows a new list of entries (clears the selection) and scrolls to the top."""
+        self.entries = entries
+        self.selection = PositionSet()
+        self.data = [{} for _ in range(len(entries))]
+        self.scroll_y = 1
+
+    def row_text(self, index):
+        return self.format_row(self.entries[index])
+
+    def row_color(self, index):
+        return self.row_colors[index % 2]
+
+    def press_row(self, index):
+        if self.on_row_press is not None:
+            self.on_row_press(self.entries[index])
+
+    def set_selected(self, index, selected):
+        if selected:
+            self.selection.add(index)
+        else:
+            self.selection.discard(index)
+
+    def select_all(self, selected=True):
+        """Selects (or clears) every row and refreshes the visible ones."""
+        self.selection = PositionSet(range(len(self.entries))) if selected else PositionSet()
+        self.refresh_from_data()
+
+    def selected_entries(self):
+        """Selected entries, in list order."""
+        return [self.entries[i] for i in self.selection.iter_sorted()]
+
+    def release_rows(self):
+        """Returns this list's row widgets to the pool (the list shows nothing until data is set again)."""
+        self.entries = []
+        self.selection = PositionSet()
+        self.data = []
+        if isinstance(self.view_adapter, PooledDataAdapter):
+            self.view_adapter.release_views()